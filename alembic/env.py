@@ -0,0 +1,42 @@
+# Migrations for databases created before a column or index was added.
+# New tables are still created by create_all() at startup; revisions only
+# alter tables that already exist, and skip work the schema already has.
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from app.core.config import settings
+from app.database.database import Base
+from app.models import user, course, enrollment, content, consultation, analytics, payment, job, notification, profiling  # noqa: F401
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = [Base.metadata, consultation.Base.metadata]
+
+
+def database_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or settings.database_url
+
+
+def run_migrations_offline():
+    context.configure(url=database_url(), target_metadata=target_metadata, literal_binds=True,
+                      dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = create_engine(database_url())
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata,
+                          render_as_batch=connection.dialect.name == "sqlite")
+        with context.begin_transaction():
+            context.run_migrations()
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
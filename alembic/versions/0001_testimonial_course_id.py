@@ -0,0 +1,79 @@
+"""Testimonials rate a course; backfill course_stats
+
+Revision ID: 0001_testimonial_course_id
+Revises:
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.database.migrations import has_column, has_index, has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_testimonial_course_id"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Written out here so later model changes cannot alter this revision
+REBUILD_COURSE_STATS = sa.text("""
+    INSERT INTO course_stats (course_id, enrollment_count, lesson_count, rating_sum, rating_count, updated_at)
+    SELECT courses.id, COALESCE(e.n, 0), COALESCE(l.n, 0), COALESCE(r.total, 0), COALESCE(r.n, 0),
+           CURRENT_TIMESTAMP
+    FROM courses
+    LEFT JOIN (
+        SELECT course_id, COUNT(*) AS n FROM enrollments
+        WHERE status IN ('ACTIVE', 'COMPLETED') GROUP BY course_id
+    ) e ON e.course_id = courses.id
+    LEFT JOIN (SELECT course_id, COUNT(*) AS n FROM lessons GROUP BY course_id) l ON l.course_id = courses.id
+    LEFT JOIN (
+        SELECT course_id, SUM(rating) AS total, COUNT(*) AS n FROM testimonials
+        WHERE is_approved = :approved AND course_id IS NOT NULL GROUP BY course_id
+    ) r ON r.course_id = courses.id
+""").bindparams(approved=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, "testimonials"):
+        return  # new database: create_all() builds the current schema
+    if not has_column(bind, "testimonials", "course_id"):
+        with op.batch_alter_table("testimonials") as batch:
+            batch.add_column(sa.Column("course_id", sa.Integer, nullable=True))
+            batch.create_foreign_key("fk_testimonials_course_id", "courses", ["course_id"], ["id"])
+    if not has_index(bind, "testimonials", "ix_testimonials_course_id"):
+        op.create_index("ix_testimonials_course_id", "testimonials", ["course_id"])
+
+    # Counters for courses that existed before course_stats. App startup may
+    # already have created the table empty (or counted only recent changes),
+    # so rebuild it from scratch either way.
+    if not has_table(bind, "course_stats"):
+        op.create_table(
+            "course_stats",
+            sa.Column("course_id", sa.Integer, sa.ForeignKey("courses.id"), primary_key=True),
+            sa.Column("enrollment_count", sa.Integer, nullable=False, default=0),
+            sa.Column("lesson_count", sa.Integer, nullable=False, default=0),
+            sa.Column("rating_sum", sa.Integer, nullable=False, default=0),
+            sa.Column("rating_count", sa.Integer, nullable=False, default=0),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+    op.execute("DELETE FROM course_stats")
+    op.execute(REBUILD_COURSE_STATS)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, "testimonials") or not has_column(bind, "testimonials", "course_id"):
+        return
+    if has_index(bind, "testimonials", "ix_testimonials_course_id"):
+        op.drop_index("ix_testimonials_course_id", table_name="testimonials")
+    foreign_keys = [fk["name"] for fk in sa.inspect(bind).get_foreign_keys("testimonials")
+                    if fk["constrained_columns"] == ["course_id"] and fk["name"]]
+    with op.batch_alter_table("testimonials") as batch:
+        for name in foreign_keys:
+            batch.drop_constraint(name, type_="foreignkey")
+        batch.drop_column("course_id")
@@ -0,0 +1,57 @@
+"""One lesson_progress row per (enrollment, lesson) for upserting flushes
+
+Revision ID: 0002_lesson_progress_unique
+Revises: 0001_testimonial_course_id
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.database.migrations import has_index, has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_lesson_progress_unique"
+down_revision: Union[str, Sequence[str], None] = "0001_testimonial_course_id"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONSTRAINT = "uq_lesson_progress_enrollment_lesson"
+SAME_LESSON = "p.enrollment_id = lesson_progress.enrollment_id AND p.lesson_id = lesson_progress.lesson_id"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, "lesson_progress") or has_index(bind, "lesson_progress", CONSTRAINT):
+        return
+    # Merge duplicates into the oldest row the way the progress flusher merges
+    # heartbeats: the most watch time, completed if any copy was
+    op.execute(sa.text(f"""
+        UPDATE lesson_progress SET
+            watch_time_seconds = (SELECT MAX(p.watch_time_seconds) FROM lesson_progress p WHERE {SAME_LESSON}),
+            last_watched_at = (SELECT MAX(p.last_watched_at) FROM lesson_progress p WHERE {SAME_LESSON}),
+            completed_at = (SELECT MIN(p.completed_at) FROM lesson_progress p WHERE {SAME_LESSON}),
+            is_completed = EXISTS (SELECT 1 FROM lesson_progress p WHERE {SAME_LESSON} AND p.is_completed = TRUE)
+        WHERE id IN (
+            SELECT MIN(id) FROM lesson_progress GROUP BY enrollment_id, lesson_id HAVING COUNT(*) > 1
+        )
+    """))
+    op.execute(sa.text("""
+        DELETE FROM lesson_progress WHERE id NOT IN (
+            SELECT keep.id FROM (
+                SELECT MIN(id) AS id FROM lesson_progress GROUP BY enrollment_id, lesson_id
+            ) AS keep
+        )
+    """))
+    with op.batch_alter_table("lesson_progress") as batch:
+        batch.create_unique_constraint(CONSTRAINT, ["enrollment_id", "lesson_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if has_table(bind, "lesson_progress") and has_index(bind, "lesson_progress", CONSTRAINT):
+        with op.batch_alter_table("lesson_progress") as batch:
+            batch.drop_constraint(CONSTRAINT, type_="unique")
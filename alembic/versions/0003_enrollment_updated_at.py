@@ -0,0 +1,44 @@
+"""enrollments.updated_at for incremental analytics refreshes
+
+Revision ID: 0003_enrollment_updated_at
+Revises: 0002_lesson_progress_unique
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.database.migrations import has_column, has_index, has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_enrollment_updated_at"
+down_revision: Union[str, Sequence[str], None] = "0002_lesson_progress_unique"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, "enrollments"):
+        return
+    if not has_column(bind, "enrollments", "updated_at"):
+        # SQLite cannot ALTER in a column with a now() default; rebuild the table there
+        recreate = "always" if bind.dialect.name == "sqlite" else "auto"
+        with op.batch_alter_table("enrollments", recreate=recreate) as batch:
+            batch.add_column(sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()))
+        op.execute(sa.text("UPDATE enrollments SET updated_at = enrolled_at WHERE enrolled_at IS NOT NULL"))
+    if not has_index(bind, "enrollments", "ix_enrollments_updated_at"):
+        op.create_index("ix_enrollments_updated_at", "enrollments", ["updated_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, "enrollments") or not has_column(bind, "enrollments", "updated_at"):
+        return
+    if has_index(bind, "enrollments", "ix_enrollments_updated_at"):
+        op.drop_index("ix_enrollments_updated_at", table_name="enrollments")
+    with op.batch_alter_table("enrollments") as batch:
+        batch.drop_column("updated_at")
@@ -0,0 +1,93 @@
+"""Parsed consultation slots with a one-booking-per-slot index
+
+Revision ID: 0004_consultation_scheduled_slot
+Revises: 0003_enrollment_updated_at
+Create Date: 2026-10-19
+
+"""
+from datetime import date, time
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.database.migrations import has_column, has_index, has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_consultation_scheduled_slot"
+down_revision: Union[str, Sequence[str], None] = "0003_enrollment_updated_at"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "consultation_schedules"
+BOOKED = sa.text("status = 'scheduled'")
+
+
+def _parse_slot(preferred_date, preferred_time):
+    try:
+        return date.fromisoformat(preferred_date), time.fromisoformat(preferred_time)
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, TABLE):
+        return
+    with op.batch_alter_table(TABLE) as batch:
+        if not has_column(bind, TABLE, "scheduled_date"):
+            batch.add_column(sa.Column("scheduled_date", sa.Date(), nullable=True))
+        if not has_column(bind, TABLE, "scheduled_time"):
+            batch.add_column(sa.Column("scheduled_time", sa.Time(), nullable=True))
+
+    # Backfill from the free-text preferences; the oldest live booking of a
+    # slot keeps it, later duplicates stay unparsed so the unique index holds
+    schedules = sa.table(
+        TABLE, sa.column("id", sa.Integer), sa.column("status", sa.String),
+        sa.column("preferred_date", sa.String), sa.column("preferred_time", sa.String),
+        sa.column("scheduled_date", sa.Date), sa.column("scheduled_time", sa.Time),
+    )
+    taken = set(bind.execute(
+        sa.select(schedules.c.scheduled_date, schedules.c.scheduled_time)
+        .where(schedules.c.scheduled_date.is_not(None), schedules.c.status == "scheduled")
+    ).all())
+    rows = bind.execute(
+        sa.select(schedules.c.id, schedules.c.status, schedules.c.preferred_date, schedules.c.preferred_time)
+        .where(schedules.c.scheduled_date.is_(None))
+        .order_by(schedules.c.id)
+    ).all()
+    for row in rows:
+        slot = _parse_slot(row.preferred_date, row.preferred_time)
+        if slot is None:
+            continue
+        if row.status == "scheduled":
+            if slot in taken:
+                print(f"Warning: Consultation {row.id} double-books {slot[0]} {slot[1]}; left unscheduled")
+                continue
+            taken.add(slot)
+        bind.execute(
+            schedules.update().where(schedules.c.id == row.id)
+            .values(scheduled_date=slot[0], scheduled_time=slot[1])
+        )
+
+    if not has_index(bind, TABLE, "ix_consultation_slot_lookup"):
+        op.create_index("ix_consultation_slot_lookup", TABLE, ["scheduled_date", "scheduled_time", "status"])
+    if not has_index(bind, TABLE, "uq_consultation_booked_slot"):
+        op.create_index(
+            "uq_consultation_booked_slot", TABLE, ["scheduled_date", "scheduled_time"], unique=True,
+            postgresql_where=BOOKED, sqlite_where=BOOKED,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, TABLE):
+        return
+    for name in ("uq_consultation_booked_slot", "ix_consultation_slot_lookup"):
+        if has_index(bind, TABLE, name):
+            op.drop_index(name, table_name=TABLE)
+    with op.batch_alter_table(TABLE) as batch:
+        for column in ("scheduled_time", "scheduled_date"):
+            if has_column(bind, TABLE, column):
+                batch.drop_column(column)
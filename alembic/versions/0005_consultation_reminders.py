@@ -0,0 +1,80 @@
+"""Consultation reminder schedule and send leases
+
+Revision ID: 0005_consultation_reminders
+Revises: 0004_consultation_scheduled_slot
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from app.database.migrations import has_column, has_index, has_table
+from app.utils.consultation_slots import reminder_time
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_consultation_reminders"
+down_revision: Union[str, Sequence[str], None] = "0004_consultation_scheduled_slot"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = "consultation_schedules"
+COLUMNS = (
+    ("remind_at", sa.DateTime),
+    ("reminder_sent_at", sa.DateTime),
+    ("reminder_lease_owner", lambda: sa.String(100)),
+    ("reminder_lease_until", sa.DateTime),
+)
+UNSENT = sa.text("reminder_sent_at IS NULL")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, TABLE):
+        return
+    with op.batch_alter_table(TABLE) as batch:
+        for name, type_ in COLUMNS:
+            if not has_column(bind, TABLE, name):
+                batch.add_column(sa.Column(name, type_(), nullable=True))
+
+    # Bookings made before reminders existed get their remind_at; the
+    # scheduler skips the ones already too late to send
+    schedules = sa.table(
+        TABLE, sa.column("id", sa.Integer), sa.column("status", sa.String),
+        sa.column("scheduled_date", sa.Date), sa.column("scheduled_time", sa.Time),
+        sa.column("remind_at", sa.DateTime), sa.column("reminder_sent_at", sa.DateTime),
+    )
+    rows = bind.execute(
+        sa.select(schedules.c.id, schedules.c.scheduled_date, schedules.c.scheduled_time).where(
+            schedules.c.status == "scheduled",
+            schedules.c.scheduled_date.is_not(None),
+            schedules.c.scheduled_time.is_not(None),
+            schedules.c.remind_at.is_(None),
+            schedules.c.reminder_sent_at.is_(None),
+        )
+    ).all()
+    for row in rows:
+        bind.execute(
+            schedules.update().where(schedules.c.id == row.id)
+            .values(remind_at=reminder_time(row.scheduled_date, row.scheduled_time))
+        )
+
+    if not has_index(bind, TABLE, "ix_consultation_pending_reminders"):
+        op.create_index(
+            "ix_consultation_pending_reminders", TABLE, ["remind_at"],
+            postgresql_where=UNSENT, sqlite_where=UNSENT,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, TABLE):
+        return
+    if has_index(bind, TABLE, "ix_consultation_pending_reminders"):
+        op.drop_index("ix_consultation_pending_reminders", table_name=TABLE)
+    with op.batch_alter_table(TABLE) as batch:
+        for name, _ in reversed(COLUMNS):
+            if has_column(bind, TABLE, name):
+                batch.drop_column(name)
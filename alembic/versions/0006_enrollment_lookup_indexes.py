@@ -0,0 +1,42 @@
+"""Composite enrollment indexes for per-user and per-course lookups
+
+Revision ID: 0006_enrollment_lookup_indexes
+Revises: 0005_consultation_reminders
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from app.database.migrations import has_index, has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_enrollment_lookup_indexes"
+down_revision: Union[str, Sequence[str], None] = "0005_consultation_reminders"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_enrollments_user_id_enrolled_at": ["user_id", "enrolled_at"],
+    "ix_enrollments_course_id_status": ["course_id", "status"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, "enrollments"):
+        return
+    for name, columns in INDEXES.items():
+        if not has_index(bind, "enrollments", name):
+            op.create_index(name, "enrollments", columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if not has_table(bind, "enrollments"):
+        return
+    for name in INDEXES:
+        if has_index(bind, "enrollments", name):
+            op.drop_index(name, table_name="enrollments")
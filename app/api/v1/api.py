@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, courses, contact, testimonials, enrollments, consultation
+from app.api.v1.endpoints import auth, courses, contact, testimonials, enrollments, consultation, progress, analytics, profiling, uploads, payments, market, candles, backtests, admin_events
 
 api_router = APIRouter()
 
@@ -9,3 +9,12 @@ api_router.include_router(contact.router, prefix="/contact", tags=["contact"])
 api_router.include_router(testimonials.router, prefix="/testimonials", tags=["testimonials"])
 api_router.include_router(enrollments.router, prefix="/enrollments", tags=["enrollments"])
 api_router.include_router(consultation.router, prefix="/consultation", tags=["consultation"])
+api_router.include_router(progress.router, prefix="/progress", tags=["progress"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+api_router.include_router(payments.router, prefix="/payments", tags=["payments"])
+api_router.include_router(market.router, prefix="/market", tags=["market data"])
+api_router.include_router(candles.router, prefix="/candles", tags=["candles"])
+api_router.include_router(backtests.router, prefix="/backtests", tags=["backtests"])
+api_router.include_router(profiling.router, prefix="/admin/profile", tags=["profiling"])
+api_router.include_router(admin_events.router, prefix="/admin/events", tags=["admin events"])
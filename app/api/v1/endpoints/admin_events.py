@@ -0,0 +1,57 @@
+import asyncio
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from app.api.deps import get_current_admin
+from app.models.user import User
+from app.utils.admin_events import admin_events
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+EVENT_TYPES = {"contact_inquiry", "enrollment", "consultation"}
+# SSE comment sent when nothing happened, so proxies keep the stream open
+KEEPALIVE_SECONDS = 15
+
+
+@router.get("/stream")
+async def stream_admin_events(
+    types: Optional[str] = Query(None, description="Comma-separated subset of contact_inquiry,enrollment,consultation"),
+    last_event_id: Optional[str] = Header(None, description="Sent by EventSource when it reconnects"),
+    current_user: User = Depends(get_current_admin)
+):
+    """Server-sent events: new inquiries, enrollments and consultations as they are committed (admin only)"""
+    wanted = None
+    if types:
+        wanted = {item.strip() for item in types.split(",") if item.strip()}
+        unknown = wanted - EVENT_TYPES
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown event types: {', '.join(sorted(unknown))}"
+            )
+    subscription = admin_events.subscribe(wanted, last_event_id)
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    batch = await asyncio.wait_for(subscription.next_batch(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscription.lagged:
+                    # Events were dropped; the dashboard should reload its lists once,
+                    # which covers this batch as well
+                    subscription.lagged = False
+                    yield f"id: {admin_events.last_event_id}\nevent: reload\ndata: {{}}\n\n"
+                    continue
+                for event_id, item in batch:
+                    yield f"id: {event_id}\nevent: {item['type']}\ndata: {json.dumps(item)}\n\n"
+        finally:
+            admin_events.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
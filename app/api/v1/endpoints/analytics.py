@@ -0,0 +1,83 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.database.database import get_db
+from app.api.deps import get_current_admin
+from app.models.user import User
+from app.schemas.analytics import EnrollmentTimeBucket, RevenueBreakdown, CityDistribution, StatusFunnelStep
+from app.utils import analytics
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("/enrollments", response_model=List[EnrollmentTimeBucket])
+def get_enrollments_over_time(
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    course_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Enrollments and revenue per day or week (admin only)"""
+    return analytics.report_cache.get_or_compute(
+        ("enrollments", bucket, start, end, course_id),
+        lambda: analytics.enrollments_over_time(db, bucket, start, end, course_id)
+    )
+
+
+@router.get("/revenue", response_model=List[RevenueBreakdown])
+def get_revenue(
+    group_by: str = Query("course", pattern="^(course|category)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Revenue by course or category (admin only)"""
+    return analytics.report_cache.get_or_compute(
+        ("revenue", group_by, start, end),
+        lambda: analytics.revenue_breakdown(db, group_by, start, end)
+    )
+
+
+@router.get("/cities", response_model=List[CityDistribution])
+def get_city_distribution(
+    limit: int = Query(20, ge=1, le=100),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Enrollments by student city (admin only)"""
+    return analytics.report_cache.get_or_compute(
+        ("cities", limit, start, end),
+        lambda: analytics.city_distribution(db, limit, start, end)
+    )
+
+
+@router.get("/funnel", response_model=List[StatusFunnelStep])
+def get_status_funnel(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Enrollment counts per status (admin only)"""
+    return analytics.report_cache.get_or_compute(
+        ("funnel", start, end),
+        lambda: analytics.status_funnel(db, start, end)
+    )
+
+
+@router.post("/refresh")
+def refresh_analytics(
+    full: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Refresh rollup tables now; full=true rebuilds them from scratch (admin only)"""
+    days = analytics.refresh_rollups(db, full=full)
+    return {"message": "Analytics refreshed successfully", "days_recomputed": days}
@@ -7,8 +7,9 @@ from app.core.security import verify_password, create_access_token, create_refre
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, User as UserSchema, Token
 from app.core.config import settings
+from app.core.profiler import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("/register", response_model=UserSchema)
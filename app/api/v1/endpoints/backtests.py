@@ -0,0 +1,46 @@
+import asyncio
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.api.deps import get_current_active_user
+from app.models.user import User
+from app.schemas.backtest import BacktestRequest, BacktestResult, StrategyInfo
+from app.utils import backtest, candles
+from app.utils.candles import CandleDataError, to_epoch
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("/strategies", response_model=List[StrategyInfo])
+def list_strategies():
+    """Built-in strategies and their default parameters"""
+    return [
+        StrategyInfo(name=name, description=function.__doc__, params=defaults)
+        for name, (function, defaults) in backtest.STRATEGIES.items()
+    ]
+
+
+@router.post("", response_model=BacktestResult)
+async def run_backtest(
+    request: BacktestRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """Backtest a strategy over stored candles in the worker pool"""
+    symbol = request.symbol.upper()
+    try:
+        result, cached = await backtest.run_cached(
+            candles.candle_store, symbol, request.interval, to_epoch(request.start), to_epoch(request.end),
+            request.strategy, request.params, request.cost_bps, user_id=current_user.id
+        )
+    except backtest.BacktestBusyError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except backtest.BacktestError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except CandleDataError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Backtest took too long")
+    return BacktestResult(
+        strategy=request.strategy, params=backtest.resolve_params(request.strategy, request.params),
+        symbol=symbol, interval=request.interval, cached=cached, **result
+    )
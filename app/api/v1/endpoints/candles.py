@@ -0,0 +1,114 @@
+import io
+import json
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from app.api.deps import get_current_admin
+from app.models.user import User
+from app.utils.candles import CandleDataError, candle_store, to_epoch
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+FORMAT_PATTERN = "^(json|binary)$"
+
+
+def _json_list(values: np.ndarray) -> list:
+    """List for JSON with NaN as null; indicators are only NaN during warm-up"""
+    missing = np.isnan(values)
+    if not missing.any():
+        return values.tolist()
+    result = values.tolist()
+    for index in np.flatnonzero(missing):
+        result[index] = None
+    return result
+
+
+def columns_response(columns: Dict[str, np.ndarray], response_format: str, **meta) -> Response:
+    """Columnar JSON, or raw little-endian float64 columns for typed-array clients.
+
+    The binary layout is the columns named in X-Columns, in order, each
+    X-Rows values long.
+    """
+    if response_format == "binary":
+        body = b"".join(np.asarray(values, dtype="<f8").tobytes() for values in columns.values())
+        rows = len(next(iter(columns.values()))) if columns else 0
+        return Response(content=body, media_type="application/octet-stream",
+                        headers={"X-Columns": ",".join(columns), "X-Rows": str(rows)})
+    payload = {**meta, **{name: _json_list(values) if values.dtype.kind == "f" else values.tolist()
+                          for name, values in columns.items()}}
+    # Pre-serialized: FastAPI's encoder walks every list element
+    return Response(content=json.dumps(payload), media_type="application/json")
+
+
+def _not_found(e: CandleDataError):
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.get("")
+def list_series():
+    """Symbols and intervals with stored candles"""
+    return [{"symbol": symbol, "interval": interval} for symbol, interval in candle_store.symbols()]
+
+
+@router.get("/{symbol}/{interval}")
+def get_candles(
+    symbol: str,
+    interval: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    response_format: str = Query("json", alias="format", pattern=FORMAT_PATTERN)
+):
+    """OHLCV candles between start and end (inclusive), columnar"""
+    symbol = symbol.upper()
+    try:
+        series = candle_store.load(symbol, interval)
+    except CandleDataError as e:
+        raise _not_found(e)
+    lo, hi = series.bounds(to_epoch(start), to_epoch(end))
+    return columns_response(series.columns(lo, hi), response_format, symbol=symbol, interval=interval)
+
+
+@router.get("/{symbol}/{interval}/indicators/{name}")
+def get_indicator(
+    symbol: str,
+    interval: str,
+    name: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    period: Optional[int] = Query(None, ge=1, le=1000),
+    fast: Optional[int] = Query(None, ge=1, le=1000),
+    slow: Optional[int] = Query(None, ge=1, le=1000),
+    signal: Optional[int] = Query(None, ge=1, le=1000),
+    width: Optional[float] = Query(None, gt=0, le=10),
+    response_format: str = Query("json", alias="format", pattern=FORMAT_PATTERN)
+):
+    """SMA, EMA, RSI, MACD or Bollinger bands on close, over the requested range"""
+    symbol = symbol.upper()
+    params = {"period": period, "fast": fast, "slow": slow, "signal": signal, "width": width}
+    try:
+        series, values = candle_store.indicator(symbol, interval, name.lower(), params)
+    except CandleDataError as e:
+        raise _not_found(e)
+    lo, hi = series.bounds(to_epoch(start), to_epoch(end))
+    columns = {"timestamp": series.timestamp[lo:hi]}
+    columns.update({key: column[lo:hi] for key, column in values.items()})
+    return columns_response(columns, response_format, symbol=symbol, interval=interval, indicator=name.lower())
+
+
+@router.post("/{symbol}/{interval}")
+def import_candles(
+    symbol: str,
+    interval: str,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_admin)
+):
+    """Merge a CSV (timestamp,open,high,low,close,volume) into a series (admin only)"""
+    symbol = symbol.upper()
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig")
+    try:
+        rows = candle_store.import_csv(symbol, interval, text)
+    except CandleDataError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"symbol": symbol, "interval": interval, "rows": rows}
@@ -1,16 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, List
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import os
 from app.api.deps import get_db
+from app.core.config import settings
 from app.models.consultation import ConsultationSchedule
+from app.utils.consultation_slots import (
+    SlotUnavailableError, SlotTakenError, get_availability, parse_slot, book_consultation,
+    format_consultation_slot, reminder_time, slot_start_utc
+)
+from app.utils.email import CONFIRMATION_PRIORITY, EMAIL_LANE
+from app.utils.jobs import enqueue, job
+from app.utils.notifications import notify_admin
+from app.core.profiler import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 class ConsultationRequest(BaseModel):
     name: str
@@ -20,10 +30,13 @@ class ConsultationRequest(BaseModel):
     time: str
     message: Optional[str] = None
 
+class DayAvailability(BaseModel):
+    day: date
+    slots: List[str]
+
 # Gmail SMTP configuration from environment
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = 587
-ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "smitpatidar6704@gmail.com")
 GMAIL_USER = os.getenv("SMTP_USER", "smitpatidar6704@gmail.com")
 GMAIL_PASSWORD = os.getenv("SMTP_PASSWORD", "avec awrj wxuw uhcu")
 
@@ -57,56 +70,18 @@ def send_email(to_email: str, subject: str, body: str, is_html: bool = False):
         print(f"Failed to send email: {str(e)}")
         return False
 
-def format_consultation_date_time(date_str: str, time_str: str) -> str:
-    """Format date and time for display"""
-    try:
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        formatted_date = date_obj.strftime("%A, %B %d, %Y")
-        
-        # Convert 24-hour time to 12-hour format
-        time_obj = datetime.strptime(time_str, "%H:%M")
-        formatted_time = time_obj.strftime("%I:%M %p")
-        
-        return f"{formatted_date} at {formatted_time}"
-    except:
-        return f"{date_str} at {time_str}"
-
-@router.post("/schedule-consultation")
-async def schedule_consultation(
-    request: ConsultationRequest,
-    db: Session = Depends(get_db)
-):
-    try:
-        # Save to database
-        consultation = ConsultationSchedule(
-            name=request.name,
-            email=request.email,
-            phone=request.phone,
-            preferred_date=request.date,
-            preferred_time=request.time,
-            message=request.message,
-            status="scheduled",
-            created_at=datetime.utcnow()
-        )
-        
-        db.add(consultation)
-        db.commit()
-        db.refresh(consultation)
-        
-        # Format date and time for emails
-        consultation_datetime = format_consultation_date_time(request.date, request.time)
-        
-        # Send confirmation email to user
-        user_subject = "Consultation Scheduled - Wealth Genius"
-        user_body = f"""
-Dear {request.name},
+def build_consultation_confirmation_email(consultation: ConsultationSchedule, consultation_datetime: str):
+    """Subject and body of the confirmation sent to the client"""
+    subject = "Consultation Scheduled - Wealth Genius"
+    body = f"""
+Dear {consultation.name},
 
 Thank you for scheduling a free consultation with Wealth Genius!
 
 Your consultation details:
 📅 Date & Time: {consultation_datetime}
-📧 Email: {request.email}
-📱 Phone: {request.phone}
+📧 Email: {consultation.email}
+📱 Phone: {consultation.phone}
 
 What to expect during your consultation:
 • 30-minute one-on-one session with our trading expert
@@ -130,20 +105,22 @@ Wealth Genius - Your Gateway to Financial Success
 409/ Golden Square, Near, Kalyan Chowk, Nikol
 Ahmedabad, Gujarat - 382350
 """
-        
-        # Send notification email to admin
-        admin_subject = f"New Consultation Scheduled - {request.name}"
-        admin_body = f"""
+    return subject, body
+
+def build_consultation_admin_email(consultation: ConsultationSchedule, consultation_datetime: str):
+    """Subject and body of the notification sent to the admin"""
+    subject = f"New Consultation Scheduled - {consultation.name}"
+    body = f"""
 New consultation scheduled on Wealth Genius platform:
 
 Client Details:
-👤 Name: {request.name}
-📧 Email: {request.email}
-📱 Phone: {request.phone}
+👤 Name: {consultation.name}
+📧 Email: {consultation.email}
+📱 Phone: {consultation.phone}
 📅 Preferred Date & Time: {consultation_datetime}
 
 Additional Message:
-{request.message if request.message else 'No additional message provided'}
+{consultation.message if consultation.message else 'No additional message provided'}
 
 Consultation ID: {consultation.id}
 Scheduled At: {consultation.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')}
@@ -153,24 +130,96 @@ Please ensure to contact the client at the scheduled time.
 ---
 Wealth Genius Admin Panel
 """
-        
-        # Send emails
-        user_email_sent = send_email(request.email, user_subject, user_body)
-        admin_email_sent = send_email(ADMIN_EMAIL, admin_subject, admin_body)
-        
-        if not user_email_sent:
-            print("Warning: Failed to send confirmation email to user")
-        if not admin_email_sent:
-            print("Warning: Failed to send notification email to admin")
-        
-        return {
-            "message": "Consultation scheduled successfully!",
-            "consultation_id": consultation.id,
-            "scheduled_datetime": consultation_datetime,
-            "email_sent": user_email_sent
-        }
-        
+    return subject, body
+
+@job("consultation.send_email")
+def send_consultation_email(db, to_email: str, subject: str, body: str):
+    """Queued send_email; raising lets the job be retried"""
+    if not send_email(to_email, subject, body):
+        raise RuntimeError(f"Could not send consultation email to {to_email}")
+
+def queue_consultation_emails(db, consultation: ConsultationSchedule, consultation_datetime: str):
+    """Enqueue the client confirmation and buffer the admin notification for the next digest"""
+    subject, body = build_consultation_confirmation_email(consultation, consultation_datetime)
+    enqueue(db, "consultation.send_email", {"to_email": consultation.email, "subject": subject, "body": body},
+            lane=EMAIL_LANE, priority=CONFIRMATION_PRIORITY)
+    # Consultations starting soon cannot wait for the digest window
+    starts_in = slot_start_utc(consultation.scheduled_date, consultation.scheduled_time) - datetime.utcnow()
+    urgent = starts_in < timedelta(minutes=settings.admin_digest_urgent_minutes)
+    notify_admin(db, "consultation", *build_consultation_admin_email(consultation, consultation_datetime),
+                 urgent=urgent)
+    db.commit()
+
+@router.get("/availability", response_model=List[DayAvailability])
+def get_consultation_availability(
+    start: date,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Open consultation slots per day for a date range (at most 31 days)"""
+    end = end or start
+    if end < start or (end - start) > timedelta(days=30):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Date range must be between 1 and 31 days"
+        )
+    availability = get_availability(db, start, end)
+    return [
+        DayAvailability(day=day, slots=[slot.strftime("%H:%M") for slot in slots])
+        for day, slots in availability.items()
+    ]
+
+@router.post("/schedule-consultation")
+async def schedule_consultation(
+    request: ConsultationRequest,
+    db: Session = Depends(get_db)
+):
+    try:
+        scheduled_date, scheduled_time = parse_slot(request.date, request.time)
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    consultation = ConsultationSchedule(
+        name=request.name,
+        email=request.email,
+        phone=request.phone,
+        preferred_date=request.date,
+        preferred_time=request.time,
+        scheduled_date=scheduled_date,
+        scheduled_time=scheduled_time,
+        remind_at=reminder_time(scheduled_date, scheduled_time),
+        message=request.message,
+        status="scheduled",
+        created_at=datetime.utcnow()
+    )
+    try:
+        # The session is synchronous: run the write on the threadpool so the
+        # event loop keeps serving other requests meanwhile. The slot's
+        # unique index prevents double booking.
+        await run_in_threadpool(book_consultation, db, consultation)
+    except SlotTakenError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         print(f"Error scheduling consultation: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to schedule consultation")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to schedule consultation")
+
+    consultation_id = consultation.id
+    consultation_datetime = format_consultation_slot(scheduled_date, scheduled_time)
+
+    # Emails are queued for the job worker, never sent inline
+    email_queued = True
+    try:
+        await run_in_threadpool(queue_consultation_emails, db, consultation, consultation_datetime)
+    except Exception as e:
+        await run_in_threadpool(db.rollback)
+        print(f"Error queueing consultation emails: {str(e)}")
+        email_queued = False
+
+    return {
+        "message": "Consultation scheduled successfully!",
+        "consultation_id": consultation_id,
+        "scheduled_datetime": consultation_datetime,
+        "email_sent": email_queued,  # kept for existing clients; the email is queued, not sent yet
+        "email_queued": email_queued
+    }
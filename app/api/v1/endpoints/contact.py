@@ -7,8 +7,11 @@ from typing import Optional
 from app.models.user import User
 from app.models.content import ContactInquiry
 from app.schemas.content import ContactInquiry as ContactInquirySchema, ContactInquiryCreate, ContactInquiryUpdate
+from app.utils.email import build_contact_notification_email
+from app.utils.notifications import notify_admin
+from app.core.profiler import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("/", response_model=ContactInquirySchema)
@@ -23,11 +26,13 @@ def create_contact_inquiry(
         user_id=current_user.id if current_user else None
     )
     db.add(db_inquiry)
-    db.commit()
+    db.flush()
     db.refresh(db_inquiry)
     
-    # TODO: Send email notification to admin
-    # send_contact_notification_email(db_inquiry)
+    # Admin is told in the next notification digest
+    notify_admin(db, "contact_inquiry", *build_contact_notification_email(db_inquiry))
+    db.commit()
+    db.refresh(db_inquiry)
     
     return db_inquiry
 
@@ -1,18 +1,20 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
 from app.database.database import get_db
 from app.api.deps import get_current_user, get_current_instructor, get_current_admin
 from app.models.user import User
-from app.models.course import Course, CourseFeature, Lesson, CourseLevel, CourseCategory
+from app.models.course import Course, CourseFeature, CourseStats, Lesson, CourseLevel, CourseCategory
 from app.schemas.course import (
     Course as CourseSchema, CourseCreate, CourseUpdate, CourseWithStats,
     CourseFeature as CourseFeatureSchema, CourseFeatureCreate,
     Lesson as LessonSchema, LessonCreate
 )
+from app.utils.course_access import get_course_for_write, require_course_access
+from app.utils.course_stats import rebuild_course_stats
+from app.core.profiler import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.get("/", response_model=List[CourseWithStats])
@@ -26,7 +28,15 @@ def get_courses(
     db: Session = Depends(get_db)
 ):
     """Get all courses with optional filtering"""
-    query = db.query(Course)
+    query = (
+        db.query(Course, CourseStats)
+        .outerjoin(CourseStats, CourseStats.course_id == Course.id)
+        .options(
+            joinedload(Course.instructor),
+            selectinload(Course.lessons),
+            selectinload(Course.course_features),
+        )
+    )
     
     if level:
         query = query.filter(Course.level == level)
@@ -37,29 +47,32 @@ def get_courses(
     if published is not None:
         query = query.filter(Course.is_published == published)
     
-    courses = query.offset(skip).limit(limit).all()
+    rows = query.order_by(Course.id).offset(skip).limit(limit).all()
     
-    # Add stats to each course
+    # Stats come precomputed from course_stats (see app.utils.course_stats)
     result = []
-    for course in courses:
+    for course, stats in rows:
         course_dict = CourseWithStats.from_orm(course)
-        
-        # Get enrollment count
-        enrollment_count = db.query(func.count(course.enrollments)).scalar()
-        course_dict.enrollment_count = enrollment_count
-        
-        # Get total lessons
-        total_lessons = db.query(func.count(course.lessons)).scalar()
-        course_dict.total_lessons = total_lessons
-        
-        # Get average rating (from testimonials)
-        # This would need to be implemented based on your rating system
-        
+        if stats:
+            course_dict.enrollment_count = stats.enrollment_count
+            course_dict.total_lessons = stats.lesson_count
+            course_dict.average_rating = stats.average_rating
         result.append(course_dict)
     
     return result
 
 
+@router.post("/stats/rebuild")
+def rebuild_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Rebuild the course_stats table from scratch (admin only)"""
+    rebuilt = rebuild_course_stats(db)
+    db.commit()
+    return {"message": "Course stats rebuilt successfully", "courses": rebuilt}
+
+
 @router.get("/{course_id}", response_model=CourseSchema)
 def get_course(course_id: int, db: Session = Depends(get_db)):
     """Get a specific course by ID"""
@@ -102,19 +115,7 @@ def update_course(
     current_user: User = Depends(get_current_instructor)
 ):
     """Update a course (instructors only)"""
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Check if user is the instructor or admin
-    if course.instructor_id != current_user.id and current_user.role.value != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
+    course = get_course_for_write(db, current_user, course_id)
     
     update_data = course_data.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -132,19 +133,7 @@ def delete_course(
     current_user: User = Depends(get_current_instructor)
 ):
     """Delete a course (instructors only)"""
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Check if user is the instructor or admin
-    if course.instructor_id != current_user.id and current_user.role.value != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
+    course = get_course_for_write(db, current_user, course_id)
     
     db.delete(course)
     db.commit()
@@ -160,18 +149,7 @@ def add_course_feature(
     current_user: User = Depends(get_current_instructor)
 ):
     """Add a feature to a course"""
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    if course.instructor_id != current_user.id and current_user.role.value != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
+    require_course_access(db, current_user, course_id, lock=True)
     
     db_feature = CourseFeature(**feature_data.dict(), course_id=course_id)
     db.add(db_feature)
@@ -189,18 +167,7 @@ def add_lesson(
     current_user: User = Depends(get_current_instructor)
 ):
     """Add a lesson to a course"""
-    course = db.query(Course).filter(Course.id == course_id).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    if course.instructor_id != current_user.id and current_user.role.value != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions"
-        )
+    require_course_access(db, current_user, course_id, lock=True)
     
     db_lesson = Lesson(**lesson_data.dict(), course_id=course_id)
     db.add(db_lesson)
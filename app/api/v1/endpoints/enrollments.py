@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from typing import Optional
@@ -6,15 +6,19 @@ import hashlib
 import secrets
 
 from app.api.deps import get_db
-from app.schemas.enrollment import EnrollmentFormCreate, EnrollmentFormResponse, EnrollmentCreate, EnrollmentResponse
+from app.schemas.enrollment import (
+    EnrollmentFormCreate, EnrollmentFormResponse, EnrollmentCreate, EnrollmentResponse,
+    EnrollmentCourseCard, EnrollmentWithCourse
+)
 from app.models.user import User, UserRole
-from app.models.course import Course
+from app.models.course import Course, CourseStats
 from app.models.enrollment import Enrollment
 from app.core.security import get_password_hash
-from app.utils.email import send_enrollment_confirmation_email
+from app.utils.email import queue_enrollment_confirmation_email
+from app.core.profiler import ProfiledRoute
 
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.post("/form", response_model=EnrollmentFormResponse)
@@ -39,9 +43,7 @@ def submit_enrollment_form(
             while db.query(User).filter(User.username == username).first():
                 username = f"{form_data.email.split('@')[0]}_{secrets.token_hex(4)}"
             
-            # Create temporary password (user will need to reset)
-            temp_password = secrets.token_urlsafe(12)
-            
+            # No password until the user resets it: the empty hash matches none
             # Create new user
             new_user = User(
                 email=form_data.email,
@@ -49,7 +51,7 @@ def submit_enrollment_form(
                 full_name=form_data.name,
                 phone=form_data.phone,
                 city=form_data.city,
-                hashed_password=get_password_hash(temp_password),
+                hashed_password="",
                 role=UserRole.STUDENT,
                 is_active=True,
                 is_verified=False
@@ -148,22 +150,18 @@ def submit_enrollment_form(
         )
         
         db.add(enrollment)
-        db.commit()
+        db.flush()
         
-        # Send confirmation email to customer
-        try:
-            email_sent = send_enrollment_confirmation_email(
-                student_name=form_data.name,
-                student_email=form_data.email,
-                course_title=form_data.course_title,
-                course_price=form_data.course_price,
-                enrollment_id=enrollment.id
-            )
-            if not email_sent:
-                print(f"Warning: Failed to send enrollment confirmation email to {form_data.email}")
-        except Exception as e:
-            print(f"Error sending enrollment confirmation email: {e}")
-            # Don't fail the enrollment if email fails
+        # Confirmation email to customer, sent (and retried) by the job worker
+        queue_enrollment_confirmation_email(
+            db,
+            student_name=form_data.name,
+            student_email=form_data.email,
+            course_title=form_data.course_title,
+            course_price=form_data.course_price,
+            enrollment_id=enrollment.id
+        )
+        db.commit()
         
         return EnrollmentFormResponse(
             message=f"Enrollment request submitted successfully for {course.title}! We will contact you soon.",
@@ -200,6 +198,34 @@ def get_user_enrollments(
     return enrollments
 
 
+@router.get("/user/{user_id}/courses", response_model=list[EnrollmentWithCourse])
+def get_user_enrollment_courses(
+    user_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Get a page of a user's enrollments, newest first, with course card data"""
+    rows = (
+        db.query(Enrollment, Course, CourseStats.lesson_count)
+        .join(Course, Course.id == Enrollment.course_id)
+        .outerjoin(CourseStats, CourseStats.course_id == Course.id)
+        .filter(Enrollment.user_id == user_id)
+        .order_by(Enrollment.enrolled_at.desc(), Enrollment.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    
+    result = []
+    for enrollment, course, lesson_count in rows:
+        card = EnrollmentCourseCard.from_orm(course)
+        card.total_lessons = lesson_count or 0
+        item = EnrollmentResponse.from_orm(enrollment).dict()
+        result.append(EnrollmentWithCourse(**item, course=card))
+    return result
+
+
 @router.get("/{enrollment_id}", response_model=EnrollmentResponse)
 def get_enrollment(
     enrollment_id: int,
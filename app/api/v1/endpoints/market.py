@@ -0,0 +1,131 @@
+import asyncio
+import json
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+from app.core.config import settings
+from app.schemas.market import Quote
+from app.utils import market_data
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# SSE comment sent when no ticks arrived, so proxies keep the stream open
+KEEPALIVE_SECONDS = 15
+
+WS_USAGE = 'Send {"action": "subscribe"|"unsubscribe", "symbols": [...]}'
+
+
+def market_service_url(path: str, query: str = "") -> Optional[str]:
+    """Where the feed runs, if it does not run in this process"""
+    if settings.market_feed or not settings.market_service_url:
+        return None
+    url = settings.market_service_url.rstrip("/") + path
+    return f"{url}?{query}" if query else url
+
+
+def parse_symbols(symbols: str) -> List[str]:
+    parsed = sorted({symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()})
+    if not parsed:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No symbols given")
+    if len(parsed) > settings.market_max_symbols:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.market_max_symbols} symbols per request"
+        )
+    return parsed
+
+
+def ticks_json(ticks) -> str:
+    return json.dumps([tick._asdict() for tick in ticks])
+
+
+@router.get("/quotes", response_model=List[Quote])
+async def get_quotes(request: Request,
+                     symbols: str = Query(..., description="Comma-separated, e.g. NSE:2885,NSE:1594")):
+    """Last cached tick per symbol (symbols nobody is streaming are omitted)"""
+    redirect = market_service_url(request.url.path, request.url.query)
+    if redirect:
+        return RedirectResponse(redirect, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return [tick._asdict() for tick in market_data.market_hub.cache.snapshot(parse_symbols(symbols))]
+
+
+@router.get("/stream")
+async def stream_quotes(request: Request,
+                        symbols: str = Query(..., description="Comma-separated, e.g. NSE:2885,NSE:1594")):
+    """Server-sent events: one JSON array of ticks per event, latest tick per symbol"""
+    redirect = market_service_url(request.url.path, request.url.query)
+    if redirect:
+        return RedirectResponse(redirect, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    hub = market_data.market_hub
+    subscription = market_data.Subscription()
+    try:
+        hub.subscribe(subscription, parse_symbols(symbols))
+    except market_data.MarketDataUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    async def events():
+        try:
+            while True:
+                try:
+                    ticks = await asyncio.wait_for(subscription.next_batch(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {ticks_json(ticks)}\n\n"
+        finally:
+            hub.release(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/ws")
+async def quotes_websocket(websocket: WebSocket):
+    """Send {"action": "subscribe"|"unsubscribe", "symbols": [...]}; receive JSON arrays of ticks"""
+    await websocket.accept()
+    elsewhere = market_service_url(websocket.url.path)
+    if elsewhere:
+        # Browsers do not follow redirects for websockets: tell the client where to connect
+        ws_url = "ws" + elsewhere[len("http"):] if elsewhere.startswith("http") else elsewhere
+        await websocket.send_json({"error": "Market data is served elsewhere", "url": ws_url})
+        await websocket.close()
+        return
+    hub = market_data.market_hub
+    subscription = market_data.Subscription()
+
+    async def receive():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                message = None
+            symbols = message.get("symbols") if isinstance(message, dict) else None
+            if not isinstance(symbols, list):
+                await websocket.send_json({"error": WS_USAGE})
+                continue
+            symbols = {str(symbol).upper() for symbol in symbols}
+            if message.get("action") == "unsubscribe":
+                hub.unsubscribe(subscription, symbols)
+            elif len(subscription.symbols | symbols) > settings.market_max_symbols:
+                await websocket.send_json({"error": f"At most {settings.market_max_symbols} symbols"})
+            else:
+                hub.subscribe(subscription, symbols)
+
+    async def send():
+        while True:
+            await websocket.send_text(ticks_json(await subscription.next_batch()))
+
+    tasks = [asyncio.ensure_future(receive()), asyncio.ensure_future(send())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    except market_data.MarketDataUnavailableError as e:
+        await websocket.close(code=1011, reason=str(e))
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.release(subscription)
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+from app.utils import file_upload
+from app.utils.storage import LocalStorage, guess_content_type
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+# Stored keys are random or content-addressed, so a URL never changes content
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def serve_media(key: str):
+    """Serve a file from local storage; Range requests get 206 partial content"""
+    storage = file_upload.storage
+    if not isinstance(storage, LocalStorage) or storage.stat(key) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    # FileResponse streams with sendfile (pathsend) where the server supports it
+    return FileResponse(
+        storage.path_for(key), media_type=guess_content_type(key), headers={"Cache-Control": CACHE_CONTROL}
+    )
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.api.deps import get_current_admin, get_db
+from app.core.config import settings
+from app.models.user import User
+from app.utils import payments
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.post("/webhook")
+async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+    """Verify and store a Stripe event; enrollments are updated by a job"""
+    if not settings.stripe_webhook_secret:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Stripe webhooks are not configured")
+    payload = await request.body()
+    try:
+        payments.verify_signature(
+            payload, request.headers.get("stripe-signature"),
+            settings.stripe_webhook_secret, settings.stripe_webhook_tolerance_seconds
+        )
+        event = json.loads(payload)
+        event_id, event_type = event["id"], event["type"]
+    except payments.WebhookSignatureError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid event payload")
+
+    created = await run_in_threadpool(payments.record_event, db, event, payload)
+    return {"received": True, "id": event_id, "type": event_type, "duplicate": not created}
+
+
+@router.post("/events/replay")
+def replay_payment_events(
+    since: Optional[datetime] = None,
+    event_type: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Re-apply stored Stripe events from the event log (admin only)"""
+    count = payments.replay_events(db, since, event_type)
+    return {"requeued": count}
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from app.api.deps import get_current_admin
+from app.core import profiler
+from app.models.user import User
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("", response_class=PlainTextResponse)
+def profile_worker(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=100),
+    current_user: User = Depends(get_current_admin)
+):
+    """Sample this worker for N seconds; collapsed stacks for flamegraphs (admin only)"""
+    try:
+        return profiler.profile_for(seconds, interval_ms / 1000)
+    except profiler.ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.post("/token")
+def create_profile_token(
+    valid_seconds: int = Query(300, ge=1, le=3600),
+    current_user: User = Depends(get_current_admin)
+):
+    """Signed X-Profile header value for profiling individual requests (admin only)"""
+    return {
+        "header": "X-Profile",
+        "token": profiler.create_profile_token(valid_seconds),
+        "expires_in": valid_seconds
+    }
+
+
+@router.get("/requests/{profile_id}", response_class=PlainTextResponse)
+def get_request_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin)
+):
+    """Collapsed stacks of a profiled request, by its X-Profile-Id (admin only)"""
+    output = profiler.get_request_profile(profile_id)
+    if output is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return output
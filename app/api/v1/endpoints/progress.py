@@ -0,0 +1,89 @@
+from typing import List
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.orm import Session
+from app.database.database import get_db
+from app.api.deps import get_current_user, get_current_instructor
+from app.models.user import User
+from app.models.course import Lesson
+from app.models.enrollment import Enrollment
+from app.schemas.progress import (
+    ProgressHeartbeatBatch, ProgressIngestResponse, CourseProgressSummary, CourseProgressReport
+)
+from app.utils.course_access import require_course_access
+from app.utils.progress import merge_progress, progress_buffer, progress_entry, upsert_progress
+from app.utils.progress_report import get_user_progress_summaries, get_course_progress_report
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.post("/heartbeats", response_model=ProgressIngestResponse, status_code=status.HTTP_202_ACCEPTED)
+def ingest_heartbeats(
+    batch: ProgressHeartbeatBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Buffer a batch of player heartbeats; completions are written at once, the rest on the next flush"""
+    if not batch.heartbeats:
+        return ProgressIngestResponse(accepted=0, rejected=0)
+
+    # One read validates every (enrollment, lesson) pair in the batch and
+    # fetches the lesson lengths that bound the reported watch time
+    enrollment_ids = {hb.enrollment_id for hb in batch.heartbeats}
+    lesson_ids = {hb.lesson_id for hb in batch.heartbeats}
+    allowed = {
+        (enrollment_id, lesson_id): duration_minutes
+        for enrollment_id, lesson_id, duration_minutes in (
+            db.query(Enrollment.id, Lesson.id, Lesson.duration_minutes)
+            .join(Lesson, Lesson.course_id == Enrollment.course_id)
+            .filter(
+                Enrollment.user_id == current_user.id,
+                Enrollment.id.in_(enrollment_ids),
+                Lesson.id.in_(lesson_ids)
+            )
+            .all()
+        )
+    }
+
+    accepted = 0
+    completions = {}
+    for hb in batch.heartbeats:
+        key = (hb.enrollment_id, hb.lesson_id)
+        if key not in allowed:
+            continue
+        watch_time_seconds = hb.watch_time_seconds
+        if allowed[key]:
+            watch_time_seconds = min(watch_time_seconds, allowed[key] * 60)
+        if hb.completed:
+            merge_progress(completions, key, progress_entry(watch_time_seconds, True, hb.watched_at))
+        else:
+            progress_buffer.add(hb.enrollment_id, hb.lesson_id, watch_time_seconds, watched_at=hb.watched_at)
+        accepted += 1
+
+    # Completions are sent once, so they are written now rather than buffered
+    if completions:
+        upsert_progress(db, completions)
+        db.commit()
+
+    return ProgressIngestResponse(accepted=accepted, rejected=len(batch.heartbeats) - accepted)
+
+
+@router.get("/summary", response_model=List[CourseProgressSummary])
+def get_my_progress(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Completion and watch time for each of the current user's enrollments"""
+    return get_user_progress_summaries(db, current_user.id)
+
+
+@router.get("/courses/{course_id}", response_model=CourseProgressReport)
+def get_course_progress(
+    course_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_instructor)
+):
+    """Progress of every student in a course (course instructor or admin)"""
+    require_course_access(db, current_user, course_id)
+    
+    return get_course_progress_report(db, course_id)
@@ -6,8 +6,9 @@ from app.api.deps import get_current_user, get_current_admin
 from app.models.user import User
 from app.models.content import Testimonial
 from app.schemas.content import Testimonial as TestimonialSchema, TestimonialCreate, TestimonialUpdate
+from app.core.profiler import ProfiledRoute
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.get("/", response_model=List[TestimonialSchema])
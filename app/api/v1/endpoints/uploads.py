@@ -0,0 +1,169 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+from app.database.database import get_db
+from app.api.deps import get_current_active_user
+from app.models.course import Course, Lesson
+from app.models.user import User
+from app.schemas.upload import UploadRequest, UploadTicket, UploadComplete, UploadAbort, UploadResult
+from app.utils.course_access import can_edit_course
+from app.utils.direct_upload import (
+    PROCESS_IMAGE_JOB, UPLOAD_TARGETS, UploadRejectedError, abort_upload, check_upload, complete_upload,
+    plan_upload
+)
+from app.utils.file_upload import upload_course_thumbnail, upload_course_video, upload_user_avatar
+from app.utils.images import IMAGE_SPECS, ImageRejectedError
+from app.utils.jobs import enqueue
+from app.core.profiler import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+def get_upload_entity(db: Session, target: str, entity_id: int, current_user: User):
+    """Load the row an upload attaches to and check the user may change it"""
+    model = UPLOAD_TARGETS[target].model
+    entity = db.query(model).filter(model.id == entity_id).first()
+    if not entity:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{model.__name__} not found"
+        )
+
+    if isinstance(entity, User):
+        allowed = entity.id == current_user.id
+    else:
+        course_id = entity.id if isinstance(entity, Course) else entity.course_id
+        allowed = can_edit_course(db, current_user, course_id)
+    if not allowed and current_user.role.value != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return entity
+
+
+@router.post("/presign", response_model=UploadTicket)
+def presign_upload(
+    upload: UploadRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Issue presigned URLs so the client uploads straight to S3"""
+    get_upload_entity(db, upload.target, upload.entity_id, current_user)
+    try:
+        return plan_upload(upload.target, upload.entity_id, upload.filename, upload.content_type, upload.size)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/complete", response_model=UploadResult)
+def complete_direct_upload(
+    upload: UploadComplete,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Verify an uploaded object and attach its URL to the course, lesson or user.
+
+    Images are attached as uploaded; a job then generates the variants and
+    swaps the URL for the pipeline's, so srcset is not available yet.
+    """
+    entity = get_upload_entity(db, upload.target, upload.entity_id, current_user)
+    try:
+        url = complete_upload(
+            upload.target, upload.entity_id, upload.key, upload.upload_id,
+            [part.model_dump() for part in upload.parts]
+        )
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    setattr(entity, UPLOAD_TARGETS[upload.target].attribute, url)
+    if upload.target in IMAGE_SPECS:
+        enqueue(db, PROCESS_IMAGE_JOB, {"target": upload.target, "entity_id": upload.entity_id, "key": upload.key})
+    db.commit()
+    return {"url": url}
+
+
+@router.post("/abort")
+def abort_direct_upload(
+    upload: UploadAbort,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Abort an unfinished multipart upload so S3 drops its parts"""
+    get_upload_entity(db, upload.target, upload.entity_id, current_user)
+    try:
+        abort_upload(upload.target, upload.entity_id, upload.key, upload.upload_id)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"message": "Upload aborted"}
+
+
+def store_image(db: Session, target: str, entity, file: UploadFile, upload_image):
+    """Run an uploaded image through the variant pipeline and attach it to entity"""
+    spec = UPLOAD_TARGETS[target]
+    if file.size is not None and file.size > spec.max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File is larger than the {spec.max_size // (1024 * 1024)} MB limit"
+        )
+    try:
+        image = upload_image(file)
+    except ImageRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if image is None:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not store the image"
+        )
+    setattr(entity, spec.attribute, image["url"])
+    db.commit()
+    return {"url": image["url"], "srcset": image["srcset"]}
+
+
+@router.post("/course-thumbnail/{course_id}", response_model=UploadResult)
+def upload_thumbnail(
+    course_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Upload a course thumbnail; resized WebP/JPEG variants are generated"""
+    course = get_upload_entity(db, "course_thumbnail", course_id, current_user)
+    return store_image(db, "course_thumbnail", course, file, upload_course_thumbnail)
+
+
+@router.post("/course-video/{course_id}", response_model=UploadResult)
+def upload_intro_video(
+    course_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Upload a course intro video through the API (streamed to S3 in parallel parts).
+
+    For scripts and admin tooling; browsers should use /presign and send the bytes to S3 directly.
+    """
+    course = get_upload_entity(db, "course_video", course_id, current_user)
+    try:
+        check_upload(UPLOAD_TARGETS["course_video"], file.content_type, file.size or 0)
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    url = upload_course_video(file)
+    if url is None:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not store the video"
+        )
+    course.video_intro_url = url
+    db.commit()
+    return {"url": url}
+
+
+@router.post("/avatar", response_model=UploadResult)
+def upload_avatar(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Upload the current user's avatar; resized WebP/JPEG variants are generated"""
+    user = get_upload_entity(db, "user_avatar", current_user.id, current_user)
+    return store_image(db, "user_avatar", user, file, upload_user_avatar)
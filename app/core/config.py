@@ -25,6 +25,13 @@ class Settings(BaseSettings):
     smtp_port: int = int(os.getenv("SMTP_PORT", 587))
     smtp_user: str = os.getenv("SMTP_USER", "your-gmail@gmail.com")
     smtp_password: str = os.getenv("SMTP_PASSWORD", "your-gmail-app-password")
+    # Receives consultation notifications and reminder digests
+    admin_email: str = os.getenv("ADMIN_EMAIL", "smitpatidar6704@gmail.com")
+    # Admin notifications are batched into one digest per window; consultations
+    # starting sooner than admin_digest_urgent_minutes are sent right away
+    admin_digest_window_seconds: int = int(os.getenv("ADMIN_DIGEST_WINDOW_SECONDS", 300))
+    admin_digest_urgent_minutes: int = int(os.getenv("ADMIN_DIGEST_URGENT_MINUTES", 120))
+    admin_digest_max_items: int = int(os.getenv("ADMIN_DIGEST_MAX_ITEMS", 200))
     
     # Redis Configuration
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379")
@@ -34,20 +41,102 @@ class Settings(BaseSettings):
     aws_secret_access_key: Optional[str] = os.getenv("AWS_SECRET_ACCESS_KEY")
     aws_region: str = os.getenv("AWS_REGION", "us-east-1")
     aws_s3_bucket: str = os.getenv("AWS_S3_BUCKET", "marketpro-uploads")
+    aws_s3_endpoint_url: Optional[str] = os.getenv("AWS_S3_ENDPOINT_URL")  # e.g. a local MinIO
+    
+    # Media storage: "s3", or "local" to keep files under media_root and
+    # serve them from the app at media_url
+    storage_backend: str = os.getenv("STORAGE_BACKEND", "s3")
+    media_root: str = os.getenv("MEDIA_ROOT", "./media")
+    media_url: str = os.getenv("MEDIA_URL", "/media")
+    
+    # Direct-to-S3 uploads
+    upload_url_expires_seconds: int = int(os.getenv("UPLOAD_URL_EXPIRES_SECONDS", 3600))
+    upload_multipart_threshold_bytes: int = 100 * 1024 * 1024
+    upload_part_size_bytes: int = 64 * 1024 * 1024
+    # Server-side multipart uploads (admin ingest)
+    upload_server_part_size_bytes: int = 16 * 1024 * 1024
+    upload_server_concurrency: int = int(os.getenv("UPLOAD_SERVER_CONCURRENCY", 8))
+    # Processes resizing thumbnails and avatars
+    image_workers: int = int(os.getenv("IMAGE_WORKERS", 2))
     
     # Stripe Configuration
     stripe_secret_key: Optional[str] = os.getenv("STRIPE_SECRET_KEY")
     stripe_publishable_key: Optional[str] = os.getenv("STRIPE_PUBLISHABLE_KEY")
     stripe_webhook_secret: Optional[str] = os.getenv("STRIPE_WEBHOOK_SECRET")
+    # Reject signed payloads older than this (replay protection)
+    stripe_webhook_tolerance_seconds: int = int(os.getenv("STRIPE_WEBHOOK_TOLERANCE_SECONDS", 300))
+    # Stored webhook events are applied to enrollments in batches
+    payment_batch_size: int = int(os.getenv("PAYMENT_BATCH_SIZE", 200))
     
     # Angel One API Configuration
     angel_api_key: Optional[str] = os.getenv("ANGEL_API_KEY")
     angel_client_id: Optional[str] = os.getenv("ANGEL_CLIENT_ID")
-    angel_refresh_token: Optional[str] = os.getenv("ANGEL_REFRESH_TOKEN")
-    angel_feed_token: Optional[str] = os.getenv("ANGEL_FEED_TOKEN")
     angel_totp_secret: Optional[str] = os.getenv("ANGEL_TOTP_SECRET")
     angel_mpin: Optional[str] = os.getenv("ANGEL_MPIN")
     
+    # Live quotes: "angel" (SmartAPI feed), "replay" (CSV of timestamp_ms,symbol,ltp) or "" (off)
+    market_feed: str = os.getenv("MARKET_FEED", "")
+    market_replay_path: str = os.getenv("MARKET_REPLAY_PATH", "market_replay.csv")
+    market_replay_speed: float = float(os.getenv("MARKET_REPLAY_SPEED", 1))
+    market_max_symbols: int = int(os.getenv("MARKET_MAX_SYMBOLS", 50))
+    # Base URL of the single-worker deployment that runs the feed; processes without
+    # MARKET_FEED redirect the market endpoints there
+    market_service_url: str = os.getenv("MARKET_SERVICE_URL", "")
+    
+    # Historical candles (memory-mapped .npy columns) and cached indicators
+    candle_store_path: str = os.getenv("CANDLE_STORE_PATH", "./data/candles")
+    candle_cache_entries: int = int(os.getenv("CANDLE_CACHE_ENTRIES", 128))
+    candle_cache_ttl_seconds: int = int(os.getenv("CANDLE_CACHE_TTL_SECONDS", 3600))
+    
+    # Strategy backtests (process pool shared by all users of a web worker)
+    backtest_workers: int = int(os.getenv("BACKTEST_WORKERS", 2))
+    backtest_max_per_user: int = int(os.getenv("BACKTEST_MAX_PER_USER", 2))
+    backtest_timeout_seconds: float = float(os.getenv("BACKTEST_TIMEOUT_SECONDS", 30))
+    backtest_cache_entries: int = int(os.getenv("BACKTEST_CACHE_ENTRIES", 256))
+    backtest_curve_points: int = int(os.getenv("BACKTEST_CURVE_POINTS", 500))
+    
+    # Background jobs (`python -m app.worker`); JOB_RUN_IN_WEB runs them in the web process instead
+    job_run_in_web: bool = os.getenv("JOB_RUN_IN_WEB", "False").lower() == "true"
+    job_worker_concurrency: int = int(os.getenv("JOB_WORKER_CONCURRENCY", 4))
+    job_poll_interval_seconds: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1))
+    job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+    job_retry_base_seconds: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", 30))
+    job_retry_max_seconds: float = float(os.getenv("JOB_RETRY_MAX_SECONDS", 3600))
+    job_lock_timeout_seconds: float = float(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", 600))
+    job_metrics_port: int = int(os.getenv("JOB_METRICS_PORT", 0))
+    
+    # Lesson progress ingest
+    progress_flush_interval_seconds: float = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", 5))
+    
+    # Analytics rollups
+    analytics_refresh_interval_seconds: int = int(os.getenv("ANALYTICS_REFRESH_INTERVAL_SECONDS", 60))
+    
+    # Course ids each instructor owns, cached per worker to deny write access without a query.
+    # Grants always re-check the course row, so a stale entry can only delay access to a
+    # course another worker just assigned to the instructor (until the TTL)
+    course_owner_cache_seconds: int = int(os.getenv("COURSE_OWNER_CACHE_SECONDS", 300))
+    course_owner_cache_entries: int = int(os.getenv("COURSE_OWNER_CACHE_ENTRIES", 10000))
+    
+    # Consultation booking (times are local to consultation_timezone)
+    consultation_timezone: str = os.getenv("CONSULTATION_TIMEZONE", "Asia/Kolkata")
+    consultation_day_start: str = os.getenv("CONSULTATION_DAY_START", "10:00")
+    consultation_day_end: str = os.getenv("CONSULTATION_DAY_END", "19:00")
+    consultation_slot_minutes: int = int(os.getenv("CONSULTATION_SLOT_MINUTES", 30))
+    consultation_booking_days_ahead: int = 60
+    # Reminders go out this long before a consultation (client + admin digest)
+    consultation_reminder_minutes: int = int(os.getenv("CONSULTATION_REMINDER_MINUTES", 30))
+    # Reminders later than this are dropped; the consultation is about to start
+    consultation_reminder_max_late_minutes: int = int(os.getenv("CONSULTATION_REMINDER_MAX_LATE_MINUTES", 20))
+    consultation_reminder_horizon_seconds: int = int(os.getenv("CONSULTATION_REMINDER_HORIZON_SECONDS", 3600))
+    consultation_reminder_refresh_seconds: float = float(os.getenv("CONSULTATION_REMINDER_REFRESH_SECONDS", 60))
+    consultation_reminder_lease_seconds: int = int(os.getenv("CONSULTATION_REMINDER_LEASE_SECONDS", 120))
+    consultation_reminder_batch_size: int = int(os.getenv("CONSULTATION_REMINDER_BATCH_SIZE", 50))
+    
+    # Per-request SQL budget; requests over any limit are logged
+    sql_warn_query_count: int = int(os.getenv("SQL_WARN_QUERY_COUNT", 30))
+    sql_warn_total_ms: float = float(os.getenv("SQL_WARN_TOTAL_MS", 500))
+    sql_warn_repeated_statements: int = int(os.getenv("SQL_WARN_REPEATED_STATEMENTS", 10))
+    
     # Application Settings
     debug: bool = os.getenv("DEBUG", "False").lower() == "true"
     environment: str = os.getenv("ENVIRONMENT", "production")
@@ -0,0 +1,122 @@
+# Prometheus request metrics
+"""
+Per-route latency and response size histograms plus an in-flight gauge.
+
+Under gunicorn every worker is a separate process. When
+PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py does this) metrics are
+written to per-process files and /metrics aggregates all workers.
+
+Each request also runs inside track_queries() so its SQL count and time
+end up in Server-Timing and in the query budget warnings.
+"""
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Gauge, Histogram, generate_latest, multiprocess
+)
+from app.database.query_stats import request_finished, track_queries
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by templated route",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size by templated route",
+    ["method", "route", "status"],
+    buckets=SIZE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope) -> str:
+    """Templated path (e.g. /api/v1/courses/{course_id}) to keep label cardinality bounded"""
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    # Routes of included routers only know their own path; recover the
+    # prefix from the concrete request path.
+    path = scope.get("path", "")
+    try:
+        params = {name: str(value) for name, value in scope.get("path_params", {}).items()}
+        concrete = route.path_format.format(**params)
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return template
+    if path.endswith(concrete):
+        return path[:len(path) - len(concrete)] + template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, response size and in-flight requests"""
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        started = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    headers = list(message.get("headers", []))
+                    header = server_timing_header(elapsed_ms, queries)
+                    headers.append((b"server-timing", header.encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        with track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                in_flight.dec()
+                route = route_template(scope)
+                labels = (method, route, str(status_code))
+                REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+                RESPONSE_SIZE.labels(*labels).observe(response_size)
+                request_finished(method, route, queries)
+
+
+def server_timing_header(elapsed_ms: float, queries) -> str:
+    return f'app;dur={elapsed_ms:.1f}, db;dur={queries.total_ms:.1f};desc="{queries.count} queries"'
+
+
+def metrics_registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics():
+    """Body and content type for the /metrics endpoint"""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
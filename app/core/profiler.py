@@ -0,0 +1,239 @@
+# Sampling profiler for live workers
+"""
+A background thread snapshots every thread's stack with
+sys._current_frames() at a fixed interval and counts identical stacks.
+The result is in collapsed-stack format ("frame;frame;frame count" per
+line), which flamegraph.pl and speedscope read directly.
+
+Nothing runs unless a profile is requested: the middleware only looks for
+the X-Profile header, and the sampler thread exists only while profiling.
+Only one profile runs per worker at a time.
+
+A profiled request only samples the threads working for it: the event loop
+thread that received it and the threadpool threads running its endpoint.
+The middleware puts the profile id in a contextvar, which Starlette copies
+into the endpoint's threadpool call; routes built with ProfiledRoute read it
+there and register their thread for the duration of the call. (Sync
+dependencies run in calls of their own and are not sampled.) The result is
+stored in request_profiles, so any worker can serve it.
+"""
+import contextvars
+import functools
+import hashlib
+import hmac
+import inspect
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+from uuid import uuid4
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.profiling import RequestProfile
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+MAX_STORED_PROFILES = 20
+
+_profile_lock = threading.Lock()
+
+# Id of the profiled request; copied into the threadpool calls it makes
+_profiled_request: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("profiled_request", default=None)
+# Threadpool thread -> id of the profiled request it is running an endpoint for
+_request_threads: Dict[int, str] = {}
+
+
+class ProfilerBusyError(Exception):
+    """Another profile is already running on this worker"""
+
+
+class SamplingProfiler:
+    """Samples every thread, or only those serving request_id if given"""
+
+    def __init__(self, interval: float = 0.005, request_id: Optional[str] = None,
+                 request_thread: Optional[int] = None):
+        self.interval = interval
+        self.request_id = request_id
+        self.request_thread = request_thread
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running on this worker")
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        _profile_lock.release()
+        return self.collapsed()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id and self._serves_request(thread_id, frame):
+                    self.samples[_collapse(frame)] += 1
+            self.sample_count += 1
+
+    def _serves_request(self, thread_id: int, frame) -> bool:
+        if self.request_id is None or thread_id == self.request_thread:
+            return True
+        return _request_threads.get(thread_id) == self.request_id
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+def _announcing(endpoint: Callable) -> Callable:
+    """Wrap a sync endpoint so a profiled request's calls register their thread"""
+    if inspect.iscoroutinefunction(endpoint) or getattr(endpoint, "announces_profile", False):
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def call(*args, **kwargs):
+        profile_id = _profiled_request.get()
+        if profile_id is None:
+            return endpoint(*args, **kwargs)
+        thread_id = threading.get_ident()
+        _request_threads[thread_id] = profile_id
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            _request_threads.pop(thread_id, None)
+
+    call.announces_profile = True
+    return call
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute whose sync endpoint is sampled when its request is profiled"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _announcing(endpoint), **kwargs)
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def profile_for(seconds: float, interval: float = 0.005) -> str:
+    """Sample the whole worker for the given time and return collapsed stacks"""
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    try:
+        time.sleep(seconds)
+    finally:
+        output = profiler.stop()
+    return output
+
+
+def _store_request_profile(profile_id: str, output: str):
+    db = SessionLocal()
+    try:
+        db.add(RequestProfile(profile_id=profile_id, output=output))
+        db.flush()
+        # Keep only the newest profiles
+        cutoff = (
+            db.query(RequestProfile.id)
+            .order_by(RequestProfile.id.desc())
+            .offset(MAX_STORED_PROFILES)
+            .limit(1)
+            .scalar()
+        )
+        if cutoff is not None:
+            db.query(RequestProfile).filter(RequestProfile.id <= cutoff).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error storing request profile: {e}")
+    finally:
+        db.close()
+
+
+def get_request_profile(profile_id: str) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        return db.query(RequestProfile.output).filter(RequestProfile.profile_id == profile_id).scalar()
+    finally:
+        db.close()
+
+
+def _signature(expires: int) -> str:
+    message = f"profile:{expires}".encode()
+    return hmac.new(settings.secret_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def create_profile_token(valid_seconds: int = 300) -> str:
+    """Value for the X-Profile header, valid for valid_seconds"""
+    expires = int(time.time()) + valid_seconds
+    return f"{expires}.{_signature(expires)}"
+
+
+def verify_profile_token(token: str) -> bool:
+    expires, _, signature = token.partition(".")
+    try:
+        expires = int(expires)
+    except ValueError:
+        return False
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(signature, _signature(expires))
+
+
+class ProfilingMiddleware:
+    """Profile single requests that carry a valid signed X-Profile header"""
+
+    def __init__(self, app, interval: float = 0.001):
+        self.app = app
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _header(scope, PROFILE_HEADER.encode())
+        if token is None or not verify_profile_token(token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex
+        profiler = SamplingProfiler(self.interval, profile_id, threading.get_ident())
+        try:
+            profiler.start()
+        except ProfilerBusyError:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.encode(), profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _profiled_request.set(profile_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _profiled_request.reset(token)
+            await run_in_threadpool(_store_request_profile, profile_id, profiler.stop())
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
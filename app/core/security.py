@@ -44,6 +44,8 @@ def verify_token(token: str) -> Optional[dict]:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
+    if not hashed_password:
+        return False  # account without a password yet
     return pwd_context.verify(plain_password, hashed_password)
 
 
@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.database import query_stats  # noqa: F401  registers per-request SQL instrumentation
 
 # Create database engine
 engine = create_engine(settings.database_url)
@@ -0,0 +1,21 @@
+# Schema checks for alembic revisions
+"""
+Tables may have been created by create_all() from any version of the models,
+so every revision asks the live schema what is missing before changing it.
+"""
+from sqlalchemy import inspect
+
+
+def has_table(bind, table: str) -> bool:
+    return inspect(bind).has_table(table)
+
+
+def has_column(bind, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(bind).get_columns(table)}
+
+
+def has_index(bind, table: str, name: str) -> bool:
+    inspector = inspect(bind)
+    names = {i["name"] for i in inspector.get_indexes(table)}
+    names.update(c["name"] for c in inspector.get_unique_constraints(table))
+    return name in names
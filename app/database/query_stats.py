@@ -0,0 +1,134 @@
+# Per-request SQL instrumentation
+"""
+Counts statements, database time and repeated statement fingerprints for
+the request being served.
+
+Listeners are attached to the Engine class, so every engine (including the
+in-memory ones used by tests) is covered. Stats live in a context variable
+holding a mutable QueryStats; sync endpoints run in a threadpool with a
+copy of the request context, so their queries land in the same object.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\([^)]*\)s|:\w+)\s*,)+\s*(?:\?|%\([^)]*\)s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalise a statement so repeated executions compare equal.
+
+    Statements are already parameterised; only whitespace and expanded
+    IN (...) lists need collapsing.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _IN_LIST.sub("(?)", statement)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+    def most_repeated(self):
+        """(fingerprint, times) of the most repeated statement, or None"""
+        common = self.fingerprints.most_common(1)
+        return common[0] if common else None
+
+
+@dataclass
+class RequestQueries:
+    method: str
+    route: str
+    stats: QueryStats
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries():
+    """Collect QueryStats for every statement executed inside the block"""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info["query_start_time"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is None:
+        return
+    started = conn.info.pop("query_start_time", None)
+    if started is not None:
+        stats.total_seconds += time.perf_counter() - started
+    stats.count += 1
+    stats.fingerprints[fingerprint(statement)] += 1
+
+
+def query_budget_warnings(stats: QueryStats, max_queries: int, max_ms: float, max_repeats: int):
+    """Human-readable reasons a request went over its query budget"""
+    problems = []
+    if stats.count > max_queries:
+        problems.append(f"{stats.count} queries (limit {max_queries})")
+    if stats.total_ms > max_ms:
+        problems.append(f"{stats.total_ms:.1f}ms in the database (limit {max_ms:.0f}ms)")
+    repeated = stats.most_repeated()
+    if repeated and repeated[1] > max_repeats:
+        statement, times = repeated
+        problems.append(f"possible N+1: statement ran {times} times: {statement[:200]}")
+    return problems
+
+
+_observers: List[List[RequestQueries]] = []
+
+
+@contextmanager
+def observe_requests():
+    """Collect RequestQueries for every request finished inside the block"""
+    finished: List[RequestQueries] = []
+    _observers.append(finished)
+    try:
+        yield finished
+    finally:
+        _observers.remove(finished)
+
+
+def request_finished(method: str, route: str, stats: QueryStats):
+    """Warn about requests over the configured query budget"""
+    problems = query_budget_warnings(
+        stats,
+        settings.sql_warn_query_count,
+        settings.sql_warn_total_ms,
+        settings.sql_warn_repeated_statements,
+    )
+    if problems:
+        print(f"Warning: {method} {route}: " + "; ".join(problems))
+    for finished in _observers:
+        finished.append(RequestQueries(method, route, stats))
@@ -1,9 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.profiler import ProfilingMiddleware
 from app.api.v1.api import api_router
-from app.database.database import engine
-from app.models import user, course, enrollment, content, consultation
+from app.api.v1.endpoints import media
+from app.database.database import engine, SessionLocal
+from app.models import user, course, enrollment, content, consultation, analytics, payment, job, notification, profiling
+from app.utils.admin_events import admin_events
+from app.utils.analytics import rollup_refresher
+from app.utils.backtest import shutdown_backtest_pool
+from app.utils.consultation_reminders import reminder_scheduler
+from app.utils.images import shutdown_image_pool
+from app.utils.jobs import job_worker
+from app.utils.market_data import market_hub
+from app.utils.progress import ProgressFlusher, progress_buffer
 
 # Create database tables
 user.Base.metadata.create_all(bind=engine)
@@ -11,6 +22,11 @@ course.Base.metadata.create_all(bind=engine)
 enrollment.Base.metadata.create_all(bind=engine)
 content.Base.metadata.create_all(bind=engine)
 consultation.Base.metadata.create_all(bind=engine)
+analytics.Base.metadata.create_all(bind=engine)
+payment.Base.metadata.create_all(bind=engine)
+job.Base.metadata.create_all(bind=engine)
+notification.Base.metadata.create_all(bind=engine)
+profiling.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.project_name,
@@ -31,11 +47,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request profiling for requests carrying a signed X-Profile header
+app.add_middleware(ProfilingMiddleware)
+
+# Request metrics (outermost, so CORS preflights are measured too)
+app.add_middleware(MetricsMiddleware, server_timing=settings.debug)
+
 print(f"Configured CORS origins: {settings.cors_origins}")
 
 # Include API router
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
+# Files kept by STORAGE_BACKEND=local (404 for everything when using S3)
+app.include_router(media.router, prefix=settings.media_url)
+
+progress_flusher = ProgressFlusher(progress_buffer, SessionLocal, settings.progress_flush_interval_seconds)
+
+
+@app.on_event("startup")
+def start_background_writers():
+    progress_flusher.start()
+    if settings.job_run_in_web:
+        job_worker.start()
+        reminder_scheduler.start()
+        rollup_refresher.start()
+
+
+@app.on_event("shutdown")
+def stop_background_writers():
+    # Final flush so a clean restart loses no buffered progress
+    progress_flusher.stop()
+    job_worker.stop()
+    reminder_scheduler.stop()
+    rollup_refresher.stop()
+    admin_events.stop()
+    shutdown_image_pool()
+    shutdown_backtest_pool()
+
+
+@app.on_event("shutdown")
+async def stop_market_data():
+    await market_hub.stop()
+
 
 @app.get("/")
 def read_root():
@@ -49,3 +102,9 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, Enum, Float, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database.database import Base
+from app.models.enrollment import EnrollmentStatus
+
+
+class EnrollmentDailyRollup(Base):
+    """Enrollments and revenue pre-aggregated per UTC day, course, status and city"""
+    __tablename__ = "enrollment_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("day", "course_id", "status", "student_city", name="uq_enrollment_daily_rollup"),
+        Index("ix_enrollment_daily_rollups_course_day", "course_id", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
+    status = Column(Enum(EnrollmentStatus), nullable=False)
+    student_city = Column(String, nullable=False)
+    enrollment_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+
+class AnalyticsRefreshState(Base):
+    """High-water mark of the last incremental rollup refresh"""
+    __tablename__ = "analytics_refresh_state"
+
+    name = Column(String, primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Date, Time, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -13,6 +13,14 @@ class ConsultationSchedule(Base):
     phone = Column(String(20), nullable=False)
     preferred_date = Column(String(10), nullable=False)  # YYYY-MM-DD format
     preferred_time = Column(String(5), nullable=False)   # HH:MM format
+    scheduled_date = Column(Date, nullable=True)         # Parsed slot, used for availability
+    scheduled_time = Column(Time, nullable=True)
+    # UTC time the reminder is due (slot start minus the reminder lead time)
+    remind_at = Column(DateTime, nullable=True)
+    reminder_sent_at = Column(DateTime, nullable=True)
+    # A dispatcher holds a reminder until lease expiry while it sends it
+    reminder_lease_owner = Column(String(100), nullable=True)
+    reminder_lease_until = Column(DateTime, nullable=True)
     message = Column(Text, nullable=True)
     status = Column(String(20), default="scheduled")     # scheduled, completed, cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -20,4 +28,31 @@ class ConsultationSchedule(Base):
     is_active = Column(Boolean, default=True)
     
     def __repr__(self):
-        return f"<ConsultationSchedule(id={self.id}, name='{self.name}', date='{self.preferred_date}', time='{self.preferred_time}')>"
\ No newline at end of file
+        return f"<ConsultationSchedule(id={self.id}, name='{self.name}', date='{self.preferred_date}', time='{self.preferred_time}')>"
+
+
+Index(
+    "ix_consultation_slot_lookup",
+    ConsultationSchedule.scheduled_date,
+    ConsultationSchedule.scheduled_time,
+    ConsultationSchedule.status,
+)
+
+# At most one live booking per slot; concurrent bookings of the same slot
+# fail with an IntegrityError instead of double booking.
+Index(
+    "uq_consultation_booked_slot",
+    ConsultationSchedule.scheduled_date,
+    ConsultationSchedule.scheduled_time,
+    unique=True,
+    postgresql_where=ConsultationSchedule.status == "scheduled",
+    sqlite_where=ConsultationSchedule.status == "scheduled",
+)
+
+# Reminder dispatch scans only unsent reminders by due time
+Index(
+    "ix_consultation_pending_reminders",
+    ConsultationSchedule.remind_at,
+    postgresql_where=ConsultationSchedule.reminder_sent_at.is_(None),
+    sqlite_where=ConsultationSchedule.reminder_sent_at.is_(None),
+)
@@ -9,6 +9,7 @@ class Testimonial(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    course_id = Column(Integer, ForeignKey("courses.id"), nullable=True, index=True)  # Optional, rated course
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     rating = Column(Integer, nullable=False)  # 1-5 stars
@@ -46,6 +46,7 @@ class Course(Base):
     enrollments = relationship("Enrollment", back_populates="course")
     lessons = relationship("Lesson", back_populates="course")
     course_features = relationship("CourseFeature", back_populates="course")
+    stats = relationship("CourseStats", back_populates="course", uselist=False, cascade="all, delete-orphan")
 
 
 class CourseFeature(Base):
@@ -79,3 +80,24 @@ class Lesson(Base):
 
     # Relationships
     course = relationship("Course", back_populates="lessons")
+
+
+class CourseStats(Base):
+    """Denormalized catalogue counters, maintained by app.utils.course_stats"""
+    __tablename__ = "course_stats"
+
+    course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
+    enrollment_count = Column(Integer, nullable=False, default=0)
+    lesson_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Relationships
+    course = relationship("Course", back_populates="stats")
+
+    @property
+    def average_rating(self) -> float:
+        if not self.rating_count:
+            return 0.0
+        return round(self.rating_sum / self.rating_count, 2)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Float, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.database import Base
@@ -14,6 +14,10 @@ class EnrollmentStatus(str, enum.Enum):
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        Index("ix_enrollments_user_id_enrolled_at", "user_id", "enrolled_at"),
+        Index("ix_enrollments_course_id_status", "course_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -30,6 +34,7 @@ class Enrollment(Base):
     # Enrollment status and tracking
     status = Column(Enum(EnrollmentStatus), default=EnrollmentStatus.ACTIVE)
     enrolled_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
     payment_amount = Column(Float, nullable=False)
     payment_method = Column(String, nullable=True)
 
@@ -41,6 +46,9 @@ class Enrollment(Base):
 
 class LessonProgress(Base):
     __tablename__ = "lesson_progress"
+    __table_args__ = (
+        UniqueConstraint("enrollment_id", "lesson_id", name="uq_lesson_progress_enrollment_lesson"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     enrollment_id = Column(Integer, ForeignKey("enrollments.id"), nullable=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+class Job(Base):
+    """Queued unit of background work; see app.utils.jobs"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # The claim query: ready jobs of some lanes, highest priority first
+        Index("ix_jobs_status_lane_priority_run_at", "status", "lane", "priority", "run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, index=True)
+    payload = Column(Text, nullable=False, default="{}")
+    lane = Column(String, nullable=False, default="default")
+    priority = Column(Integer, nullable=False, default=0)
+    # queued -> running -> done, or back to queued for a retry, or failed
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Index, text
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+class AdminNotification(Base):
+    """Admin notification waiting for the next digest email"""
+    __tablename__ = "admin_notifications"
+    __table_args__ = (
+        # The digest reads unsent notifications in arrival order
+        Index(
+            "ix_admin_notifications_unsent", "id",
+            postgresql_where=text("sent_at IS NULL"), sqlite_where=text("sent_at IS NULL"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False)  # contact_inquiry, consultation
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    urgent = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+class PaymentEvent(Base):
+    """Raw Stripe webhook event; stripe_event_id makes redeliveries no-ops"""
+    __tablename__ = "payment_events"
+    __table_args__ = (
+        Index("ix_payment_events_processed_at_id", "processed_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    stripe_event_id = Column(String, nullable=False, unique=True)
+    event_type = Column(String, nullable=False, index=True)
+    payload = Column(Text, nullable=False)
+    stripe_created_at = Column(DateTime(timezone=True), nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    # Why the event changed nothing (unknown enrollment, malformed payload, ...)
+    error = Column(String, nullable=True)
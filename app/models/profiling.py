@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+class RequestProfile(Base):
+    """Collapsed stacks of one profiled request, readable from any worker"""
+    __tablename__ = "request_profiles"
+
+    id = Column(Integer, primary_key=True, index=True)
+    profile_id = Column(String(32), nullable=False, unique=True, index=True)
+    output = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from datetime import date
+
+
+class EnrollmentTimeBucket(BaseModel):
+    period_start: date
+    enrollments: int
+    revenue: float
+
+
+class RevenueBreakdown(BaseModel):
+    key: str
+    label: str
+    enrollments: int
+    revenue: float
+
+
+class CityDistribution(BaseModel):
+    city: str
+    enrollments: int
+
+
+class StatusFunnelStep(BaseModel):
+    status: str
+    enrollments: int
+    share: float
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import datetime
+
+
+class BacktestRequest(BaseModel):
+    symbol: str = Field(..., max_length=64)
+    interval: str = Field(..., max_length=4)
+    strategy: str
+    params: Dict[str, float] = {}
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    # Round-trip costs are charged per position change, in basis points of notional
+    cost_bps: float = Field(0.0, ge=0, le=1000)
+
+
+class EquityCurve(BaseModel):
+    timestamp: List[int]
+    equity: List[float]
+
+
+class BacktestResult(BaseModel):
+    strategy: str
+    params: Dict[str, float]
+    symbol: str
+    interval: str
+    bars: int
+    total_return: float
+    buy_and_hold_return: float
+    sharpe: float
+    max_drawdown: float
+    exposure: float
+    trades: int
+    win_rate: Optional[float] = None
+    equity_curve: EquityCurve
+    elapsed_ms: float
+    bars_per_second: Optional[int] = None
+    cached: bool = False
+
+
+class StrategyInfo(BaseModel):
+    name: str
+    description: str
+    params: Dict[str, float]
@@ -7,6 +7,7 @@ class TestimonialBase(BaseModel):
     title: str
     content: str
     rating: int  # 1-5 stars
+    course_id: Optional[int] = None
 
 
 class TestimonialCreate(TestimonialBase):
@@ -17,6 +18,7 @@ class TestimonialUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
     rating: Optional[int] = None
+    course_id: Optional[int] = None
     is_featured: Optional[bool] = None
     is_approved: Optional[bool] = None
 
@@ -1,7 +1,22 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, computed_field
+from typing import Dict, Optional, List
 from datetime import datetime
 from app.models.course import CourseLevel, CourseCategory
+from app.utils.images import image_srcset
+
+
+class CourseInstructor(BaseModel):
+    id: int
+    full_name: str
+    profile_image_url: Optional[str] = None
+
+    @computed_field
+    @property
+    def profile_image_srcset(self) -> Optional[Dict[str, str]]:
+        return image_srcset(self.profile_image_url, "user_avatar")
+
+    class Config:
+        from_attributes = True
 
 
 class CourseFeatureBase(BaseModel):
@@ -88,10 +103,15 @@ class Course(CourseBase):
     instructor_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
-    instructor: Optional[dict] = None
+    instructor: Optional[CourseInstructor] = None
     lessons: List[Lesson] = []
     course_features: List[CourseFeature] = []
 
+    @computed_field
+    @property
+    def thumbnail_srcset(self) -> Optional[Dict[str, str]]:
+        return image_srcset(self.thumbnail_url, "course_thumbnail")
+
     class Config:
         from_attributes = True
 
@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr
 from datetime import datetime
 from typing import Optional
 from app.models.enrollment import EnrollmentStatus
+from app.models.course import CourseLevel, CourseCategory
 
 
 class EnrollmentFormCreate(BaseModel):
@@ -39,6 +40,26 @@ class EnrollmentResponse(BaseModel):
         from_attributes = True
 
 
+class EnrollmentCourseCard(BaseModel):
+    id: int
+    title: str
+    slug: str
+    short_description: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    level: CourseLevel
+    category: CourseCategory
+    duration_weeks: int
+    price: float
+    total_lessons: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class EnrollmentWithCourse(EnrollmentResponse):
+    course: EnrollmentCourseCard
+
+
 class EnrollmentFormResponse(BaseModel):
     message: str
     enrollment_id: Optional[int]
@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class Quote(BaseModel):
+    symbol: str
+    ltp: float
+    # Exchange time of the last trade, Unix epoch milliseconds
+    timestamp_ms: int
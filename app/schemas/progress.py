@@ -0,0 +1,69 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List
+from datetime import datetime, timezone
+
+
+class ProgressHeartbeat(BaseModel):
+    enrollment_id: int
+    lesson_id: int
+    # Cumulative seconds watched for this lesson, not a delta. Replaying or
+    # losing a heartbeat is harmless because the largest value wins, so the
+    # ingest endpoint caps it at the lesson's duration.
+    watch_time_seconds: int = Field(..., ge=0)
+    completed: bool = False
+    watched_at: Optional[datetime] = None
+
+    @field_validator("watched_at")
+    @classmethod
+    def not_in_the_future(cls, value: Optional[datetime]) -> Optional[datetime]:
+        """UTC, and never later than now (the largest watched_at wins as well)"""
+        if value is None:
+            return None
+        value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+        return min(value, datetime.now(timezone.utc))
+
+
+class ProgressHeartbeatBatch(BaseModel):
+    heartbeats: List[ProgressHeartbeat] = Field(..., max_length=500)
+
+
+class ProgressIngestResponse(BaseModel):
+    accepted: int
+    rejected: int
+
+
+class CourseProgressSummary(BaseModel):
+    enrollment_id: int
+    course_id: int
+    course_title: str
+    total_lessons: int
+    completed_lessons: int
+    completion_ratio: float
+    watch_time_seconds: int
+    next_lesson_id: Optional[int] = None
+    next_lesson_title: Optional[str] = None
+
+
+class StudentProgress(BaseModel):
+    enrollment_id: int
+    user_id: int
+    student_name: str
+    completed_lessons: int
+    completion_ratio: float
+    watch_time_seconds: int
+    next_lesson_id: Optional[int] = None
+
+
+class LessonCompletionRate(BaseModel):
+    lesson_id: int
+    completion_rate: float
+
+
+class CourseProgressReport(BaseModel):
+    course_id: int
+    total_lessons: int
+    student_count: int
+    average_completion: float
+    total_watch_time_seconds: int
+    lessons: List[LessonCompletionRate]
+    students: List[StudentProgress]
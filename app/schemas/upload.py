@@ -0,0 +1,56 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+
+UploadTargetName = Literal["course_video", "course_thumbnail", "lesson_video", "user_avatar"]
+
+
+class UploadRequest(BaseModel):
+    target: UploadTargetName
+    entity_id: int
+    filename: str = Field(..., max_length=255)
+    content_type: str
+    size: int = Field(..., gt=0)
+
+
+class PresignedPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class UploadTicket(BaseModel):
+    key: str
+    # POST: send `fields` plus the file as multipart/form-data to `url`.
+    # MULTIPART: PUT each `part_size` chunk to its part URL, keep the ETags.
+    method: Literal["POST", "MULTIPART"]
+    url: Optional[str] = None
+    fields: Optional[Dict[str, str]] = None
+    upload_id: Optional[str] = None
+    part_size: Optional[int] = None
+    parts: List[PresignedPart] = []
+    expires_in: int
+
+
+class UploadedPart(BaseModel):
+    part_number: int = Field(..., ge=1, le=10000)
+    etag: str
+
+
+class UploadComplete(BaseModel):
+    target: UploadTargetName
+    entity_id: int
+    key: str
+    upload_id: Optional[str] = None
+    parts: List[UploadedPart] = []
+
+
+class UploadAbort(BaseModel):
+    target: UploadTargetName
+    entity_id: int
+    key: str
+    upload_id: str
+
+
+class UploadResult(BaseModel):
+    url: str
+    # Images uploaded through the API only: {"webp": "... 320w, ...", "jpg": "..."}
+    srcset: Optional[Dict[str, str]] = None
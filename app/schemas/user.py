@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, computed_field
+from typing import Dict, Optional
 from datetime import datetime
 from app.models.user import UserRole
+from app.utils.images import image_srcset
 
 
 class UserBase(BaseModel):
@@ -34,6 +35,11 @@ class UserInDB(UserBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
+    @computed_field
+    @property
+    def profile_image_srcset(self) -> Optional[Dict[str, str]]:
+        return image_srcset(self.profile_image_url, "user_avatar")
+
     class Config:
         from_attributes = True
 
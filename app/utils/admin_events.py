@@ -0,0 +1,285 @@
+# Live admin feed: new inquiries, enrollments and consultations as they commit
+"""
+A session hook turns every inserted ContactInquiry, Enrollment and
+ConsultationSchedule into a small JSON event.
+
+On PostgreSQL the event is sent with pg_notify inside the inserting
+transaction, so it is delivered exactly when (and only if) the transaction
+commits, to every web worker. Each worker holds one LISTEN connection,
+opened when its first dashboard connects, and fans the notifications out
+to its SSE clients through AdminEventBroker.
+
+Other databases have no NOTIFY; events are published to the broker of the
+committing process after commit, which covers single-process deployments
+and tests.
+
+Every event gets an id "<epoch>-<sequence>" from the broker, which keeps
+the last MAX_PENDING of them, so a dashboard reconnecting with Last-Event-ID
+to the same worker is sent what it missed. Anything the broker cannot
+replay (another worker, events evicted, or notifications lost while the
+LISTEN connection was down, which starts a new epoch) gets a "reload".
+"""
+import asyncio
+import json
+import secrets
+import select
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from app.database.database import engine
+from app.models.consultation import ConsultationSchedule
+from app.models.content import ContactInquiry
+from app.models.enrollment import Enrollment
+
+CHANNEL = "admin_events"
+# Pending events a slow dashboard may fall behind by before it must reload;
+# also how many recent events the broker keeps for Last-Event-ID resumes
+MAX_PENDING = 500
+
+# (event id, event)
+IdentifiedEvent = Tuple[str, Dict]
+
+
+def _event_for(obj) -> Optional[Dict]:
+    if isinstance(obj, ContactInquiry):
+        return {"type": "contact_inquiry", "id": obj.id, "name": obj.name, "email": obj.email,
+                "subject": (obj.subject or "")[:200], "course_interest": obj.course_interest}
+    if isinstance(obj, Enrollment):
+        return {"type": "enrollment", "id": obj.id, "user_id": obj.user_id, "course_id": obj.course_id,
+                "student_name": obj.student_name, "student_email": obj.student_email,
+                "course_title": obj.course_title}
+    if isinstance(obj, ConsultationSchedule):
+        return {"type": "consultation", "id": obj.id, "name": obj.name, "email": obj.email,
+                "scheduled_date": obj.scheduled_date.isoformat() if obj.scheduled_date else obj.preferred_date,
+                "scheduled_time": obj.scheduled_time.strftime("%H:%M") if obj.scheduled_time else obj.preferred_time}
+    return None
+
+
+class AdminEventSubscription:
+    """One dashboard's pending events; `lagged` is set if it fell too far behind"""
+
+    def __init__(self, types: Optional[Set[str]] = None):
+        self.types = types
+        self.lagged = False
+        self._pending: deque = deque()
+        self._ready = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+    def _push(self, events: List[IdentifiedEvent]):
+        for event_id, item in events:
+            if self.types and item["type"] not in self.types:
+                continue
+            if len(self._pending) >= MAX_PENDING:
+                self._pending.popleft()
+                self.lagged = True
+            self._pending.append((event_id, item))
+        if self._pending:
+            self._ready.set()
+
+    def _lag(self):
+        self.lagged = True
+        self._ready.set()
+
+    def push(self, events: List[IdentifiedEvent]):
+        """Thread-safe: commits happen on threadpool threads"""
+        self._loop.call_soon_threadsafe(self._push, events)
+
+    def mark_lagged(self):
+        """Thread-safe: events were missed, the dashboard must reload"""
+        self._loop.call_soon_threadsafe(self._lag)
+
+    async def next_batch(self) -> List[IdentifiedEvent]:
+        await self._ready.wait()
+        self._ready.clear()
+        events, self._pending = list(self._pending), deque()
+        return events
+
+
+class AdminEventBroker:
+    def __init__(self, engine):
+        self.engine = engine
+        self._subscriptions: Set[AdminEventSubscription] = set()
+        self._lock = threading.Lock()
+        self._listener: Optional["PostgresListener"] = None
+        self._epoch = secrets.token_hex(4)
+        self._sequence = 0
+        self._recent: deque = deque(maxlen=MAX_PENDING)
+
+    @property
+    def last_event_id(self) -> str:
+        with self._lock:
+            return f"{self._epoch}-{self._sequence}"
+
+    def subscribe(self, types: Optional[Set[str]] = None,
+                  last_event_id: Optional[str] = None) -> AdminEventSubscription:
+        """Subscribe; with last_event_id, what was missed since is replayed (or a reload requested)"""
+        subscription = AdminEventSubscription(types)
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if self.engine.dialect.name == "postgresql" and self._listener is None:
+                self._listener = PostgresListener(self.engine, CHANNEL, self.publish_payload, self.resync)
+                self._listener.start()
+            if last_event_id is not None:
+                missed = self._since(last_event_id)
+                if missed is None:
+                    subscription.mark_lagged()
+                elif missed:
+                    subscription.push(missed)
+        return subscription
+
+    def _since(self, last_event_id: str) -> Optional[List[IdentifiedEvent]]:
+        """Recent events after last_event_id; None if some of them are no longer known"""
+        epoch, _, sequence = last_event_id.rpartition("-")
+        if epoch != self._epoch or not sequence.isdigit() or int(sequence) > self._sequence:
+            return None
+        oldest = self._recent[0][0] if self._recent else self._sequence + 1
+        if int(sequence) + 1 < oldest:
+            return None
+        return [(f"{self._epoch}-{seq}", item) for seq, item in self._recent if seq > int(sequence)]
+
+    def unsubscribe(self, subscription: AdminEventSubscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, events: List[Dict]):
+        identified = []
+        with self._lock:
+            for item in events:
+                self._sequence += 1
+                self._recent.append((self._sequence, item))
+                identified.append((f"{self._epoch}-{self._sequence}", item))
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.push(identified)
+            except RuntimeError:
+                # Its event loop is gone (server shutting down)
+                self.unsubscribe(subscription)
+
+    def publish_payload(self, payload: str):
+        try:
+            self.publish([json.loads(payload)])
+        except ValueError:
+            print(f"Warning: Ignoring malformed admin event: {payload[:100]}")
+
+    def resync(self):
+        """Events may have been missed: start a new epoch and have every dashboard reload"""
+        with self._lock:
+            self._epoch = secrets.token_hex(4)
+            self._recent.clear()
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.mark_lagged()
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+    def stop(self):
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+
+
+class PostgresListener:
+    """Dedicated LISTEN connection on a daemon thread, reconnecting with backoff.
+
+    Notifications sent while it is reconnecting are lost, so on_reconnect is
+    called once LISTEN is back.
+    """
+
+    def __init__(self, engine, channel: str, on_payload, on_reconnect=None, poll_seconds: float = 1.0):
+        self.engine = engine
+        self.channel = channel
+        self.on_payload = on_payload
+        self.on_reconnect = on_reconnect
+        self.poll_seconds = poll_seconds
+        self._listened = False
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="admin-events-listen", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        backoff = 1
+        while not self._stopping.is_set():
+            started = time.monotonic()
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"Error in admin events listener: {e}")
+            if time.monotonic() - started > 60:
+                backoff = 1
+            self._stopping.wait(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def _listen(self):
+        # Outside the pool: this connection lives as long as the listener
+        raw = self.engine.raw_connection()
+        raw.detach()
+        connection = raw.driver_connection
+        try:
+            if callable(getattr(connection, "notifies", None)):  # psycopg 3
+                connection.autocommit = True
+                connection.execute(f'LISTEN "{self.channel}"')
+                self._listening()
+                while not self._stopping.is_set():
+                    for notify in connection.notifies(timeout=self.poll_seconds, stop_after=100):
+                        self.on_payload(notify.payload)
+            else:  # psycopg2
+                connection.autocommit = True
+                connection.cursor().execute(f'LISTEN "{self.channel}"')
+                self._listening()
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], self.poll_seconds)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            self.on_payload(connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+    def _listening(self):
+        if self._listened and self.on_reconnect is not None:
+            self.on_reconnect()
+        self._listened = True
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# Global per-process broker: one LISTEN connection per worker, shared by all dashboards
+admin_events = AdminEventBroker(engine)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_admin_events(session, flush_context):
+    events = [item for item in map(_event_for, session.new) if item is not None]
+    if not events:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        # Delivered by the server on commit, to every listening worker
+        for item in events:
+            connection.execute(func.pg_notify(CHANNEL, json.dumps(item, default=str)).select())
+    else:
+        session.info.setdefault("admin_events", []).extend(events)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_admin_events(session):
+    events = session.info.pop("admin_events", None)
+    if events:
+        admin_events.publish(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_admin_events(session):
+    session.info.pop("admin_events", None)
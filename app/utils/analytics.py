@@ -0,0 +1,264 @@
+# Enrollment and revenue analytics served from rollup tables
+"""
+Reports never aggregate the enrollments table at request time. They read
+enrollment_daily_rollups, which holds one row per (UTC day, course, status,
+city). Rollups are refreshed incrementally: only days containing enrollments
+created or updated since the last refresh are recomputed. Deleted
+enrollments are only reflected by a full rebuild (refresh_rollups(full=True)).
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy import Date, select, insert, delete, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.analytics import EnrollmentDailyRollup, AnalyticsRefreshState
+from app.models.course import Course
+from app.models.enrollment import Enrollment, EnrollmentStatus
+from app.utils.cache import ReportCache
+from app.utils.course_stats import COUNTED_ENROLLMENT_STATUSES
+
+ROLLUP_NAME = "enrollment_daily"
+
+# Rows committed while a refresh runs may carry an earlier updated_at; the
+# next refresh re-reads this much history. Recomputing a day is idempotent.
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_date(value) -> date:
+    # SQLite returns date() results as ISO strings
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class utc_date(FunctionElement):
+    """Calendar day of a timestamp in UTC, whatever the session time zone"""
+    type = Date()
+    name = "utc_date"
+    inherit_cache = True
+
+
+@compiles(utc_date)
+def _compile_utc_date(element, compiler, **kw):
+    # SQLite stores the naive UTC timestamps as written
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(utc_date, "postgresql")
+def _compile_utc_date_postgresql(element, compiler, **kw):
+    return f"CAST(timezone('UTC', {compiler.process(element.clauses, **kw)}) AS DATE)"
+
+
+def _enrollment_day():
+    return utc_date(Enrollment.enrolled_at)
+
+
+def _rebuild_days(db, days: Optional[List[date]] = None):
+    day = _enrollment_day()
+    source = (
+        select(
+            day,
+            Enrollment.course_id,
+            Enrollment.status,
+            Enrollment.student_city,
+            func.count(),
+            func.coalesce(func.sum(Enrollment.payment_amount), 0.0),
+        )
+        .group_by(day, Enrollment.course_id, Enrollment.status, Enrollment.student_city)
+    )
+    clear = delete(EnrollmentDailyRollup)
+    if days is not None:
+        source = source.where(day.in_(days))
+        clear = clear.where(EnrollmentDailyRollup.day.in_(days))
+    db.execute(clear)
+    db.execute(
+        insert(EnrollmentDailyRollup).from_select(
+            ["day", "course_id", "status", "student_city", "enrollment_count", "revenue"], source
+        )
+    )
+
+
+def _create_state(db, refreshed_at: datetime) -> bool:
+    """Insert the refresh state row unless it exists; True if this call created it"""
+    row = {"name": ROLLUP_NAME, "refreshed_at": refreshed_at}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        # A concurrent first refresh waits here for the other insert, then skips
+        stmt = dialect_insert(AnalyticsRefreshState.__table__).values(row).on_conflict_do_nothing(
+            index_elements=[AnalyticsRefreshState.name]
+        )
+        return db.execute(stmt).rowcount == 1
+    if db.get(AnalyticsRefreshState, ROLLUP_NAME) is not None:
+        return False
+    db.add(AnalyticsRefreshState(**row))
+    db.flush()
+    return True
+
+
+def refresh_rollups(db, full: bool = False, chunk_size: int = 200) -> int:
+    """Bring rollups up to date; returns the number of days recomputed (-1 for full)"""
+    started_at = _utcnow()
+    created = _create_state(db, started_at)
+    # Row lock: workers refreshing at the same time take turns
+    state = (
+        db.query(AnalyticsRefreshState)
+        .filter(AnalyticsRefreshState.name == ROLLUP_NAME)
+        .with_for_update()
+        .one()
+    )
+
+    if full or created:
+        _rebuild_days(db)
+        recomputed = -1
+    else:
+        since = state.refreshed_at - REFRESH_OVERLAP
+        dirty = db.execute(
+            select(_enrollment_day()).where(Enrollment.updated_at >= since).distinct()
+        ).scalars().all()
+        days = sorted(_as_date(d) for d in dirty if d is not None)
+        for start in range(0, len(days), chunk_size):
+            _rebuild_days(db, days[start:start + chunk_size])
+        recomputed = len(days)
+
+    state.refreshed_at = started_at
+    db.commit()
+    report_cache.clear()
+    return recomputed
+
+
+report_cache = ReportCache(ttl_seconds=settings.analytics_refresh_interval_seconds)
+
+
+class RollupRefresher:
+    """Background thread that refreshes rollups on an interval, off the request path"""
+
+    def __init__(self, session_factory, interval_seconds: float):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rollup-refresher", daemon=True)
+        self._thread.start()
+
+    def refresh(self):
+        db = self.session_factory()
+        try:
+            refresh_rollups(db)
+        except Exception as e:
+            db.rollback()
+            print(f"Error refreshing analytics rollups: {e}")
+        finally:
+            db.close()
+
+    def _run(self):
+        self.refresh()
+        while not self._stop.wait(self.interval_seconds):
+            self.refresh()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# Runs in the job worker (or the web process with JOB_RUN_IN_WEB); reports only read
+rollup_refresher = RollupRefresher(SessionLocal, settings.analytics_refresh_interval_seconds)
+
+
+def _date_filters(query, start: Optional[date], end: Optional[date]):
+    if start:
+        query = query.where(EnrollmentDailyRollup.day >= start)
+    if end:
+        query = query.where(EnrollmentDailyRollup.day <= end)
+    return query
+
+
+def enrollments_over_time(db, bucket: str = "day", start: Optional[date] = None,
+                          end: Optional[date] = None, course_id: Optional[int] = None) -> List[dict]:
+    query = select(
+        EnrollmentDailyRollup.day,
+        func.sum(EnrollmentDailyRollup.enrollment_count),
+        func.sum(EnrollmentDailyRollup.revenue),
+    ).group_by(EnrollmentDailyRollup.day).order_by(EnrollmentDailyRollup.day)
+    query = _date_filters(query, start, end)
+    if course_id is not None:
+        query = query.where(EnrollmentDailyRollup.course_id == course_id)
+
+    buckets = OrderedDict()
+    for day, count, revenue in db.execute(query).all():
+        day = _as_date(day)
+        key = day - timedelta(days=day.weekday()) if bucket == "week" else day
+        entry = buckets.setdefault(key, {"period_start": key, "enrollments": 0, "revenue": 0.0})
+        entry["enrollments"] += count
+        entry["revenue"] += revenue or 0.0
+    return list(buckets.values())
+
+
+def revenue_breakdown(db, group_by: str = "course", start: Optional[date] = None,
+                      end: Optional[date] = None) -> List[dict]:
+    revenue = func.sum(EnrollmentDailyRollup.revenue)
+    count = func.sum(EnrollmentDailyRollup.enrollment_count)
+    if group_by == "category":
+        keys = (Course.category,)
+    else:
+        keys = (Course.id, Course.title)
+    query = (
+        select(*keys, count, revenue)
+        .select_from(EnrollmentDailyRollup)
+        .join(Course, Course.id == EnrollmentDailyRollup.course_id)
+        .where(EnrollmentDailyRollup.status.in_(COUNTED_ENROLLMENT_STATUSES))
+        .group_by(*keys)
+        .order_by(revenue.desc())
+    )
+    query = _date_filters(query, start, end)
+
+    results = []
+    for row in db.execute(query).all():
+        if group_by == "category":
+            results.append({"key": row[0].value, "label": row[0].value, "enrollments": row[1], "revenue": row[2]})
+        else:
+            results.append({"key": str(row[0]), "label": row[1], "enrollments": row[2], "revenue": row[3]})
+    return results
+
+
+def city_distribution(db, limit: int = 20, start: Optional[date] = None,
+                      end: Optional[date] = None) -> List[dict]:
+    count = func.sum(EnrollmentDailyRollup.enrollment_count)
+    query = (
+        select(EnrollmentDailyRollup.student_city, count)
+        .group_by(EnrollmentDailyRollup.student_city)
+        .order_by(count.desc())
+        .limit(limit)
+    )
+    query = _date_filters(query, start, end)
+    return [{"city": city, "enrollments": n} for city, n in db.execute(query).all()]
+
+
+def status_funnel(db, start: Optional[date] = None, end: Optional[date] = None) -> List[dict]:
+    query = select(
+        EnrollmentDailyRollup.status, func.sum(EnrollmentDailyRollup.enrollment_count)
+    ).group_by(EnrollmentDailyRollup.status)
+    query = _date_filters(query, start, end)
+    counts = {status: n for status, n in db.execute(query).all()}
+    total = sum(counts.values())
+    return [
+        {"status": status.value, "enrollments": counts.get(status, 0),
+         "share": round(counts.get(status, 0) / total, 4) if total else 0.0}
+        for status in EnrollmentStatus
+    ]
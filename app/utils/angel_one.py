@@ -0,0 +1,128 @@
+# Angel One SmartAPI market data feed (WebSocket 2.0)
+"""
+Symbols are "<EXCHANGE>:<token>", e.g. "NSE:2885" for RELIANCE-EQ; tokens
+come from Angel One's instrument master. The feed logs in with the client
+code, MPIN and a TOTP generated from ANGEL_TOTP_SECRET, then streams LTP
+mode packets.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import struct
+import time
+import urllib.request
+from typing import Dict, Optional, Set, Tuple
+from app.core.config import settings
+from app.utils.market_data import MarketFeed, TickCallback
+
+LOGIN_URL = "https://apiconnect.angelone.in/rest/auth/angelbroking/user/v1/loginByPassword"
+STREAM_URL = "wss://smartapisocket.angelone.in/smart-stream"
+EXCHANGE_TYPES = {"NSE": 1, "NFO": 2, "BSE": 3, "BFO": 4, "MCX": 5, "NCX": 7, "CDE": 13}
+EXCHANGE_NAMES = {code: name for name, code in EXCHANGE_TYPES.items()}
+SUBSCRIBE, UNSUBSCRIBE = 1, 0
+LTP_MODE = 1
+HEARTBEAT_SECONDS = 10
+
+# mode, exchange type, token (null padded), sequence, exchange time (ms), LTP (paise)
+LTP_PACKET = struct.Struct("<BB25sqqq")
+
+
+def totp(secret: str, for_time: Optional[float] = None, digits: int = 6, step: int = 30) -> str:
+    """RFC 6238 one-time password for a base32 secret"""
+    key = base64.b32decode(secret.upper().replace(" ", "") + "=" * (-len(secret) % 8))
+    counter = int((time.time() if for_time is None else for_time) // step)
+    digest = hmac.new(key, struct.pack(">Q", counter), hashlib.sha1).digest()
+    offset = digest[-1] & 0x0F
+    code = struct.unpack(">I", digest[offset:offset + 4])[0] & 0x7FFFFFFF
+    return str(code % 10 ** digits).zfill(digits)
+
+
+def parse_ltp_packet(packet: bytes) -> Tuple[str, float, int]:
+    """(symbol, ltp, exchange timestamp ms) from a binary LTP-mode packet"""
+    _, exchange_type, token, _, timestamp_ms, ltp_paise = LTP_PACKET.unpack_from(packet)
+    token = token.split(b"\x00", 1)[0].decode()
+    return f"{EXCHANGE_NAMES.get(exchange_type, exchange_type)}:{token}", ltp_paise / 100, timestamp_ms
+
+
+def token_list(symbols: Set[str]) -> list:
+    tokens: Dict[int, list] = {}
+    for symbol in symbols:
+        exchange, _, token = symbol.partition(":")
+        if exchange in EXCHANGE_TYPES and token:
+            tokens.setdefault(EXCHANGE_TYPES[exchange], []).append(token)
+    return [
+        {"exchangeType": exchange_type, "tokens": sorted(tokens)}
+        for exchange_type, tokens in sorted(tokens.items())
+    ]
+
+
+def login() -> Tuple[str, str]:
+    """Fresh (jwt, feed token) for the configured account"""
+    body = json.dumps({
+        "clientcode": settings.angel_client_id,
+        "password": settings.angel_mpin,
+        "totp": totp(settings.angel_totp_secret),
+    }).encode()
+    request = urllib.request.Request(LOGIN_URL, data=body, method="POST", headers={
+        "Content-Type": "application/json", "Accept": "application/json",
+        "X-UserType": "USER", "X-SourceID": "WEB", "X-PrivateKey": settings.angel_api_key,
+        "X-ClientLocalIP": "127.0.0.1", "X-ClientPublicIP": "127.0.0.1", "X-MACAddress": "00:00:00:00:00:00",
+    })
+    with urllib.request.urlopen(request, timeout=10) as response:
+        result = json.load(response)
+    if not result.get("status"):
+        raise RuntimeError(f"Angel One login failed: {result.get('message')}")
+    return result["data"]["jwtToken"], result["data"]["feedToken"]
+
+
+class AngelOneFeed(MarketFeed):
+    def __init__(self):
+        super().__init__()
+        self._websocket = None
+
+    def subscribe(self, symbols: Set[str]):
+        super().subscribe(symbols)
+        self._send_soon(SUBSCRIBE, symbols)
+
+    def unsubscribe(self, symbols: Set[str]):
+        super().unsubscribe(symbols)
+        self._send_soon(UNSUBSCRIBE, symbols)
+
+    def _send_soon(self, action: int, symbols: Set[str]):
+        if self._websocket is not None and symbols:
+            asyncio.get_running_loop().create_task(self._send(action, symbols))
+
+    async def _send(self, action: int, symbols: Set[str]):
+        await self._websocket.send(json.dumps({
+            "correlationID": "marketpro",
+            "action": action,
+            "params": {"mode": LTP_MODE, "tokenList": token_list(symbols)},
+        }))
+
+    async def _heartbeat(self, websocket):
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            await websocket.send("ping")
+
+    async def run(self, on_tick: TickCallback):
+        from websockets.asyncio.client import connect
+
+        jwt, feed_token = await asyncio.to_thread(login)
+        headers = {
+            "Authorization": jwt, "x-api-key": settings.angel_api_key,
+            "x-client-code": settings.angel_client_id, "x-feed-token": feed_token,
+        }
+        async with connect(STREAM_URL, additional_headers=headers) as websocket:
+            self._websocket = websocket
+            heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(websocket))
+            try:
+                if self.symbols:
+                    await self._send(SUBSCRIBE, self.symbols)
+                async for message in websocket:
+                    if isinstance(message, bytes) and len(message) >= LTP_PACKET.size:
+                        on_tick(*parse_ltp_packet(message))
+            finally:
+                heartbeat.cancel()
+                self._websocket = None
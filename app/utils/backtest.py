@@ -0,0 +1,295 @@
+# Vectorized strategy backtests over stored candles
+"""
+A strategy turns a CandleSeries into a target position per bar (1 long,
+-1 short, 0 flat) using whole-array NumPy operations; PnL, costs, drawdown
+and per-trade statistics are then computed from that position array
+without Python loops over bars.
+
+Backtests run in a spawn process pool. Workers open the candle columns
+themselves (memory-mapped, so no arrays cross the process boundary) and
+return only metrics plus a downsampled equity curve. Results are cached
+per (strategy, params, dataset version, range, costs), concurrent
+identical requests share one run, and each user may only have a few runs
+in flight.
+"""
+import asyncio
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.utils.cache import ReportCache
+from app.utils.candles import CandleSeries, CandleStore, bollinger, ema, macd, rsi, sma
+
+TRADING_DAYS = 252
+SESSION_MINUTES = 375  # NSE cash session, 09:15-15:30
+
+
+class BacktestError(Exception):
+    """Unknown strategy or invalid parameters"""
+
+
+class BacktestBusyError(BacktestError):
+    """The user already has the maximum number of backtests running"""
+
+
+def _hold(entries: np.ndarray, exits: np.ndarray, side: float = 1.0) -> np.ndarray:
+    """Position `side` from each entry bar until the next exit bar (forward fill)"""
+    events = np.where(entries, side, np.where(exits, 0.0, np.nan))
+    last = np.where(~np.isnan(events), np.arange(len(events)), 0)
+    np.maximum.accumulate(last, out=last)
+    position = events[last]
+    return np.nan_to_num(position, nan=0.0)
+
+
+def _direction(signal: np.ndarray, allow_short: bool) -> np.ndarray:
+    position = np.nan_to_num(np.sign(signal), nan=0.0)
+    return position if allow_short else np.clip(position, 0, None)
+
+
+def sma_crossover(series: CandleSeries, fast=10, slow=30, allow_short=0):
+    """Long while the fast SMA is above the slow SMA"""
+    return _direction(sma(series.close, int(fast)) - sma(series.close, int(slow)), bool(allow_short))
+
+
+def ema_crossover(series: CandleSeries, fast=12, slow=26, allow_short=0):
+    """Long while the fast EMA is above the slow EMA"""
+    return _direction(ema(series.close, int(fast)) - ema(series.close, int(slow)), bool(allow_short))
+
+
+def macd_signal(series: CandleSeries, fast=12, slow=26, signal=9, allow_short=0):
+    """Long while MACD is above its signal line"""
+    result = macd(series.close, int(fast), int(slow), int(signal))
+    return _direction(result["histogram"], bool(allow_short))
+
+
+def rsi_reversion(series: CandleSeries, period=14, lower=30, exit_level=50):
+    """Buy when RSI drops below `lower`, sell when it recovers above `exit_level`"""
+    values = rsi(series.close, int(period))
+    return _hold(values < lower, values > exit_level)
+
+
+def bollinger_breakout(series: CandleSeries, period=20, width=2.0):
+    """Buy a close above the upper band, exit on a close below the middle band"""
+    bands = bollinger(series.close, int(period), float(width))
+    return _hold(series.close > bands["upper"], series.close < bands["middle"])
+
+
+# name -> (position function, default parameters)
+STRATEGIES: Dict[str, Tuple[Callable, Dict[str, float]]] = {
+    "sma_crossover": (sma_crossover, {"fast": 10, "slow": 30, "allow_short": 0}),
+    "ema_crossover": (ema_crossover, {"fast": 12, "slow": 26, "allow_short": 0}),
+    "macd_signal": (macd_signal, {"fast": 12, "slow": 26, "signal": 9, "allow_short": 0}),
+    "rsi_reversion": (rsi_reversion, {"period": 14, "lower": 30, "exit_level": 50}),
+    "bollinger_breakout": (bollinger_breakout, {"period": 20, "width": 2.0}),
+}
+
+# name -> (lowest, highest, whole numbers only)
+PARAM_BOUNDS: Dict[str, Tuple[float, float, bool]] = {
+    "fast": (1, 10_000, True),
+    "slow": (1, 10_000, True),
+    "signal": (1, 10_000, True),
+    "period": (1, 10_000, True),
+    "allow_short": (0, 1, True),
+    "lower": (0, 100, False),
+    "exit_level": (0, 100, False),
+    "width": (0, 100, False),
+}
+
+
+def resolve_params(strategy: str, params: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """Strategy defaults overridden by params; rejects unknown names"""
+    if strategy not in STRATEGIES:
+        raise BacktestError(f"Unknown strategy: {strategy}")
+    defaults = STRATEGIES[strategy][1]
+    unknown = set(params or {}) - set(defaults)
+    if unknown:
+        raise BacktestError(f"Unknown parameters for {strategy}: {', '.join(sorted(unknown))}")
+    resolved = {**defaults, **(params or {})}
+    for name, value in resolved.items():
+        lowest, highest, whole = PARAM_BOUNDS[name]
+        if not math.isfinite(value) or value < lowest or value > highest:
+            raise BacktestError(f"Parameter {name} must be between {lowest} and {highest}")
+        if whole and value != int(value):
+            raise BacktestError(f"Parameter {name} must be a whole number")
+    if "fast" in resolved and resolved["fast"] >= resolved["slow"]:
+        raise BacktestError("Parameter fast must be smaller than slow")
+    return resolved
+
+
+def bars_per_year(interval: str) -> float:
+    count, unit = int(interval[:-1]), interval[-1]
+    if unit == "m":
+        return TRADING_DAYS * SESSION_MINUTES / count
+    if unit == "h":
+        return TRADING_DAYS * SESSION_MINUTES / 60 / count
+    if unit == "d":
+        return TRADING_DAYS / count
+    return 52 / count
+
+
+def simulate(close: np.ndarray, position: np.ndarray, cost_bps: float = 0.0) -> Dict[str, np.ndarray]:
+    """Per-bar net returns for trading `position` at each bar's close.
+
+    The position decided at bar t earns bar t+1's return; changing it costs
+    cost_bps of the traded notional on the bar where it changes.
+    """
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1.0
+    held = np.concatenate(([0.0], position[:-1]))
+    turnover = np.abs(np.diff(np.concatenate(([0.0], position))))
+    net = held * returns - turnover * cost_bps / 10_000
+    return {"returns": returns, "held": held, "net": net, "equity": np.cumprod(1.0 + net)}
+
+
+def trade_returns(held: np.ndarray, net: np.ndarray) -> np.ndarray:
+    """Compounded return of each stretch of bars with the same non-zero position"""
+    if not len(held):
+        return np.empty(0)
+    starts = np.flatnonzero(np.diff(np.concatenate(([np.nan], held))) != 0)
+    growth = np.multiply.reduceat(1.0 + net, starts) - 1.0
+    return growth[held[starts] != 0]
+
+
+def summarize(timestamp: np.ndarray, close: np.ndarray, position: np.ndarray, interval: str,
+              cost_bps: float, curve_points: int) -> Dict:
+    result = simulate(close, position, cost_bps)
+    net, equity = result["net"], result["equity"]
+    trades = trade_returns(result["held"], net)
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    deviation = net.std()
+    sample = np.unique(np.linspace(0, len(equity) - 1, min(curve_points, len(equity))).astype(np.int64))
+    return {
+        "bars": int(len(close)),
+        "total_return": float(equity[-1] - 1.0) if len(equity) else 0.0,
+        "buy_and_hold_return": float(close[-1] / close[0] - 1.0) if len(close) else 0.0,
+        "sharpe": float(net.mean() / deviation * math.sqrt(bars_per_year(interval))) if deviation > 0 else 0.0,
+        "max_drawdown": float((equity / peak - 1.0).min()) if len(equity) else 0.0,
+        "exposure": float(np.count_nonzero(result["held"]) / len(close)) if len(close) else 0.0,
+        "trades": int(len(trades)),
+        "win_rate": float((trades > 0).mean()) if len(trades) else None,
+        "equity_curve": {
+            "timestamp": timestamp[sample].tolist(),
+            "equity": equity[sample].tolist(),
+        },
+    }
+
+
+_stores: Dict[str, CandleStore] = {}
+
+
+def run_backtest(store_root: str, symbol: str, interval: str, start: Optional[int], end: Optional[int],
+                 strategy: str, params: Dict[str, float], cost_bps: float, curve_points: int) -> Dict:
+    """One backtest; runs in a pool worker process"""
+    started = time.perf_counter()
+    store = _stores.get(store_root)
+    if store is None:
+        store = _stores[store_root] = CandleStore(store_root)
+    series = store.load(symbol, interval)
+    # Indicators see the whole series so the first bars of the range are warmed up
+    position = STRATEGIES[strategy][0](series, **params)
+    lo, hi = series.bounds(start, end)
+    if hi - lo < 2:
+        raise BacktestError("Need at least two candles in the requested range")
+    position = position[lo:hi].copy()
+    position[-1:] = 0.0  # flat at the end so the last trade is counted as closed
+    result = summarize(series.timestamp[lo:hi], series.close[lo:hi], position, interval, cost_bps, curve_points)
+    elapsed = time.perf_counter() - started
+    result["elapsed_ms"] = round(elapsed * 1000, 2)
+    result["bars_per_second"] = round(len(series) / elapsed) if elapsed > 0 else None
+    return result
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def backtest_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the web worker has threads (flushers, threadpool)
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.backtest_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_backtest_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+class UserJobLimiter:
+    """At most max_per_user jobs in flight per user (per web process)"""
+
+    def __init__(self, max_per_user: int):
+        self.max_per_user = max_per_user
+        self._running: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, user_id: int) -> bool:
+        with self._lock:
+            if self._running.get(user_id, 0) >= self.max_per_user:
+                return False
+            self._running[user_id] = self._running.get(user_id, 0) + 1
+            return True
+
+    def release(self, user_id: int):
+        with self._lock:
+            remaining = self._running.get(user_id, 0) - 1
+            if remaining > 0:
+                self._running[user_id] = remaining
+            else:
+                self._running.pop(user_id, None)
+
+
+result_cache = ReportCache(ttl_seconds=settings.candle_cache_ttl_seconds, max_entries=settings.backtest_cache_entries)
+user_limiter = UserJobLimiter(settings.backtest_max_per_user)
+_inflight: Dict[tuple, asyncio.Future] = {}
+
+
+async def run_cached(store: CandleStore, symbol: str, interval: str, start: Optional[int], end: Optional[int],
+                     strategy: str, params: Dict[str, float], cost_bps: float,
+                     user_id: Optional[int] = None) -> Tuple[Dict, bool]:
+    """(result, cached) for a backtest, sharing runs between identical concurrent requests.
+
+    A run started for user_id holds one of the user's slots until the pool
+    finishes it, even if the request has given up waiting.
+    """
+    params = resolve_params(strategy, params)
+    series = store.load(symbol, interval)
+    key = (strategy, tuple(sorted(params.items())), symbol, interval, series.version, start, end, cost_bps)
+
+    hit = result_cache.get(key)
+    if hit is not None:
+        return hit, True
+    running = _inflight.get(key)
+    if running is not None:
+        return await asyncio.wait_for(asyncio.shield(running), settings.backtest_timeout_seconds), True
+
+    if user_id is not None and not user_limiter.acquire(user_id):
+        raise BacktestBusyError("Too many backtests running; wait for one to finish")
+    try:
+        work = backtest_pool().submit(
+            run_backtest, store.root, symbol, interval, start, end, strategy, params, cost_bps,
+            settings.backtest_curve_points
+        )
+    except BaseException:
+        if user_id is not None:
+            user_limiter.release(user_id)
+        raise
+    if user_id is not None:
+        limiter = user_limiter
+        work.add_done_callback(lambda _: limiter.release(user_id))
+    future = asyncio.wrap_future(work)
+    _inflight[key] = future
+    try:
+        result = await asyncio.wait_for(asyncio.shield(future), settings.backtest_timeout_seconds)
+    finally:
+        _inflight.pop(key, None)
+    result_cache.put(key, result)
+    return result, False
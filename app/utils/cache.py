@@ -0,0 +1,46 @@
+# In-process caches for computed payloads
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+
+class ReportCache:
+    """Small TTL + LRU cache for computed values (reports, indicators, lookups)"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit and hit[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return hit[1]
+        return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute: Callable):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,343 @@
+# Historical OHLCV candles and technical indicators for course exercises
+"""
+Each series (symbol + interval) is a directory of one .npy file per column:
+
+    <CANDLE_STORE_PATH>/NSE:2885/1m/timestamp.npy   int64 epoch seconds, sorted
+                                   open.npy ... volume.npy   float64
+
+Columns are opened with mmap_mode="r", so a year of minute bars costs no
+RAM until it is read and pages are shared between worker processes. A
+range lookup is two binary searches on the timestamp column plus array
+slices (views, no copies).
+
+Indicators are computed over the whole series, so every range sees fully
+warmed-up values, and kept in an LRU keyed by the series version; importing
+new candles changes the version and so retires the cached results.
+
+On disk the series path is a symlink to a versioned directory beside it
+(".1m.v<version>"). An import holds a per-series file lock for its whole
+read-merge-write, writes a new version directory and swaps the link with
+one rename, so readers always find a complete series and concurrent
+imports never lose each other's rows. The version before the current one
+is kept for readers still opening it.
+"""
+import csv
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, TextIO, Tuple
+import numpy as np
+from app.core.config import settings
+from app.utils.cache import ReportCache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+PRICE_COLUMNS = COLUMNS[1:]
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9][A-Z0-9:_.&-]{0,63}$")
+INTERVAL_PATTERN = re.compile(r"^[0-9]{1,3}[mhdw]$")
+
+
+class CandleDataError(Exception):
+    """Unknown series, bad symbol/interval, or unreadable CSV"""
+
+
+@dataclass(frozen=True)
+class CandleSeries:
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    version: int
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def bounds(self, start: Optional[int] = None, end: Optional[int] = None) -> Tuple[int, int]:
+        """Index range [lo, hi) of candles with start <= timestamp <= end (epoch seconds)"""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamp, start, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamp, end, side="right"))
+        return lo, max(lo, hi)
+
+    def columns(self, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name)[lo:hi] for name in COLUMNS}
+
+
+# Indicators take and return float64 arrays of equal length, NaN until the
+# indicator has enough history.
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    result = np.full(len(values), np.nan)
+    if len(values) >= period:
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        result[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return result
+
+
+def _smooth(values: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """y[i] = alpha * values[i] + (1 - alpha) * y[i-1], starting from y[-1] = seed.
+
+    Solved in closed form with decay powers, one block at a time; blocks are
+    short enough that decay ** -block stays far from float64 overflow.
+    """
+    decay = 1.0 - alpha
+    if decay == 0:
+        return values.astype(np.float64)
+    block = max(1, int(30 * math.log(10) / -math.log(decay)))
+    result = np.empty(len(values))
+    steps = np.arange(1, block + 1)
+    powers = decay ** steps
+    previous = seed
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        n = len(chunk)
+        scaled = np.cumsum(alpha * chunk / powers[:n])
+        result[start:start + n] = powers[:n] * (previous + scaled)
+        previous = result[start + n - 1]
+    return result
+
+
+def ema(values: np.ndarray, period: int, alpha: Optional[float] = None) -> np.ndarray:
+    """Exponential moving average seeded with the SMA of the first `period` values"""
+    result = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) < period:
+        return result
+    first = valid[0]
+    seed_end = first + period
+    alpha = 2.0 / (period + 1) if alpha is None else alpha
+    result[seed_end - 1] = values[first:seed_end].mean()
+    result[seed_end:] = _smooth(values[seed_end:], alpha, result[seed_end - 1])
+    return result
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder's relative strength index"""
+    result = np.full(len(close), np.nan)
+    if len(close) <= period:
+        return result
+    change = np.diff(close)
+    average_gain = ema(np.clip(change, 0, None), period, alpha=1.0 / period)
+    average_loss = ema(np.clip(-change, 0, None), period, alpha=1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+    strength[(average_loss == 0) & ~np.isnan(average_gain)] = 100.0
+    result[1:] = strength
+    return result
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, np.ndarray]:
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+def bollinger(close: np.ndarray, period: int = 20, width: float = 2.0) -> Dict[str, np.ndarray]:
+    middle = sma(close, period)
+    # Rolling variance from running sums of the mean-centred series
+    centred = close - (close.mean() if len(close) else 0.0)
+    mean_square = sma(centred * centred, period)
+    mean = sma(centred, period)
+    deviation = np.sqrt(np.clip(mean_square - mean * mean, 0, None))
+    return {"middle": middle, "upper": middle + width * deviation, "lower": middle - width * deviation}
+
+
+# name -> (function of the series, default parameters)
+INDICATORS = {
+    "sma": (lambda s, period=20: {"sma": sma(s.close, period)}, {"period": 20}),
+    "ema": (lambda s, period=20: {"ema": ema(s.close, period)}, {"period": 20}),
+    "rsi": (lambda s, period=14: {"rsi": rsi(s.close, period)}, {"period": 14}),
+    "macd": (lambda s, fast=12, slow=26, signal=9: macd(s.close, fast, slow, signal),
+             {"fast": 12, "slow": 26, "signal": 9}),
+    "bollinger": (lambda s, period=20, width=2.0: bollinger(s.close, period, width),
+                  {"period": 20, "width": 2.0}),
+}
+
+
+def _parse_timestamp(value: str) -> int:
+    value = value.strip()
+    if value.lstrip("-").isdigit():
+        number = int(value)
+        return number // 1000 if number > 10 ** 11 else number  # accept epoch ms
+    return to_epoch(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+
+def to_epoch(value: Optional[datetime]) -> Optional[int]:
+    """Epoch seconds; naive datetimes are taken as UTC, like the stored timestamps"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock on path across processes, held for the with block"""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)  # closing the file releases it
+            yield
+            return
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                pass  # LK_LOCK gives up after about 10 seconds; keep waiting
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_csv(f: TextIO) -> Dict[str, np.ndarray]:
+    """Columns from a CSV with a timestamp,open,high,low,close,volume header"""
+    reader = csv.reader(f)
+    header = [name.strip().lower() for name in next(reader, [])]
+    missing = [name for name in COLUMNS if name not in header]
+    if missing:
+        raise CandleDataError(f"CSV is missing columns: {', '.join(missing)}")
+    positions = [header.index(name) for name in COLUMNS]
+    timestamps, prices = [], []
+    try:
+        for line_number, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            timestamps.append(_parse_timestamp(row[positions[0]]))
+            prices.append([float(row[position]) for position in positions[1:]])
+    except (ValueError, IndexError) as e:
+        raise CandleDataError(f"Invalid CSV row {line_number}: {e}")
+    prices = np.array(prices, dtype=np.float64).reshape(-1, len(PRICE_COLUMNS))
+    columns = {"timestamp": np.array(timestamps, dtype=np.int64)}
+    columns.update({name: prices[:, i] for i, name in enumerate(PRICE_COLUMNS)})
+    return columns
+
+
+class CandleStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._series: Dict[Tuple[str, str], CandleSeries] = {}
+        self._lock = threading.Lock()
+        self.indicator_cache = ReportCache(ttl_seconds=settings.candle_cache_ttl_seconds,
+                                           max_entries=settings.candle_cache_entries)
+
+    def path_for(self, symbol: str, interval: str) -> str:
+        if not SYMBOL_PATTERN.match(symbol) or not INTERVAL_PATTERN.match(interval):
+            raise CandleDataError("Invalid symbol or interval")
+        return os.path.join(self.root, symbol, interval)
+
+    def load(self, symbol: str, interval: str) -> CandleSeries:
+        """Memory-mapped series; reopened only after an import replaced it"""
+        path = self.path_for(symbol, interval)
+        for _ in range(3):
+            try:
+                return self._open(symbol, interval, path)
+            except FileNotFoundError:
+                if not os.path.lexists(path):
+                    break
+                # Retired by imports between resolving the link and reading; resolve again
+        raise CandleDataError(f"No {interval} candles for {symbol}")
+
+    def _open(self, symbol: str, interval: str, path: str) -> CandleSeries:
+        if os.path.islink(path):
+            current = os.readlink(path)
+            version = int(current.rsplit(".v", 1)[1])
+            current = os.path.join(os.path.dirname(path), current)
+        else:
+            # Written before versioned directories
+            current = path
+            version = os.stat(os.path.join(path, "timestamp.npy")).st_mtime_ns
+        series = self._series.get((symbol, interval))
+        if series is None or series.version != version:
+            arrays = {name: np.load(os.path.join(current, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+            series = CandleSeries(version=version, **arrays)
+            with self._lock:
+                self._series[(symbol, interval)] = series
+        return series
+
+    def import_columns(self, symbol: str, interval: str, columns: Dict[str, np.ndarray]) -> int:
+        """Merge candles into the series (new rows win on equal timestamps); returns its length"""
+        path = self.path_for(symbol, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One import per series at a time, across processes
+        with _file_lock(os.path.join(os.path.dirname(path), f".{interval}.lock")):
+            try:
+                existing = self.load(symbol, interval).columns(0, None)
+                merged = {name: np.concatenate([columns[name], existing[name]]) for name in COLUMNS}
+            except CandleDataError:
+                merged = columns
+            # Stable unique keeps the first occurrence, i.e. the newly imported row
+            _, keep = np.unique(merged["timestamp"], return_index=True)
+            merged = {name: np.ascontiguousarray(values[keep]) for name, values in merged.items()}
+            self._publish(path, merged)
+        return len(merged["timestamp"])
+
+    def _publish(self, path: str, merged: Dict[str, np.ndarray]):
+        """Write a new version directory and point the series link at it (caller holds the lock)"""
+        parent, interval = os.path.split(path)
+        prefix = f".{interval}.v"
+        version_dir = os.path.join(parent, f"{prefix}{time.time_ns()}")
+        os.mkdir(version_dir)
+        for name in COLUMNS:
+            np.save(os.path.join(version_dir, f"{name}.npy"), merged[name].astype(
+                np.int64 if name == "timestamp" else np.float64))
+
+        previous = None
+        if os.path.islink(path):
+            previous = os.path.join(parent, os.readlink(path))
+        elif os.path.isdir(path):
+            # A plain directory cannot be swapped for a link in one rename;
+            # moving it aside leaves the series missing once, for an instant
+            previous = f"{version_dir}.legacy"
+            os.replace(path, previous)
+        link = f"{version_dir}.link"
+        os.symlink(os.path.basename(version_dir), link)
+        os.replace(link, path)
+
+        # Open memory maps keep retired files alive until they are dropped
+        for name in os.listdir(parent):
+            candidate = os.path.join(parent, name)
+            if name.startswith(prefix) and candidate not in (version_dir, previous) and not os.path.islink(candidate):
+                shutil.rmtree(candidate, ignore_errors=True)
+
+    def import_csv(self, symbol: str, interval: str, f: TextIO) -> int:
+        return self.import_columns(symbol, interval, read_csv(f))
+
+    def indicator(self, symbol: str, interval: str, name: str,
+                  params: Optional[Dict] = None) -> Tuple[CandleSeries, Dict[str, np.ndarray]]:
+        """Series plus the named indicator over all of it (cached per series version)"""
+        if name not in INDICATORS:
+            raise CandleDataError(f"Unknown indicator: {name}")
+        function, defaults = INDICATORS[name]
+        params = {**defaults, **{k: v for k, v in (params or {}).items() if k in defaults and v is not None}}
+        series = self.load(symbol, interval)
+        key = (symbol, interval, series.version, name, tuple(sorted(params.items())))
+        return series, self.indicator_cache.get_or_compute(key, lambda: function(series, **params))
+
+    def symbols(self) -> Iterable[Tuple[str, str]]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            (symbol, interval)
+            for symbol in os.listdir(self.root) if SYMBOL_PATTERN.match(symbol)
+            for interval in os.listdir(os.path.join(self.root, symbol)) if INTERVAL_PATTERN.match(interval)
+        )
+
+
+# Global per-process store
+candle_store = CandleStore(settings.candle_store_path)
@@ -0,0 +1,230 @@
+# Consultation reminders: "Our expert will contact you 5 minutes before..."
+"""
+Each booking stores remind_at (UTC). ReminderScheduler keeps the reminders
+due within the next hour in a heap and sleeps until the earliest one, so
+the database is only read on refresh, never scanned per minute:
+
+* the window ahead is loaded in slices, (loaded_until, now + horizon], by
+  range on the partial remind_at index of unsent reminders;
+* bookings made since the last refresh (id above the last seen id) whose
+  reminder falls in the already loaded window are added on top;
+* a sweep of the due window [now - max lateness, now] picks up whatever
+  the heap missed: rescheduled bookings and reminders leased by a worker
+  that died.
+
+Any number of workers may run a scheduler. Before sending, a worker leases
+the due rows (conditional UPDATE on lease expiry); only rows it holds are
+sent, and a sent reminder is marked so it is never sent again. A batch goes
+out over one SMTP connection: one email per client plus one digest for the
+admin.
+"""
+import heapq
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Sequence, Tuple
+from sqlalchemy import func, or_
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.consultation import ConsultationSchedule
+from app.utils.consultation_slots import format_consultation_slot
+from app.utils.email import send_batch
+
+
+def _utcnow() -> datetime:
+    return datetime.utcnow()
+
+
+def build_reminder_email(consultation: ConsultationSchedule) -> Tuple[str, str]:
+    """Subject and body of the reminder sent to the client"""
+    when = format_consultation_slot(consultation.scheduled_date, consultation.scheduled_time)
+    subject = "Reminder: your Wealth Genius consultation is coming up"
+    body = f"""
+Dear {consultation.name},
+
+This is a reminder of your free consultation with Wealth Genius:
+
+📅 Date & Time: {when}
+📱 Phone: {consultation.phone}
+
+Our expert will contact you 5 minutes before the scheduled time. Please keep your phone nearby.
+
+Best regards,
+The Wealth Genius Team
+"""
+    return subject, body
+
+
+def build_reminder_digest_email(consultations: Sequence[ConsultationSchedule]) -> Tuple[str, str]:
+    """Subject and body of the admin digest for one batch of reminders"""
+    lines = [
+        f"• {format_consultation_slot(c.scheduled_date, c.scheduled_time)} - {c.name}, {c.phone}, {c.email}"
+        f" (#{c.id})"
+        for c in sorted(consultations, key=lambda c: (c.scheduled_date, c.scheduled_time, c.id))
+    ]
+    subject = f"Upcoming consultations ({len(consultations)})"
+    body = "Clients have been reminded of these consultations:\n\n" + "\n".join(lines) + "\n"
+    return subject, body
+
+
+class ReminderScheduler:
+    """Timer heap of upcoming reminders plus lease-guarded batched dispatch"""
+
+    def __init__(self, session_factory, owner: Optional[str] = None,
+                 send: Callable[[List[Tuple[str, str, str]]], List[bool]] = send_batch,
+                 clock: Callable[[], datetime] = _utcnow):
+        self.session_factory = session_factory
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.send = send
+        self.clock = clock
+        self._heap: List[Tuple[datetime, int]] = []
+        self._queued = set()
+        self._loaded_until: Optional[datetime] = None
+        self._last_id = 0
+        self._next_refresh: Optional[datetime] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _push(self, rows):
+        for consultation_id, remind_at in rows:
+            if consultation_id not in self._queued:
+                self._queued.add(consultation_id)
+                heapq.heappush(self._heap, (remind_at, consultation_id))
+
+    def refresh(self, db, now: datetime):
+        """Load the next slice of the window ahead, late bookings and the due window"""
+        pending = (ConsultationSchedule.reminder_sent_at.is_(None), ConsultationSchedule.status == "scheduled")
+        columns = (ConsultationSchedule.id, ConsultationSchedule.remind_at)
+        earliest = now - timedelta(minutes=settings.consultation_reminder_max_late_minutes)
+        horizon = now + timedelta(seconds=settings.consultation_reminder_horizon_seconds)
+        loaded_from = max(self._loaded_until or earliest, earliest)
+
+        last_id = db.query(func.max(ConsultationSchedule.id)).scalar() or 0
+        self._push(db.query(*columns).filter(
+            *pending, ConsultationSchedule.remind_at > loaded_from, ConsultationSchedule.remind_at <= horizon
+        ))
+        if last_id > self._last_id:
+            self._push(db.query(*columns).filter(
+                *pending, ConsultationSchedule.id > self._last_id, ConsultationSchedule.id <= last_id,
+                ConsultationSchedule.remind_at > earliest, ConsultationSchedule.remind_at <= loaded_from
+            ))
+        self._push(db.query(*columns).filter(
+            *pending, ConsultationSchedule.remind_at > earliest, ConsultationSchedule.remind_at <= now,
+            or_(ConsultationSchedule.reminder_lease_until.is_(None), ConsultationSchedule.reminder_lease_until < now)
+        ))
+        db.commit()
+        self._loaded_until = horizon
+        self._last_id = last_id
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, consultation_id = heapq.heappop(self._heap)
+            self._queued.discard(consultation_id)
+            due.append(consultation_id)
+        return due
+
+    def lease(self, db, ids: Sequence[int], now: datetime) -> List[ConsultationSchedule]:
+        """Take the due, unsent, unleased reminders among ids; returns the rows now held"""
+        until = now + timedelta(seconds=settings.consultation_reminder_lease_seconds)
+        earliest = now - timedelta(minutes=settings.consultation_reminder_max_late_minutes)
+        db.query(ConsultationSchedule).filter(
+            ConsultationSchedule.id.in_(ids),
+            ConsultationSchedule.reminder_sent_at.is_(None),
+            ConsultationSchedule.status == "scheduled",
+            ConsultationSchedule.remind_at > earliest,
+            ConsultationSchedule.remind_at <= now,
+            or_(ConsultationSchedule.reminder_lease_until.is_(None), ConsultationSchedule.reminder_lease_until < now),
+        ).update({
+            ConsultationSchedule.reminder_lease_owner: self.owner,
+            ConsultationSchedule.reminder_lease_until: until,
+        }, synchronize_session=False)
+        db.commit()
+        return db.query(ConsultationSchedule).filter(
+            ConsultationSchedule.id.in_(ids),
+            ConsultationSchedule.reminder_lease_owner == self.owner,
+            ConsultationSchedule.reminder_lease_until == until,
+            ConsultationSchedule.reminder_sent_at.is_(None),
+        ).all()
+
+    def dispatch(self, db, ids: Sequence[int], now: datetime) -> int:
+        """Lease and send one batch of reminders; returns client reminders sent"""
+        held = self.lease(db, ids, now)
+        if not held:
+            return 0
+        messages = [(c.email, *build_reminder_email(c)) for c in held]
+        messages.append((settings.admin_email, *build_reminder_digest_email(held)))
+        results = self.send(messages)
+        if not results[-1]:
+            print(f"Warning: Failed to send reminder digest for {len(held)} consultations")
+
+        sent = 0
+        for consultation, ok in zip(held, results):
+            if ok:
+                consultation.reminder_sent_at = now
+                sent += 1
+            else:
+                # Released for the next sweep, while it is still timely
+                print(f"Warning: Failed to send consultation reminder to {consultation.email}")
+            consultation.reminder_lease_owner = None
+            consultation.reminder_lease_until = None
+        db.commit()
+        return sent
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """One scheduler step: refresh when due, then dispatch due reminders"""
+        now = now or self.clock()
+        db = self.session_factory()
+        try:
+            if self._next_refresh is None or now >= self._next_refresh:
+                self.refresh(db, now)
+                self._next_refresh = now + timedelta(seconds=settings.consultation_reminder_refresh_seconds)
+            due = self._pop_due(now)
+            sent = 0
+            batch_size = settings.consultation_reminder_batch_size
+            for start in range(0, len(due), batch_size):
+                sent += self.dispatch(db, due[start:start + batch_size], now)
+            return sent
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def seconds_until_next(self, now: datetime) -> float:
+        """Sleep until the earliest reminder or the next refresh"""
+        wake = self._next_refresh or now
+        if self._heap:
+            wake = min(wake, self._heap[0][0])
+        return max((wake - now).total_seconds(), 0.0)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="consultation-reminders", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.tick()
+                delay = self.seconds_until_next(self.clock())
+            except Exception as e:
+                print(f"Error dispatching consultation reminders: {e}")
+                delay = settings.consultation_reminder_refresh_seconds
+            self._stopping.wait(min(delay, settings.consultation_reminder_refresh_seconds))
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# Global per-process scheduler, run by the job worker (or the web process with JOB_RUN_IN_WEB)
+reminder_scheduler = ReminderScheduler(SessionLocal)
@@ -0,0 +1,121 @@
+# Consultation slot grid, availability and booking
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.models.consultation import ConsultationSchedule
+
+
+class SlotUnavailableError(Exception):
+    """The requested slot is off the grid, in the past or too far ahead"""
+
+
+class SlotTakenError(SlotUnavailableError):
+    """Someone else holds the requested slot"""
+
+
+def slot_times() -> List[time]:
+    """Bookable start times of one day, in order"""
+    start = datetime.combine(date.min, time.fromisoformat(settings.consultation_day_start))
+    end = datetime.combine(date.min, time.fromisoformat(settings.consultation_day_end))
+    step = timedelta(minutes=settings.consultation_slot_minutes)
+    times = []
+    while start + step <= end:
+        times.append(start.time())
+        start += step
+    return times
+
+
+def local_now() -> datetime:
+    return datetime.now(ZoneInfo(settings.consultation_timezone)).replace(tzinfo=None)
+
+
+def slot_start_utc(day: date, slot: time) -> datetime:
+    """Naive UTC start of a local slot"""
+    local = datetime.combine(day, slot, tzinfo=ZoneInfo(settings.consultation_timezone))
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def reminder_time(day: date, slot: time) -> datetime:
+    """Naive UTC time the reminder for a slot is due"""
+    return slot_start_utc(day, slot) - timedelta(minutes=settings.consultation_reminder_minutes)
+
+
+def format_consultation_slot(day: date, slot: time) -> str:
+    """Format a booked slot for display, e.g. 'Monday, March 02, 2026 at 11:00 AM'"""
+    return f"{day.strftime('%A, %B %d, %Y')} at {slot.strftime('%I:%M %p')}"
+
+
+def _past_slots_mask(day: date, times: List[time], now: datetime) -> int:
+    if day > now.date():
+        return 0
+    if day < now.date():
+        return (1 << len(times)) - 1
+    mask = 0
+    for index, slot in enumerate(times):
+        if slot <= now.time():
+            mask |= 1 << index
+    return mask
+
+
+def get_availability(db, start: date, end: date, now: Optional[datetime] = None) -> Dict[date, List[time]]:
+    """Open slots per day between start and end (inclusive).
+
+    Booked slots are read with one indexed range query and folded into a
+    per-day bitmap; a set bit means the slot is taken.
+    """
+    now = now or local_now()
+    times = slot_times()
+    index_of = {slot: index for index, slot in enumerate(times)}
+    full = (1 << len(times)) - 1
+
+    booked: Dict[date, int] = {}
+    rows = db.query(ConsultationSchedule.scheduled_date, ConsultationSchedule.scheduled_time).filter(
+        ConsultationSchedule.scheduled_date >= start,
+        ConsultationSchedule.scheduled_date <= end,
+        ConsultationSchedule.status == "scheduled"
+    ).all()
+    for day, slot in rows:
+        index = index_of.get(slot)
+        if index is not None:
+            booked[day] = booked.get(day, 0) | (1 << index)
+
+    availability = {}
+    day = start
+    while day <= end:
+        taken = booked.get(day, 0) | _past_slots_mask(day, times, now)
+        open_bits = full & ~taken
+        availability[day] = [slot for index, slot in enumerate(times) if open_bits >> index & 1]
+        day += timedelta(days=1)
+    return availability
+
+
+def parse_slot(date_str: str, time_str: str, now: Optional[datetime] = None):
+    """Validate a requested YYYY-MM-DD / HH:MM pair against the slot grid"""
+    try:
+        day = date.fromisoformat(date_str)
+        slot = time.fromisoformat(time_str)
+    except ValueError:
+        raise SlotUnavailableError("Invalid date or time format")
+
+    now = now or local_now()
+    if slot not in slot_times():
+        raise SlotUnavailableError("Requested time is not a consultation slot")
+    if datetime.combine(day, slot) <= now:
+        raise SlotUnavailableError("Requested slot is in the past")
+    if day > now.date() + timedelta(days=settings.consultation_booking_days_ahead):
+        raise SlotUnavailableError("Requested date is too far ahead")
+    return day, slot
+
+
+def book_consultation(db, consultation: ConsultationSchedule) -> ConsultationSchedule:
+    """Insert a booking; the partial unique index rejects a taken slot"""
+    db.add(consultation)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise SlotTakenError("This slot has already been booked")
+    db.refresh(consultation)
+    return consultation
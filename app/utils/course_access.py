@@ -0,0 +1,105 @@
+# Course permission checks for instructor write paths
+"""
+Instructors may change their own courses, admins any course.
+
+Granting access always takes one query that checks existence and ownership
+together, so a course deleted or reassigned by another worker is never
+written to on stale information. The ids of the courses each instructor owns
+are cached per worker only to turn away instructors from other people's
+courses without that query. Commits that create, delete or reassign a course
+drop the affected instructors' entries.
+"""
+from typing import FrozenSet
+from fastapi import HTTPException, status
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, attributes
+from app.core.config import settings
+from app.models.course import Course
+from app.models.user import User
+from app.utils.cache import ReportCache
+
+owned_course_cache = ReportCache(
+    ttl_seconds=settings.course_owner_cache_seconds, max_entries=settings.course_owner_cache_entries
+)
+
+
+def _is_admin(user: User) -> bool:
+    return user.role.value == "admin"
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Course not found")
+
+
+def _forbidden() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+
+
+def owned_course_ids(db, instructor_id: int) -> FrozenSet[int]:
+    return owned_course_cache.get_or_compute(instructor_id, lambda: frozenset(
+        db.execute(select(Course.id).where(Course.instructor_id == instructor_id)).scalars()
+    ))
+
+
+def _course_instructor(db, course_id: int, lock: bool = False):
+    query = select(Course.instructor_id).where(Course.id == course_id)
+    if lock:
+        # Keeps the course from being deleted before the caller's insert commits
+        query = query.with_for_update(read=True)
+    return db.execute(query).scalar()
+
+
+def can_edit_course(db, user: User, course_id: int) -> bool:
+    """Whether the user may change the course; False for courses that do not exist"""
+    if not _is_admin(user) and course_id not in owned_course_ids(db, user.id):
+        return False
+    instructor_id = _course_instructor(db, course_id)
+    return instructor_id is not None and (instructor_id == user.id or _is_admin(user))
+
+
+def require_course_access(db, user: User, course_id: int, lock: bool = False) -> None:
+    """404 if the course does not exist, 403 unless the user is its instructor or an admin
+
+    Pass lock=True before inserting rows that reference the course.
+    """
+    instructor_id = _course_instructor(db, course_id, lock)
+    if instructor_id is None:
+        raise _not_found()
+    if instructor_id != user.id and not _is_admin(user):
+        raise _forbidden()
+
+
+def get_course_for_write(db, user: User, course_id: int) -> Course:
+    """Load a course the user may change (the row itself is the existence and ownership check)"""
+    course = db.query(Course).filter(Course.id == course_id).first()
+    if not course:
+        raise _not_found()
+    if course.instructor_id != user.id and not _is_admin(user):
+        raise _forbidden()
+    return course
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_ownership_changes(session, flush_context):
+    changed = session.info.setdefault("course_owner_changes", set())
+    for obj in session.new | session.deleted:
+        if isinstance(obj, Course):
+            changed.add(obj.instructor_id)
+    for obj in session.dirty:
+        if isinstance(obj, Course):
+            history = attributes.get_history(obj, "instructor_id")
+            changed.update(history.added or ())
+            changed.update(history.deleted or ())
+    if not changed:
+        session.info.pop("course_owner_changes")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_owned_courses(session):
+    for instructor_id in session.info.pop("course_owner_changes", ()):
+        owned_course_cache.invalidate(instructor_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_ownership_changes(session):
+    session.info.pop("course_owner_changes", None)
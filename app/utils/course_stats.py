@@ -0,0 +1,201 @@
+# Incrementally maintained course statistics
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, select, insert, delete, update, func
+from sqlalchemy.orm import Session, attributes
+from app.models.course import Course, CourseStats, Lesson
+from app.models.enrollment import Enrollment, EnrollmentStatus
+from app.models.content import Testimonial
+
+# Enrollments in these states count towards a course's enrollment_count
+COUNTED_ENROLLMENT_STATUSES = (EnrollmentStatus.ACTIVE, EnrollmentStatus.COMPLETED)
+
+STAT_COLUMNS = ("enrollment_count", "lesson_count", "rating_sum", "rating_count")
+
+
+def _enrollment_contribution(get) -> Dict[int, Dict[str, int]]:
+    status = get("status") or EnrollmentStatus.ACTIVE
+    if get("course_id") is None or status not in COUNTED_ENROLLMENT_STATUSES:
+        return {}
+    return {get("course_id"): {"enrollment_count": 1}}
+
+
+def _lesson_contribution(get) -> Dict[int, Dict[str, int]]:
+    if get("course_id") is None:
+        return {}
+    return {get("course_id"): {"lesson_count": 1}}
+
+
+def _testimonial_contribution(get) -> Dict[int, Dict[str, int]]:
+    if get("course_id") is None or not get("is_approved") or get("rating") is None:
+        return {}
+    return {get("course_id"): {"rating_sum": get("rating"), "rating_count": 1}}
+
+
+CONTRIBUTIONS = {
+    Enrollment: _enrollment_contribution,
+    Lesson: _lesson_contribution,
+    Testimonial: _testimonial_contribution,
+}
+
+
+# Make the ORM load the previous value on assignment, even for expired
+# instances, so status changes can be turned into exact deltas.
+for _attribute in (
+    Enrollment.status, Enrollment.course_id, Lesson.course_id,
+    Testimonial.course_id, Testimonial.is_approved, Testimonial.rating,
+):
+    event.listen(_attribute, "set", lambda target, value, oldvalue, initiator: value,
+                 active_history=True, retval=True)
+
+
+def _current_value(obj):
+    return lambda key: getattr(obj, key)
+
+
+def _committed_value(obj):
+    """Read attribute values as they were before this flush"""
+    def get(key):
+        history = attributes.get_history(obj, key)
+        if history.deleted:
+            return history.deleted[0]
+        if history.unchanged:
+            return history.unchanged[0]
+        return getattr(obj, key)
+    return get
+
+
+def _add(deltas, contribution, sign: int):
+    for course_id, values in contribution.items():
+        for column, value in values.items():
+            deltas[course_id][column] += sign * value
+
+
+def rebuild_course_stats(db, course_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute course_stats from scratch (all courses, or only course_ids).
+
+    Accepts a Session or Connection; the caller owns the transaction.
+    """
+    enrollments = (
+        select(Enrollment.course_id, func.count().label("n"))
+        .where(Enrollment.status.in_(COUNTED_ENROLLMENT_STATUSES))
+        .group_by(Enrollment.course_id)
+        .subquery()
+    )
+    lessons = (
+        select(Lesson.course_id, func.count().label("n"))
+        .group_by(Lesson.course_id)
+        .subquery()
+    )
+    ratings = (
+        select(
+            Testimonial.course_id,
+            func.sum(Testimonial.rating).label("total"),
+            func.count().label("n"),
+        )
+        .where(Testimonial.is_approved.is_(True), Testimonial.course_id.isnot(None))
+        .group_by(Testimonial.course_id)
+        .subquery()
+    )
+    source = (
+        select(
+            Course.id,
+            func.coalesce(enrollments.c.n, 0),
+            func.coalesce(lessons.c.n, 0),
+            func.coalesce(ratings.c.total, 0),
+            func.coalesce(ratings.c.n, 0),
+        )
+        .outerjoin(enrollments, enrollments.c.course_id == Course.id)
+        .outerjoin(lessons, lessons.c.course_id == Course.id)
+        .outerjoin(ratings, ratings.c.course_id == Course.id)
+    )
+    clear = delete(CourseStats)
+    if course_ids is not None:
+        course_ids = list(course_ids)
+        if not course_ids:
+            return 0
+        source = source.where(Course.id.in_(course_ids))
+        clear = clear.where(CourseStats.course_id.in_(course_ids))
+
+    db.execute(clear)
+    result = db.execute(
+        insert(CourseStats).from_select(["course_id", *STAT_COLUMNS], source)
+    )
+    return result.rowcount
+
+
+@event.listens_for(Session, "after_flush")
+def _update_course_stats(session, flush_context):
+    """Turn inserts, deletes and status changes into counter deltas"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    created_courses = set()
+    deleted_courses = set()
+
+    for obj in session.new:
+        if isinstance(obj, Course):
+            created_courses.add(obj.id)
+        contribution = CONTRIBUTIONS.get(type(obj))
+        if contribution:
+            _add(deltas, contribution(_current_value(obj)), 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Course):
+            deleted_courses.add(obj.id)
+        contribution = CONTRIBUTIONS.get(type(obj))
+        if contribution:
+            _add(deltas, contribution(_committed_value(obj)), -1)
+
+    for obj in session.dirty:
+        contribution = CONTRIBUTIONS.get(type(obj))
+        if contribution and session.is_modified(obj, include_collections=False):
+            _add(deltas, contribution(_committed_value(obj)), -1)
+            _add(deltas, contribution(_current_value(obj)), 1)
+
+    if not deltas and not created_courses:
+        return
+
+    connection = session.connection()
+    missing = set(created_courses)
+    for course_id, values in deltas.items():
+        values = {column: delta for column, delta in values.items() if delta}
+        if not values or course_id in deleted_courses or course_id in missing:
+            continue
+        result = connection.execute(
+            update(CourseStats)
+            .where(CourseStats.course_id == course_id)
+            .values({
+                column: getattr(CourseStats, column) + delta
+                for column, delta in values.items()
+            })
+        )
+        if result.rowcount == 0:
+            # No row yet (course predates the stats table): rebuild it exactly
+            missing.add(course_id)
+
+    if missing:
+        rebuild_course_stats(connection, missing)
+    session.info.setdefault("course_stats_touched", set()).update(set(deltas) | missing)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _expire_course_stats(session, flush_context):
+    """Counters were changed with SQL; refresh any loaded CourseStats rows"""
+    touched = session.info.pop("course_stats_touched", None)
+    if not touched:
+        return
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, CourseStats) and obj.course_id in touched:
+            session.expire(obj)
+
+
+if __name__ == "__main__":
+    # Reconciliation job: python -m app.utils.course_stats
+    from app.database.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_course_stats(db)
+        db.commit()
+        print(f"Rebuilt stats for {rebuilt} courses")
+    finally:
+        db.close()
@@ -0,0 +1,143 @@
+# Direct-to-S3 uploads: the browser sends the bytes, workers only sign URLs
+import math
+import mimetypes
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.models.course import Course, Lesson
+from app.models.user import User
+from app.utils.file_upload import s3_uploader
+from app.utils.images import ImageRejectedError, process_image
+from app.utils.jobs import job
+
+GB = 1024 ** 3
+MB = 1024 ** 2
+MAX_PARTS = 10_000  # S3 limit per multipart upload
+PROCESS_IMAGE_JOB = "uploads.process_image"
+
+VIDEO_TYPES = ("video/mp4", "video/webm", "video/quicktime")
+IMAGE_TYPES = ("image/jpeg", "image/png", "image/webp")
+
+
+class UploadRejectedError(Exception):
+    """The upload request or the uploaded object breaks the target's limits"""
+
+
+@dataclass(frozen=True)
+class UploadTarget:
+    folder: str
+    model: type
+    attribute: str
+    content_types: Tuple[str, ...]
+    max_size: int
+
+
+UPLOAD_TARGETS: Dict[str, UploadTarget] = {
+    "course_video": UploadTarget("course-videos", Course, "video_intro_url", VIDEO_TYPES, 5 * GB),
+    "course_thumbnail": UploadTarget("course-thumbnails", Course, "thumbnail_url", IMAGE_TYPES, 10 * MB),
+    "lesson_video": UploadTarget("lesson-videos", Lesson, "video_url", VIDEO_TYPES, 5 * GB),
+    "user_avatar": UploadTarget("user-avatars", User, "profile_image_url", IMAGE_TYPES, 5 * MB),
+}
+
+
+def key_prefix(target_name: str, entity_id: int) -> str:
+    return f"{UPLOAD_TARGETS[target_name].folder}/{entity_id}/"
+
+
+def check_upload(target: UploadTarget, content_type: str, size: int):
+    if content_type not in target.content_types:
+        raise UploadRejectedError(f"Content type must be one of: {', '.join(target.content_types)}")
+    if size > target.max_size:
+        raise UploadRejectedError(f"File is larger than the {target.max_size // MB} MB limit")
+
+
+def plan_upload(target_name: str, entity_id: int, filename: str, content_type: str, size: int) -> Dict:
+    """Sign a single POST (small files) or a multipart upload (large files)"""
+    if settings.storage_backend != "s3":
+        raise UploadRejectedError("Direct uploads need STORAGE_BACKEND=s3")
+    target = UPLOAD_TARGETS[target_name]
+    check_upload(target, content_type, size)
+
+    extension = os.path.splitext(filename)[1].lower() or mimetypes.guess_extension(content_type) or ""
+    key = f"{key_prefix(target_name, entity_id)}{os.urandom(16).hex()}{extension}"
+    expires_in = settings.upload_url_expires_seconds
+
+    if size <= settings.upload_multipart_threshold_bytes:
+        post = s3_uploader.presigned_post(key, content_type, target.max_size, expires_in)
+        return {
+            "key": key, "method": "POST", "url": post["url"], "fields": post["fields"],
+            "expires_in": expires_in
+        }
+
+    part_size = max(settings.upload_part_size_bytes, math.ceil(size / MAX_PARTS))
+    part_count = math.ceil(size / part_size)
+    upload_id = s3_uploader.create_multipart_upload(key, content_type)
+    urls = s3_uploader.presigned_part_urls(key, upload_id, part_count, expires_in)
+    return {
+        "key": key, "method": "MULTIPART", "upload_id": upload_id, "part_size": part_size,
+        "parts": [{"part_number": number, "url": url} for number, url in enumerate(urls, start=1)],
+        "expires_in": expires_in
+    }
+
+
+def complete_upload(target_name: str, entity_id: int, key: str,
+                    upload_id: Optional[str] = None, parts: Optional[List[Dict]] = None) -> str:
+    """Verify the uploaded object and return its public URL.
+
+    Presigned multipart URLs cannot cap the total size, so the object is
+    checked with HEAD and deleted if it breaks the target's limits. Image
+    variants are left to the PROCESS_IMAGE_JOB job.
+    """
+    target = UPLOAD_TARGETS[target_name]
+    if not key.startswith(key_prefix(target_name, entity_id)):
+        raise UploadRejectedError("Key does not belong to this upload target")
+
+    if upload_id:
+        if not parts:
+            raise UploadRejectedError("Multipart uploads need the ETag of every part")
+        s3_uploader.complete_multipart_upload(key, upload_id, [
+            {"PartNumber": part["part_number"], "ETag": part["etag"]}
+            for part in sorted(parts, key=lambda part: part["part_number"])
+        ])
+
+    head = s3_uploader.head_object(key)
+    if head is None:
+        raise UploadRejectedError("Uploaded file not found")
+    try:
+        check_upload(target, head.get("ContentType", ""), head["ContentLength"])
+    except UploadRejectedError:
+        s3_uploader.delete_file(s3_uploader.public_url(key))
+        raise
+    return s3_uploader.public_url(key)
+
+
+@job(PROCESS_IMAGE_JOB)
+def process_uploaded_image(db, target: str, entity_id: int, key: str):
+    """Move a direct image upload into the variant pipeline and point its row at the result.
+
+    Commits before deleting the raw upload, so a retry after a crash finds
+    the row already moved on and only cleans up.
+    """
+    spec = UPLOAD_TARGETS[target]
+    raw_url = s3_uploader.public_url(key)
+    if s3_uploader.head_object(key) is None:
+        return
+    try:
+        image = process_image(s3_uploader.get_bytes(key), target)
+    except ImageRejectedError as e:
+        print(f"Warning: rejected uploaded image {key}: {e}")
+        image = None
+
+    # Skip rows that have been given another image since this upload
+    entity = db.get(spec.model, entity_id)
+    if entity is not None and getattr(entity, spec.attribute) == raw_url:
+        setattr(entity, spec.attribute, image["url"] if image else None)
+        db.commit()
+    s3_uploader.delete_file(raw_url)
+
+
+def abort_upload(target_name: str, entity_id: int, key: str, upload_id: str):
+    if not key.startswith(key_prefix(target_name, entity_id)):
+        raise UploadRejectedError("Key does not belong to this upload target")
+    s3_uploader.abort_multipart_upload(key, upload_id)
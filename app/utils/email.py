@@ -1,7 +1,13 @@
 import smtplib
+from typing import List, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.core.config import settings
+from app.utils.jobs import enqueue, job
+
+EMAIL_LANE = "email"
+# Sent to the student right after they act; ahead of admin notifications
+CONFIRMATION_PRIORITY = 10
 
 
 def send_email(to_email: str, subject: str, body: str, html_body: str = None):
@@ -33,8 +39,39 @@ def send_email(to_email: str, subject: str, body: str, html_body: str = None):
         return False
 
 
-def send_contact_notification_email(inquiry):
-    """Send notification email for new contact inquiry"""
+def send_batch(messages: List[Tuple[str, str, str]]) -> List[bool]:
+    """Send (to_email, subject, body) messages over one SMTP connection; success per message"""
+    sent = [False] * len(messages)
+    if not messages:
+        return sent
+    try:
+        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
+            server.starttls()
+            server.login(settings.smtp_user, settings.smtp_password)
+            for index, (to_email, subject, body) in enumerate(messages):
+                msg = MIMEText(body, 'plain')
+                msg['Subject'] = subject
+                msg['From'] = settings.smtp_user
+                msg['To'] = to_email
+                try:
+                    server.send_message(msg)
+                    sent[index] = True
+                except smtplib.SMTPRecipientsRefused as e:
+                    print(f"Error sending email to {to_email}: {e}")
+    except Exception as e:
+        print(f"Error sending email batch: {e}")
+    return sent
+
+
+@job("email.send")
+def send_email_job(db, to_email: str, subject: str, body: str, html_body: str = None):
+    """Queued send_email; raising lets the job be retried"""
+    if not send_email(to_email, subject, body, html_body):
+        raise RuntimeError(f"Could not send email to {to_email}")
+
+
+def build_contact_notification_email(inquiry):
+    """Subject and body of the admin notification for a contact inquiry"""
     subject = f"New Contact Inquiry: {inquiry.subject}"
     body = f"""
     New contact inquiry received:
@@ -48,14 +85,11 @@ def send_contact_notification_email(inquiry):
     
     Received at: {inquiry.created_at}
     """
-    
-    # Send to admin email (you can configure this in settings)
-    admin_email = "admin@marketpro.com"  # Configure this
-    return send_email(admin_email, subject, body)
+    return subject, body
 
 
-def send_welcome_email(user):
-    """Send welcome email to new user"""
+def build_welcome_email(user):
+    """Subject and body of the welcome email"""
     subject = "Welcome to Wealth Genius Trading Education Platform"
     body = f"""
     Welcome to Wealth Genius, {user.full_name}!
@@ -71,12 +105,17 @@ def send_welcome_email(user):
     Best regards,
     The Wealth Genius Team
     """
-    
+    return subject, body
+
+
+def send_welcome_email(user):
+    """Send welcome email to new user"""
+    subject, body = build_welcome_email(user)
     return send_email(user.email, subject, body)
 
 
-def send_enrollment_confirmation_email(student_name: str, student_email: str, course_title: str, course_price: str, enrollment_id: int):
-    """Send enrollment confirmation email to student"""
+def build_enrollment_confirmation_email(student_name: str, course_title: str, course_price: str, enrollment_id: int):
+    """Subject, plain text and HTML bodies of the enrollment confirmation"""
     subject = f"Enrollment Confirmation - {course_title} | Wealth Genius"
     
     # Plain text version
@@ -270,5 +309,23 @@ Your Gateway to Financial Success
 </body>
 </html>
 """
-    
-    return send_email(student_email, subject, body, html_body)
\ No newline at end of file
+    return subject, body, html_body
+
+
+def send_enrollment_confirmation_email(student_name: str, student_email: str, course_title: str, course_price: str, enrollment_id: int):
+    """Send enrollment confirmation email to student"""
+    subject, body, html_body = build_enrollment_confirmation_email(
+        student_name, course_title, course_price, enrollment_id
+    )
+    return send_email(student_email, subject, body, html_body)
+
+
+def queue_enrollment_confirmation_email(db, student_name: str, student_email: str, course_title: str,
+                                        course_price: str, enrollment_id: int):
+    """Enqueue the enrollment confirmation in the caller's transaction"""
+    subject, body, html_body = build_enrollment_confirmation_email(
+        student_name, course_title, course_price, enrollment_id
+    )
+    return enqueue(db, "email.send", {
+        "to_email": student_email, "subject": subject, "body": body, "html_body": html_body
+    }, lane=EMAIL_LANE, priority=CONFIRMATION_PRIORITY)
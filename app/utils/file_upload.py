@@ -1,81 +1,180 @@
 import boto3
 import os
-from typing import Optional
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from typing import Dict, List, Optional
 from fastapi import UploadFile
 from app.core.config import settings
+from app.utils.images import ImageRejectedError, process_image
+from app.utils.storage import LocalStorage, Storage, StoredObject
 
 
-class S3Uploader:
+class S3Uploader(Storage):
+    """S3 backend; also signs direct uploads and drives multipart uploads"""
+
     def __init__(self):
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=settings.aws_access_key_id,
             aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region
+            region_name=settings.aws_region,
+            endpoint_url=settings.aws_s3_endpoint_url,
+            # Enough pooled connections for parallel part uploads
+            config=Config(max_pool_connections=max(10, settings.upload_server_concurrency))
         )
         self.bucket_name = settings.aws_s3_bucket
 
-    def upload_file(self, file: UploadFile, folder: str = "uploads") -> Optional[str]:
-        """Upload file to S3 and return the URL"""
-        try:
-            # Generate unique filename
-            file_extension = os.path.splitext(file.filename)[1]
-            unique_filename = f"{folder}/{os.urandom(16).hex()}{file_extension}"
-            
-            # Upload to S3
-            self.s3_client.upload_fileobj(
-                file.file,
-                self.bucket_name,
-                unique_filename,
-                ExtraArgs={
-                    'ContentType': file.content_type,
-                    'ACL': 'public-read'
-                }
+    def public_url(self, key: str) -> str:
+        """Public URL of an object in the bucket"""
+        if settings.aws_s3_endpoint_url:
+            return f"{settings.aws_s3_endpoint_url.rstrip('/')}/{self.bucket_name}/{key}"
+        return f"https://{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/{key}"
+
+    def presigned_post(self, key: str, content_type: str, max_size: int, expires_in: int) -> Dict:
+        """URL and form fields for a browser POST straight to S3.
+
+        S3 itself rejects the upload if the body is larger than max_size or
+        the Content-Type differs from the one signed here.
+        """
+        return self.s3_client.generate_presigned_post(
+            Bucket=self.bucket_name,
+            Key=key,
+            Fields={"Content-Type": content_type, "acl": "public-read"},
+            Conditions=[
+                {"Content-Type": content_type},
+                {"acl": "public-read"},
+                ["content-length-range", 1, max_size],
+            ],
+            ExpiresIn=expires_in
+        )
+
+    def create_multipart_upload(self, key: str, content_type: str) -> str:
+        response = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket_name, Key=key, ContentType=content_type, ACL='public-read'
+        )
+        return response["UploadId"]
+
+    def presigned_part_urls(self, key: str, upload_id: str, part_count: int, expires_in: int) -> List[str]:
+        """One presigned PUT URL per part, in part-number order (1-based)"""
+        return [
+            self.s3_client.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": self.bucket_name, "Key": key, "UploadId": upload_id, "PartNumber": number},
+                ExpiresIn=expires_in
             )
-            
-            # Return the public URL
-            return f"https://{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/{unique_filename}"
-        
-        except Exception as e:
-            print(f"Error uploading file to S3: {e}")
-            return None
+            for number in range(1, part_count + 1)
+        ]
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict]):
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        self.s3_client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str, cache_control: Optional[str] = None):
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        self.s3_client.put_object(
+            Bucket=self.bucket_name, Key=key, Body=data, ContentType=content_type, ACL='public-read', **extra
+        )
 
-    def delete_file(self, file_url: str) -> bool:
-        """Delete file from S3"""
+    def get_bytes(self, key: str) -> bytes:
+        return self.s3_client.get_object(Bucket=self.bucket_name, Key=key)["Body"].read()
+
+    def head_object(self, key: str) -> Optional[Dict]:
+        """Object metadata, or None if the object does not exist"""
         try:
-            # Extract key from URL
-            key = file_url.split(f"{self.bucket_name}.s3.{settings.aws_region}.amazonaws.com/")[1]
-            
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=key
-            )
-            return True
-        
-        except Exception as e:
-            print(f"Error deleting file from S3: {e}")
-            return False
+            return self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError:
+            return None
+
+    def save(self, key: str, fileobj, content_type: str, cache_control: Optional[str] = None):
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        self.s3_client.upload_fileobj(
+            fileobj, self.bucket_name, key,
+            ExtraArgs={'ContentType': content_type, 'ACL': 'public-read', **extra}
+        )
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        head = self.head_object(key)
+        if head is None:
+            return None
+        return StoredObject(head["ContentLength"], head.get("ContentType", "application/octet-stream"))
+
+    def delete(self, key: str):
+        self.s3_client.delete_object(Bucket=self.bucket_name, Key=key)
 
 
 # Global S3 uploader instance
 s3_uploader = S3Uploader()
 
+# Backend for everything stored or served as media
+storage: Storage = (
+    LocalStorage(settings.media_root, settings.media_url) if settings.storage_backend == "local" else s3_uploader
+)
+
 
-def upload_course_thumbnail(file: UploadFile) -> Optional[str]:
-    """Upload course thumbnail image"""
-    return s3_uploader.upload_file(file, "course-thumbnails")
+def upload_course_thumbnail(file: UploadFile) -> Optional[Dict]:
+    """Upload course thumbnail image with resized variants ({"url", "srcset"})"""
+    return _upload_image(file, "course_thumbnail")
 
 
 def upload_course_video(file: UploadFile) -> Optional[str]:
-    """Upload course video file"""
-    return s3_uploader.upload_file(file, "course-videos")
+    """Upload course video file (a parallel multipart upload on S3)"""
+    from app.utils.multipart_upload import MultipartUploader, MultipartUploadError
+
+    if storage is not s3_uploader:
+        return storage.upload_file(file, "course-videos")
+
+    key = f"course-videos/{os.urandom(16).hex()}{os.path.splitext(file.filename)[1]}"
+    size = getattr(file, "size", None)
+    uploader = MultipartUploader()
+    try:
+        return uploader.upload(file.file, key, file.content_type, size=size).url
+    except MultipartUploadError as e:
+        print(f"Warning: Resuming video upload {key} after: {e}")
+        state = e.state
+    except Exception as e:
+        # Anything but a failed part has already aborted the upload
+        print(f"Error uploading video to S3: {e}")
+        return None
+
+    # One more pass over the spooled file, re-sending only the missing parts
+    file.file.seek(0)
+    try:
+        return uploader.resume(file.file, state, size=size).url
+    except MultipartUploadError as e:
+        print(f"Error uploading video to S3: {e}")
+    except Exception as e:
+        print(f"Error uploading video to S3: {e}")
+        return None
+    # Otherwise S3 keeps (and bills) the uploaded parts indefinitely
+    try:
+        uploader.abort(state)
+    except Exception as e:
+        print(f"Error aborting video upload {key}: {e}")
+    return None
+
+
+def upload_user_avatar(file: UploadFile) -> Optional[Dict]:
+    """Upload user profile avatar with resized variants ({"url", "srcset"})"""
+    return _upload_image(file, "user_avatar")
 
 
-def upload_user_avatar(file: UploadFile) -> Optional[str]:
-    """Upload user profile avatar"""
-    return s3_uploader.upload_file(file, "user-avatars")
+def _upload_image(file: UploadFile, kind: str) -> Optional[Dict]:
+    try:
+        return process_image(file.file.read(), kind)
+    except ImageRejectedError:
+        raise
+    except Exception as e:
+        print(f"Error uploading image: {e}")
+        return None
 
 
 def upload_lesson_material(file: UploadFile) -> Optional[str]:
     """Upload lesson material file"""
-    return s3_uploader.upload_file(file, "lesson-materials")
+    return storage.upload_file(file, "lesson-materials")
@@ -0,0 +1,144 @@
+# Image variants for course thumbnails and avatars
+"""
+Uploaded images are stored content-addressed:
+
+    course-thumbnails/<sha256>/original.jpg
+    course-thumbnails/<sha256>/w320.webp, w320.jpg, w640.webp, ...
+
+Because variant keys follow from the original's URL, srcset strings can be
+built from Course.thumbnail_url / User.profile_image_url without extra
+columns, and re-uploading the same image is a no-op. Resizing and encoding
+run in a process pool so they neither hold the GIL in the web worker nor
+block other requests.
+"""
+import hashlib
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageOps, UnidentifiedImageError
+from app.core.config import settings
+
+ORIGINAL_NAME = "original"
+# extension -> (Pillow format, content type)
+VARIANT_FORMATS = {"webp": ("WEBP", "image/webp"), "jpg": ("JPEG", "image/jpeg")}
+ORIGINAL_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ImageRejectedError(Exception):
+    """The upload is not an image we accept"""
+
+
+@dataclass(frozen=True)
+class ImageSpec:
+    folder: str
+    widths: Tuple[int, ...]
+    square: bool
+
+
+IMAGE_SPECS: Dict[str, ImageSpec] = {
+    "course_thumbnail": ImageSpec("course-thumbnails", (320, 640, 1280), square=False),
+    "user_avatar": ImageSpec("user-avatars", (64, 128, 256), square=True),
+}
+
+
+def render_variants(data: bytes, widths: Tuple[int, ...], square: bool,
+                    extensions: Tuple[str, ...]) -> List[Tuple[int, str, bytes]]:
+    """Resize and encode one image; runs in a pool worker process"""
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+    variants = []
+    for width in widths:
+        if square:
+            resized = ImageOps.fit(image, (width, width), Image.LANCZOS)
+        elif image.width > width:
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        else:
+            resized = image  # never upscale
+        for extension in extensions:
+            pil_format, _ = VARIANT_FORMATS[extension]
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, quality=82, optimize=True)
+            variants.append((width, extension, buffer.getvalue()))
+    return variants
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def image_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the web worker has threads (flushers, threadpool)
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.image_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_image_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+def variant_key(base: str, width: int, extension: str) -> str:
+    return f"{base}/w{width}.{extension}"
+
+
+def image_srcset(url: Optional[str], kind: str) -> Optional[Dict[str, str]]:
+    """srcset per format for an image stored by this pipeline, else None"""
+    if not url:
+        return None
+    base, _, name = url.rpartition("/")
+    if not name.startswith(f"{ORIGINAL_NAME}."):
+        return None
+    widths = IMAGE_SPECS[kind].widths
+    return {
+        extension: ", ".join(f"{variant_key(base, width, extension)} {width}w" for width in widths)
+        for extension in VARIANT_FORMATS
+    }
+
+
+def inspect_image(data: bytes) -> str:
+    """File extension for the original, rejecting anything Pillow cannot read"""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+            image_format = image.format
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+        raise ImageRejectedError("File is not a supported image")
+    if image_format not in ORIGINAL_FORMATS:
+        raise ImageRejectedError("Image must be JPEG, PNG or WebP")
+    return ORIGINAL_FORMATS[image_format]
+
+
+def process_image(data: bytes, kind: str) -> Dict:
+    """Store the original and any missing variants; returns url and srcset"""
+    # Imported here so pool workers, which only need render_variants, skip storage setup
+    from app.utils.file_upload import storage
+
+    spec = IMAGE_SPECS[kind]
+    extension = inspect_image(data)
+    base = f"{spec.folder}/{hashlib.sha256(data).hexdigest()}"
+    original_key = f"{base}/{ORIGINAL_NAME}.{extension}"
+
+    if storage.stat(original_key) is None:
+        storage.put_bytes(original_key, data, f"image/{'jpeg' if extension == 'jpg' else extension}",
+                          cache_control=CACHE_CONTROL)
+
+    missing = tuple(
+        width for width in spec.widths
+        if any(storage.stat(variant_key(base, width, ext)) is None for ext in VARIANT_FORMATS)
+    )
+    if missing:
+        future = image_pool().submit(render_variants, data, missing, spec.square, tuple(VARIANT_FORMATS))
+        for width, ext, body in future.result():
+            storage.put_bytes(variant_key(base, width, ext), body, VARIANT_FORMATS[ext][1],
+                              cache_control=CACHE_CONTROL)
+
+    url = storage.public_url(original_key)
+    return {"url": url, "srcset": image_srcset(url, kind), "generated": len(missing)}
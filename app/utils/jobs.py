@@ -0,0 +1,252 @@
+# Background jobs on a database-backed queue
+"""
+Request handlers only enqueue: enqueue() adds a row to the jobs table as
+part of the caller's transaction, so a job exists exactly when the data it
+refers to was committed. Slow work (SMTP, password hashing, ...) then runs
+in the worker process (`python -m app.worker`, the Procfile's `worker`).
+
+Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL, so
+any number of them take disjoint jobs without blocking each other. SQLite
+ignores the row lock; there the conditional UPDATE (status still
+'queued') decides which worker won a job.
+
+A job is scheduled with run_at (enqueue(..., delay=...) for delayed jobs),
+ordered by priority within the lanes a worker serves, and retried with
+exponential backoff until max_attempts. Handlers run in the same session
+as the job's completion, so writes they leave uncommitted commit together
+with "done". Handlers that commit themselves (payments.apply_events commits
+per batch) must be safe to re-run: a crash before "done" retries the job.
+"""
+import json
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Optional
+from prometheus_client import Counter, Histogram
+from app.core.config import settings
+from app.database.database import SessionLocal
+from app.models.job import Job
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+DEFAULT_LANE = "default"
+# Jobs looked at per claim; only matters when SQLite workers race for the first one
+CLAIM_CANDIDATES = 5
+
+JOB_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+JOB_QUEUE_DELAY = Histogram(
+    "job_queue_delay_seconds",
+    "Time from a job becoming due (run_at) to a worker starting it",
+    ["job", "lane"],
+    buckets=JOB_BUCKETS,
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Job run time by outcome",
+    ["job", "outcome"],
+    buckets=JOB_BUCKETS,
+)
+JOBS_FINISHED = Counter(
+    "jobs_finished",
+    "Job runs by outcome (done, retry, failed)",
+    ["job", "outcome"],
+)
+
+# name -> handler(db, **payload)
+HANDLERS: Dict[str, Callable] = {}
+
+
+class JobError(Exception):
+    """Unknown job name or a payload that is not JSON serializable"""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def job(name: str):
+    """Register a handler for jobs called `name`; it is called as handler(db, **payload)"""
+    def register(handler: Callable) -> Callable:
+        HANDLERS[name] = handler
+        return handler
+    return register
+
+
+def enqueue(db, name: str, payload: Optional[Dict] = None, *, lane: str = DEFAULT_LANE, priority: int = 0,
+            delay: Optional[timedelta] = None, run_at: Optional[datetime] = None,
+            max_attempts: Optional[int] = None) -> Job:
+    """Add a job to the caller's transaction; it is only queued once the caller commits"""
+    if name not in HANDLERS:
+        raise JobError(f"No handler registered for job {name}")
+    try:
+        body = json.dumps(payload or {})
+    except TypeError as e:
+        raise JobError(f"Payload of job {name} is not JSON serializable: {e}")
+    if run_at is None:
+        run_at = _utcnow() + (delay or timedelta(0))
+    new_job = Job(
+        name=name, payload=body, lane=lane, priority=priority, status=QUEUED, attempts=0,
+        max_attempts=max_attempts or settings.job_max_attempts, run_at=run_at,
+    )
+    db.add(new_job)
+    db.flush()
+    return new_job
+
+
+def claim(db, worker_id: str, lanes: Optional[Iterable[str]] = None) -> Optional[Job]:
+    """Take the most urgent due job (committed as running); None if there is none"""
+    now = _utcnow()
+    query = db.query(Job.id).filter(Job.status == QUEUED, Job.run_at <= now)
+    if lanes:
+        query = query.filter(Job.lane.in_(list(lanes)))
+    candidates = query.order_by(Job.priority.desc(), Job.run_at, Job.id).limit(
+        CLAIM_CANDIDATES
+    ).with_for_update(skip_locked=True).all()
+    for (job_id,) in candidates:
+        taken = db.query(Job).filter(Job.id == job_id, Job.status == QUEUED).update(
+            {Job.status: RUNNING, Job.locked_by: worker_id, Job.locked_at: now, Job.attempts: Job.attempts + 1},
+            synchronize_session=False,
+        )
+        if taken:
+            db.commit()
+            return db.get(Job, job_id)
+    db.commit()
+    return None
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before retry number `attempts`: exponential, capped, with jitter"""
+    delay = min(settings.job_retry_base_seconds * 2 ** max(attempts - 1, 0), settings.job_retry_max_seconds)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _record_failure(current: Job, error: str):
+    now = _utcnow()
+    current.last_error = error[:2000]
+    current.locked_by = None
+    current.locked_at = None
+    if current.attempts >= current.max_attempts:
+        current.status = FAILED
+        current.finished_at = now
+    else:
+        current.status = QUEUED
+        current.run_at = now + timedelta(seconds=retry_delay(current.attempts))
+
+
+def execute(db, current: Job) -> str:
+    """Run a claimed job and record the outcome: 'done', 'retry' or 'failed'"""
+    name, job_id = current.name, current.id
+    JOB_QUEUE_DELAY.labels(name, current.lane).observe(
+        max((current.locked_at - current.run_at).total_seconds(), 0.0)
+    )
+    started = time.perf_counter()
+    try:
+        handler = HANDLERS.get(name)
+        if handler is None:
+            raise JobError(f"No handler registered for job {name}")
+        handler(db, **json.loads(current.payload))
+    except Exception as e:
+        db.rollback()
+        print(f"Error running job {name} #{job_id}: {e}")
+        current = db.get(Job, job_id)
+        _record_failure(current, f"{type(e).__name__}: {e}")
+        outcome = "failed" if current.status == FAILED else "retry"
+    else:
+        current.status = DONE
+        current.finished_at = _utcnow()
+        current.last_error = None
+        outcome = "done"
+    db.commit()
+    JOB_DURATION.labels(name, outcome).observe(time.perf_counter() - started)
+    JOBS_FINISHED.labels(name, outcome).inc()
+    return outcome
+
+
+def requeue_stale(db, timeout_seconds: Optional[float] = None) -> int:
+    """Put back jobs whose worker died mid-run (running longer than the lock timeout)"""
+    timeout_seconds = settings.job_lock_timeout_seconds if timeout_seconds is None else timeout_seconds
+    now = _utcnow()
+    stale = db.query(Job).filter(
+        Job.status == RUNNING, Job.locked_at < now - timedelta(seconds=timeout_seconds)
+    ).with_for_update(skip_locked=True).all()
+    for current in stale:
+        _record_failure(current, f"Worker {current.locked_by} did not finish the job")
+    db.commit()
+    return len(stale)
+
+
+class JobWorker:
+    """Threads claiming and running jobs from some lanes (all lanes if None)"""
+
+    def __init__(self, session_factory, lanes: Optional[Iterable[str]] = None, concurrency: int = 1,
+                 poll_interval_seconds: float = 1.0):
+        self.session_factory = session_factory
+        self.lanes = list(lanes) if lanes else None
+        self.concurrency = concurrency
+        self.poll_interval_seconds = poll_interval_seconds
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self._run, args=(index,), name=f"jobs-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def run_once(self, worker_id: Optional[str] = None) -> Optional[str]:
+        """Claim and run one job; its outcome, or None if nothing was due"""
+        db = self.session_factory()
+        try:
+            current = claim(db, worker_id or self.name, self.lanes)
+            return execute(db, current) if current is not None else None
+        finally:
+            db.close()
+
+    def drain(self) -> int:
+        """Run due jobs until none is left; returns jobs run"""
+        count = 0
+        while not self._stopping.is_set() and self.run_once() is not None:
+            count += 1
+        return count
+
+    def _requeue_stale(self):
+        db = self.session_factory()
+        try:
+            requeue_stale(db)
+        finally:
+            db.close()
+
+    def _run(self, index: int):
+        worker_id = f"{self.name}:{index}"
+        next_stale_check = 0.0
+        while not self._stopping.is_set():
+            try:
+                if index == 0 and time.monotonic() >= next_stale_check:
+                    self._requeue_stale()
+                    next_stale_check = time.monotonic() + settings.job_lock_timeout_seconds / 4
+                if self.run_once(worker_id) is not None:
+                    continue
+            except Exception as e:
+                print(f"Error in job worker {worker_id}: {e}")
+            self._stopping.wait(self.poll_interval_seconds)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Let running jobs finish, then stop the threads"""
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+# Global per-process worker, started in the web process only with JOB_RUN_IN_WEB
+job_worker = JobWorker(
+    SessionLocal, concurrency=settings.job_worker_concurrency,
+    poll_interval_seconds=settings.job_poll_interval_seconds,
+)
@@ -0,0 +1,249 @@
+# Live quotes: one upstream feed fanned out to many clients
+"""
+MarketDataHub owns the upstream feed (Angel One SmartAPI, or a replay of
+recorded ticks for local work and tests) and keeps subscriptions
+coalesced: however many clients watch a symbol, it is subscribed upstream
+once, and it is unsubscribed when the last of them leaves.
+
+The last tick per symbol lives in TickCache, parallel numpy arrays indexed
+by a symbol -> slot dict, so new clients get a snapshot immediately.
+Each client's Subscription keeps only the latest pending tick per symbol,
+so a slow client gets fresher data instead of an ever-growing queue.
+
+Everything runs on the event loop of the process; there is one upstream
+session per process. Deployments therefore run the feed in a separate
+single-worker service, the only one with MARKET_FEED set, and the other
+processes redirect the market endpoints to it (MARKET_SERVICE_URL).
+"""
+import asyncio
+import csv
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+import numpy as np
+from app.core.config import settings
+
+TickCallback = Callable[[str, float, int], None]
+
+
+class Tick(NamedTuple):
+    symbol: str
+    ltp: float
+    timestamp_ms: int
+
+
+class MarketDataUnavailableError(Exception):
+    """No market data feed is configured"""
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class TickCache:
+    """Last traded price and time per symbol in growable numpy arrays"""
+
+    def __init__(self, capacity: int = 256):
+        self._slots: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._ltp = np.full(capacity, np.nan)
+        self._timestamp_ms = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def _slot(self, symbol: str) -> int:
+        slot = self._slots.get(symbol)
+        if slot is None:
+            slot = len(self._symbols)
+            if slot == len(self._ltp):
+                self._ltp = np.concatenate([self._ltp, np.full(slot, np.nan)])
+                self._timestamp_ms = np.concatenate([self._timestamp_ms, np.zeros(slot, dtype=np.int64)])
+            self._slots[symbol] = slot
+            self._symbols.append(symbol)
+        return slot
+
+    def update(self, symbol: str, ltp: float, timestamp_ms: int) -> bool:
+        """Store a tick; False (and ignored) if it is older than the cached one"""
+        slot = self._slot(symbol)
+        if timestamp_ms < self._timestamp_ms[slot]:
+            return False
+        self._ltp[slot] = ltp
+        self._timestamp_ms[slot] = timestamp_ms
+        return True
+
+    def get(self, symbol: str) -> Optional[Tick]:
+        slot = self._slots.get(symbol)
+        if slot is None or np.isnan(self._ltp[slot]):
+            return None
+        return Tick(symbol, float(self._ltp[slot]), int(self._timestamp_ms[slot]))
+
+    def snapshot(self, symbols: Iterable[str]) -> List[Tick]:
+        return [tick for tick in map(self.get, symbols) if tick is not None]
+
+
+class Subscription:
+    """One client's view of the hub: latest pending tick per symbol"""
+
+    def __init__(self):
+        self.symbols: Set[str] = set()
+        self._pending: Dict[str, Tick] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, tick: Tick):
+        self._pending[tick.symbol] = tick
+        self._ready.set()
+
+    async def next_batch(self) -> List[Tick]:
+        """Wait for ticks, then take everything pending (one tick per symbol)"""
+        await self._ready.wait()
+        self._ready.clear()
+        ticks, self._pending = list(self._pending.values()), {}
+        return ticks
+
+
+class MarketFeed(ABC):
+    """Upstream connection; run() reconnects are driven by the hub"""
+
+    def __init__(self):
+        self.symbols: Set[str] = set()
+
+    def subscribe(self, symbols: Set[str]):
+        self.symbols |= symbols
+
+    def unsubscribe(self, symbols: Set[str]):
+        self.symbols -= symbols
+
+    @abstractmethod
+    async def run(self, on_tick: TickCallback):
+        """Connect, subscribe to self.symbols and deliver ticks until disconnected"""
+
+
+class ReplayFeed(MarketFeed):
+    """Stand-in feed replaying recorded (timestamp_ms, symbol, ltp) rows in a loop.
+
+    Gaps between rows are kept (divided by speed); ticks are stamped with
+    the current time so replayed quotes look live.
+    """
+
+    def __init__(self, rows: List[tuple], speed: float = 1.0, repeat: bool = True):
+        super().__init__()
+        self.rows = sorted(rows)
+        self.speed = speed
+        self.repeat = repeat
+
+    @classmethod
+    def from_csv(cls, path: str, speed: float = 1.0) -> "ReplayFeed":
+        with open(path, newline="") as f:
+            rows = [(int(row["timestamp_ms"]), row["symbol"], float(row["ltp"])) for row in csv.DictReader(f)]
+        return cls(rows, speed)
+
+    async def run(self, on_tick: TickCallback):
+        while True:
+            previous = None
+            for timestamp_ms, symbol, ltp in self.rows:
+                if previous is not None and self.speed > 0:
+                    await asyncio.sleep((timestamp_ms - previous) / 1000 / self.speed)
+                else:
+                    await asyncio.sleep(0)
+                previous = timestamp_ms
+                if symbol in self.symbols:
+                    on_tick(symbol, ltp, _now_ms())
+            if not self.repeat:
+                await asyncio.Event().wait()  # stay "connected" with no more ticks
+
+
+def create_feed() -> MarketFeed:
+    if settings.market_feed == "replay":
+        return ReplayFeed.from_csv(settings.market_replay_path, settings.market_replay_speed)
+    if settings.market_feed == "angel":
+        from app.utils.angel_one import AngelOneFeed
+        return AngelOneFeed()
+    raise MarketDataUnavailableError("Live market data is not configured")
+
+
+class MarketDataHub:
+    def __init__(self, feed_factory: Callable[[], MarketFeed] = create_feed):
+        self.feed_factory = feed_factory
+        self.cache = TickCache()
+        self.feed: Optional[MarketFeed] = None
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def upstream_symbols(self) -> Set[str]:
+        return set(self._subscribers)
+
+    def subscribe(self, subscription: Subscription, symbols: Iterable[str]):
+        """Add symbols to a subscription; cached ticks are pushed right away"""
+        self._ensure_running()
+        new = set()
+        for symbol in set(symbols) - subscription.symbols:
+            subscribers = self._subscribers.setdefault(symbol, set())
+            if not subscribers:
+                new.add(symbol)
+            subscribers.add(subscription)
+            subscription.symbols.add(symbol)
+            tick = self.cache.get(symbol)
+            if tick is not None:
+                subscription.push(tick)
+        if new:
+            self.feed.subscribe(new)
+
+    def unsubscribe(self, subscription: Subscription, symbols: Iterable[str]):
+        gone = set()
+        for symbol in set(symbols) & subscription.symbols:
+            subscription.symbols.discard(symbol)
+            subscribers = self._subscribers.get(symbol)
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[symbol]
+                gone.add(symbol)
+        if gone and self.feed is not None:
+            self.feed.unsubscribe(gone)
+
+    def release(self, subscription: Subscription):
+        self.unsubscribe(subscription, list(subscription.symbols))
+
+    def _on_tick(self, symbol: str, ltp: float, timestamp_ms: int):
+        if not self.cache.update(symbol, ltp, timestamp_ms):
+            return
+        tick = Tick(symbol, ltp, timestamp_ms)
+        for subscription in self._subscribers.get(symbol, ()):
+            subscription.push(tick)
+
+    def _ensure_running(self):
+        if self._task is not None and not self._task.done():
+            return
+        if self.feed is None:
+            self.feed = self.feed_factory()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        backoff = 1
+        while True:
+            started = time.monotonic()
+            try:
+                await self.feed.run(self._on_tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in market data feed: {e}")
+            # Reset the backoff after a connection that stayed up a while
+            if time.monotonic() - started > 60:
+                backoff = 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global per-process hub
+market_hub = MarketDataHub()
@@ -0,0 +1,193 @@
+# Server-side streaming multipart uploads to S3
+"""
+Reads the source once, in order, and uploads parts concurrently from a
+thread pool. At most `concurrency` parts are held in memory, so a 2GB
+video never sits in a worker's RAM.
+
+Each part carries a Content-MD5 so S3 rejects corrupted parts. Failed parts
+are retried; if a part keeps failing the upload is left open and
+MultipartUploadError carries the state needed to resume() it later,
+skipping parts S3 already has. Any other failure aborts the upload so S3
+does not keep its parts.
+"""
+import base64
+import hashlib
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, Optional
+from app.core.config import settings
+from app.utils.file_upload import s3_uploader
+
+MB = 1024 * 1024
+MIN_PART_SIZE = 5 * MB  # S3 minimum for every part but the last
+MAX_PARTS = 10_000
+
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+@dataclass
+class MultipartUploadState:
+    key: str
+    upload_id: str
+    part_size: int
+    # part number -> ETag of parts S3 has accepted
+    completed: Dict[int, str] = field(default_factory=dict)
+
+
+@dataclass
+class MultipartUploadResult:
+    key: str
+    url: str
+    size: int
+    parts: int
+
+
+class MultipartUploadError(Exception):
+    """A part failed after all retries; `state` can be passed to resume()"""
+
+    def __init__(self, message: str, state: MultipartUploadState):
+        super().__init__(message)
+        self.state = state
+
+
+def choose_part_size(size: Optional[int]) -> int:
+    """Smallest configured part size that keeps the file within S3's part limit"""
+    part_size = max(settings.upload_server_part_size_bytes, MIN_PART_SIZE)
+    if size:
+        part_size = max(part_size, math.ceil(size / MAX_PARTS))
+    return part_size
+
+
+class MultipartUploader:
+    """Parallel streaming uploader; `progress(bytes_done, total)` is called from worker threads"""
+
+    def __init__(self, uploader=s3_uploader, concurrency: Optional[int] = None, retries: int = 3,
+                 backoff: float = 0.5, progress: Optional[ProgressCallback] = None):
+        self.uploader = uploader
+        self.concurrency = concurrency or settings.upload_server_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.progress = progress
+        self._progress_lock = threading.Lock()
+        self._bytes_done = 0
+
+    def upload(self, fileobj: BinaryIO, key: str, content_type: str,
+               size: Optional[int] = None) -> MultipartUploadResult:
+        """Stream fileobj to S3 as a new multipart upload"""
+        upload_id = self.uploader.create_multipart_upload(key, content_type)
+        state = MultipartUploadState(key, upload_id, choose_part_size(size))
+        with self._abort_on_error(state):
+            return self._run(fileobj, state, size)
+
+    def resume(self, fileobj: BinaryIO, state: MultipartUploadState,
+               size: Optional[int] = None) -> MultipartUploadResult:
+        """Finish an upload from the start of the same source, skipping parts S3 already has"""
+        with self._abort_on_error(state):
+            listed = self.uploader.s3_client.list_parts(
+                Bucket=self.uploader.bucket_name, Key=state.key, UploadId=state.upload_id
+            )
+            state.completed = {part["PartNumber"]: part["ETag"] for part in listed.get("Parts", [])}
+            return self._run(fileobj, state, size)
+
+    def abort(self, state: MultipartUploadState):
+        self.uploader.abort_multipart_upload(state.key, state.upload_id)
+
+    @contextmanager
+    def _abort_on_error(self, state: MultipartUploadState):
+        """Abort on any failure but a failed part, which stays resumable"""
+        try:
+            yield
+        except MultipartUploadError:
+            raise
+        except BaseException:
+            try:
+                self.abort(state)
+            except Exception as e:
+                print(f"Error aborting multipart upload {state.key}: {e}")
+            raise
+
+    def _run(self, fileobj, state: MultipartUploadState, size: Optional[int]) -> MultipartUploadResult:
+        self._bytes_done = 0
+        total = 0
+        part_number = 0
+        failed = None
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="s3-part") as pool:
+            pending = {}
+            while True:
+                chunk = fileobj.read(state.part_size)
+                if not chunk:
+                    break
+                part_number += 1
+                total += len(chunk)
+
+                if part_number in state.completed and state.completed[part_number].strip('"') == _md5_hex(chunk):
+                    self._report(len(chunk), size)
+                    continue
+
+                # Bound memory: wait for a slot before reading further
+                while len(pending) >= self.concurrency:
+                    failed = self._collect(pending, state) or failed
+                if failed:
+                    break
+                pending[pool.submit(self._upload_part, state, part_number, chunk, size)] = part_number
+
+            while pending:
+                failed = self._collect(pending, state) or failed
+
+        if failed:
+            raise MultipartUploadError(f"Part {failed[0]} failed: {failed[1]}", state)
+        if part_number == 0:
+            raise ValueError("Cannot upload an empty file")
+
+        self.uploader.complete_multipart_upload(state.key, state.upload_id, [
+            {"PartNumber": number, "ETag": state.completed[number]}
+            for number in range(1, part_number + 1)
+        ])
+        return MultipartUploadResult(
+            key=state.key, url=self.uploader.public_url(state.key), size=total, parts=part_number
+        )
+
+    def _collect(self, pending, state):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        failed = None
+        for future in done:
+            number = pending.pop(future)
+            try:
+                state.completed[number] = future.result()
+            except Exception as e:
+                failed = (number, e)
+        return failed
+
+    def _upload_part(self, state: MultipartUploadState, part_number: int, chunk: bytes,
+                     size: Optional[int]) -> str:
+        content_md5 = base64.b64encode(hashlib.md5(chunk).digest()).decode()
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.uploader.s3_client.upload_part(
+                    Bucket=self.uploader.bucket_name, Key=state.key, UploadId=state.upload_id,
+                    PartNumber=part_number, Body=chunk, ContentMD5=content_md5
+                )
+                break
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(min(2 ** attempt * self.backoff, 8))
+        self._report(len(chunk), size)
+        return response["ETag"]
+
+    def _report(self, nbytes: int, size: Optional[int]):
+        if self.progress is None:
+            return
+        with self._progress_lock:
+            self._bytes_done += nbytes
+            done = self._bytes_done
+        self.progress(done, size)
+
+
+def _md5_hex(chunk: bytes) -> str:
+    return hashlib.md5(chunk).hexdigest()
@@ -0,0 +1,75 @@
+# Admin notifications batched into digest emails
+"""
+notify_admin() stores the notification in the caller's transaction instead
+of emailing right away. The first notification of a quiet period schedules
+one digest job ADMIN_DIGEST_WINDOW_SECONDS ahead; everything that arrives
+until it runs goes out in the same email, so a burst of inquiries costs one
+SMTP session instead of hundreds.
+
+Urgent notifications (e.g. a consultation starting soon) schedule the digest
+for right away at high priority; whatever else is buffered rides along.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Tuple
+from app.core.config import settings
+from app.models.job import Job
+from app.models.notification import AdminNotification
+from app.utils.email import EMAIL_LANE, send_email
+from app.utils.jobs import QUEUED, enqueue, job
+
+DIGEST_JOB = "notifications.admin_digest"
+URGENT_PRIORITY = 20
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def notify_admin(db, kind: str, subject: str, body: str, urgent: bool = False) -> AdminNotification:
+    """Buffer an admin notification for the next digest (part of the caller's transaction)"""
+    notification = AdminNotification(kind=kind, subject=subject, body=body, urgent=urgent)
+    db.add(notification)
+    if urgent:
+        enqueue(db, DIGEST_JOB, lane=EMAIL_LANE, priority=URGENT_PRIORITY)
+    else:
+        # Any digest still waiting to run will pick this one up too
+        waiting = db.query(Job.id).filter(Job.name == DIGEST_JOB, Job.status == QUEUED).first()
+        if waiting is None:
+            enqueue(db, DIGEST_JOB, lane=EMAIL_LANE, delay=timedelta(seconds=settings.admin_digest_window_seconds))
+    db.flush()
+    return notification
+
+
+def build_admin_digest(notifications: Sequence[AdminNotification]) -> Tuple[str, str]:
+    """Subject and body of one digest; a single notification is sent as it is"""
+    if len(notifications) == 1:
+        return notifications[0].subject, notifications[0].body
+    counts = {}
+    for notification in notifications:
+        counts[notification.kind] = counts.get(notification.kind, 0) + 1
+    summary = ", ".join(f"{count} {kind.replace('_', ' ')}" for kind, count in sorted(counts.items()))
+    subject = f"Wealth Genius: {len(notifications)} new notifications ({summary})"
+    sections = [
+        f"{'[URGENT] ' if n.urgent else ''}{n.subject}\n{'-' * 40}\n{n.body.strip()}\n"
+        for n in sorted(notifications, key=lambda n: (not n.urgent, n.id))
+    ]
+    return subject, "\n\n".join(sections)
+
+
+@job(DIGEST_JOB)
+def send_admin_digest(db):
+    """Email everything buffered as one digest; a failed send leaves it buffered for the retry"""
+    pending = db.query(AdminNotification).filter(AdminNotification.sent_at.is_(None)).order_by(
+        AdminNotification.id
+    ).limit(settings.admin_digest_max_items).with_for_update(skip_locked=True).all()
+    if not pending:
+        return
+    subject, body = build_admin_digest(pending)
+    if not send_email(settings.admin_email, subject, body):
+        raise RuntimeError(f"Could not send admin digest of {len(pending)} notifications")
+    now = _utcnow()
+    for notification in pending:
+        notification.sent_at = now
+    if len(pending) == settings.admin_digest_max_items:
+        # More than one email's worth buffered: keep going right away
+        enqueue(db, DIGEST_JOB, lane=EMAIL_LANE, priority=URGENT_PRIORITY)
@@ -0,0 +1,197 @@
+# Stripe webhook intake and batched enrollment updates
+"""
+The webhook endpoint only verifies the signature and stores the raw event
+(one INSERT, keyed by Stripe's event id), so Stripe gets its 200 within
+milliseconds and redeliveries of the same event are dropped by the unique
+constraint.
+
+The same transaction queues an apply job (unless one is already waiting),
+and the job worker applies stored events to enrollments in batches. Each
+payment state has a rank (pending < failed < paid < refunded) and an event
+only moves an enrollment up, so out-of-order delivery and replaying the
+whole event log converge on the same result.
+"""
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.models.enrollment import Enrollment, EnrollmentStatus
+from app.models.job import Job
+from app.models.payment import PaymentEvent
+from app.utils.jobs import QUEUED, enqueue, job
+
+APPLY_EVENTS_JOB = "payments.apply_events"
+APPLY_EVENTS_PRIORITY = 10
+
+# Stripe event type -> (payment_method, Enrollment.status or None to keep)
+PAYMENT_TRANSITIONS = {
+    "checkout.session.completed": ("stripe", None),
+    "payment_intent.succeeded": ("stripe", None),
+    "payment_intent.payment_failed": ("failed", None),
+    "charge.refunded": ("refunded", EnrollmentStatus.CANCELLED),
+}
+PAYMENT_RANK = {None: 0, "pending": 0, "failed": 1, "stripe": 2, "refunded": 3}
+
+
+class WebhookSignatureError(Exception):
+    """The Stripe-Signature header is missing, malformed, stale or wrong"""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _signature(payload: bytes, secret: str, timestamp: int) -> str:
+    signed = f"{timestamp}.".encode() + payload
+    return hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+
+
+def signature_header(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Stripe-Signature value for payload, for tests and local webhook replays"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    return f"t={timestamp},v1={_signature(payload, secret, timestamp)}"
+
+
+def verify_signature(payload: bytes, header: Optional[str], secret: str,
+                     tolerance_seconds: int, now: Optional[float] = None):
+    """Check a Stripe-Signature header the way Stripe's SDKs do"""
+    if not header:
+        raise WebhookSignatureError("Missing Stripe-Signature header")
+    timestamp = None
+    signatures = []
+    for item in header.split(","):
+        name, _, value = item.strip().partition("=")
+        if name == "t" and value.isdigit():
+            timestamp = int(value)
+        elif name == "v1":
+            signatures.append(value)
+    if timestamp is None or not signatures:
+        raise WebhookSignatureError("Malformed Stripe-Signature header")
+
+    expected = _signature(payload, secret, timestamp)
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise WebhookSignatureError("Signature does not match payload")
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > tolerance_seconds:
+        raise WebhookSignatureError("Signature timestamp outside tolerance")
+
+
+def record_event(db, event: Dict, payload: bytes) -> bool:
+    """Store a verified event; False if this event id was already stored"""
+    row = {
+        "stripe_event_id": event["id"],
+        "event_type": event["type"],
+        "payload": payload.decode(),
+        "stripe_created_at": datetime.fromtimestamp(event["created"], timezone.utc)
+        if isinstance(event.get("created"), int) else None,
+        "received_at": _utcnow(),
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(PaymentEvent.__table__).values(row).on_conflict_do_nothing(
+            index_elements=[PaymentEvent.stripe_event_id]
+        )
+        inserted = db.execute(stmt).rowcount == 1
+    else:
+        inserted = db.query(PaymentEvent.id).filter(PaymentEvent.stripe_event_id == event["id"]).first() is None
+        if inserted:
+            db.add(PaymentEvent(**row))
+    if inserted:
+        schedule_processing(db)
+    db.commit()
+    return inserted
+
+
+def schedule_processing(db):
+    """Queue an apply job in the caller's transaction; a job still waiting covers new events too"""
+    waiting = db.query(Job.id).filter(Job.name == APPLY_EVENTS_JOB, Job.status == QUEUED).first()
+    if waiting is None:
+        enqueue(db, APPLY_EVENTS_JOB, priority=APPLY_EVENTS_PRIORITY)
+
+
+def _enrollment_id(event: Dict) -> Optional[int]:
+    metadata = (event.get("data", {}).get("object") or {}).get("metadata") or {}
+    try:
+        return int(metadata["enrollment_id"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def apply_transition(enrollment: Enrollment, event_type: str) -> bool:
+    """Move the enrollment forward for this event; False if it is already past it"""
+    payment_method, status = PAYMENT_TRANSITIONS[event_type]
+    # Methods recorded by hand (cash, bank transfer) count as paid
+    current = PAYMENT_RANK.get(enrollment.payment_method, PAYMENT_RANK["stripe"])
+    if PAYMENT_RANK[payment_method] <= current:
+        return False
+    enrollment.payment_method = payment_method
+    if status is not None:
+        enrollment.status = status
+    return True
+
+
+def process_pending_events(db, batch_size: Optional[int] = None) -> int:
+    """Apply one batch of unprocessed events in a single transaction; returns events handled"""
+    query = db.query(PaymentEvent).filter(PaymentEvent.processed_at.is_(None)).order_by(PaymentEvent.id)
+    # Concurrent workers take disjoint batches (ignored by SQLite)
+    events: List[PaymentEvent] = query.limit(batch_size or settings.payment_batch_size).with_for_update(
+        skip_locked=True
+    ).all()
+    if not events:
+        return 0
+
+    parsed = {}
+    for payment_event in events:
+        try:
+            parsed[payment_event.id] = json.loads(payment_event.payload)
+        except ValueError:
+            payment_event.error = "Payload is not valid JSON"
+    enrollment_ids = {_enrollment_id(event) for event in parsed.values()} - {None}
+    enrollments = {
+        enrollment.id: enrollment
+        for enrollment in db.query(Enrollment).filter(Enrollment.id.in_(enrollment_ids))
+    } if enrollment_ids else {}
+
+    now = _utcnow()
+    # Stripe does not guarantee delivery order; apply in creation order
+    for payment_event in sorted(events, key=lambda e: (e.stripe_created_at or e.received_at, e.id)):
+        payment_event.processed_at = now
+        event = parsed.get(payment_event.id)
+        if event is None or payment_event.event_type not in PAYMENT_TRANSITIONS:
+            continue
+        enrollment = enrollments.get(_enrollment_id(event))
+        if enrollment is None:
+            payment_event.error = "No enrollment for this event"
+            continue
+        apply_transition(enrollment, payment_event.event_type)
+        payment_event.error = None
+    db.commit()
+    return len(events)
+
+
+def replay_events(db, since: Optional[datetime] = None, event_type: Optional[str] = None) -> int:
+    """Mark stored events unprocessed so the worker applies them again"""
+    query = db.query(PaymentEvent)
+    if since is not None:
+        query = query.filter(PaymentEvent.received_at >= since)
+    if event_type is not None:
+        query = query.filter(PaymentEvent.event_type == event_type)
+    count = query.update({PaymentEvent.processed_at: None, PaymentEvent.error: None}, synchronize_session=False)
+    if count:
+        schedule_processing(db)
+    db.commit()
+    return count
+
+
+@job(APPLY_EVENTS_JOB)
+def apply_pending_events(db):
+    """Apply stored events batch by batch until none is pending"""
+    while process_pending_events(db) == settings.payment_batch_size:
+        pass
@@ -0,0 +1,212 @@
+# Write-coalescing buffer for lesson progress heartbeats
+"""
+Video players send a heartbeat every few seconds per viewer. Instead of one
+UPDATE per heartbeat, heartbeats are merged in memory per
+(enrollment_id, lesson_id) and written with bulk upserts on an interval.
+
+Crash safety: heartbeats carry cumulative watch time, and every merge (in
+memory and in the upsert) keeps the largest value, so writes are idempotent.
+Completions are not buffered: the ingest endpoint writes them through at
+once, since the player does not send them again. A crash therefore loses at
+most one flush interval of watch time, which the player's next heartbeat
+restores. A failed flush puts its entries back into the buffer, and
+shutdown performs a final flush.
+"""
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, or_
+from app.models.enrollment import LessonProgress
+
+ProgressKey = Tuple[int, int]
+
+
+@dataclass
+class BufferedProgress:
+    watch_time_seconds: int
+    is_completed: bool
+    last_watched_at: datetime
+    completed_at: Optional[datetime] = None
+
+    def merge(self, other: "BufferedProgress"):
+        self.watch_time_seconds = max(self.watch_time_seconds, other.watch_time_seconds)
+        self.last_watched_at = max(self.last_watched_at, other.last_watched_at)
+        if other.is_completed:
+            self.completed_at = min(filter(None, (self.completed_at, other.completed_at)))
+            self.is_completed = True
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def progress_entry(watch_time_seconds: int, completed: bool = False,
+                   watched_at: Optional[datetime] = None) -> BufferedProgress:
+    """One heartbeat as a mergeable entry (naive times are taken as UTC)"""
+    watched_at = watched_at or _utcnow()
+    if watched_at.tzinfo is None:
+        watched_at = watched_at.replace(tzinfo=timezone.utc)
+    else:
+        watched_at = watched_at.astimezone(timezone.utc)
+    return BufferedProgress(
+        watch_time_seconds=watch_time_seconds,
+        is_completed=completed,
+        last_watched_at=watched_at,
+        completed_at=watched_at if completed else None,
+    )
+
+
+def merge_progress(entries: Dict[ProgressKey, BufferedProgress], key: ProgressKey, entry: BufferedProgress):
+    current = entries.get(key)
+    if current is None:
+        entries[key] = entry
+    else:
+        current.merge(entry)
+
+
+class ProgressBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[ProgressKey, BufferedProgress] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, enrollment_id: int, lesson_id: int, watch_time_seconds: int,
+            completed: bool = False, watched_at: Optional[datetime] = None):
+        """Merge one heartbeat into the buffer"""
+        entry = progress_entry(watch_time_seconds, completed, watched_at)
+        self._merge({(enrollment_id, lesson_id): entry})
+
+    def _merge(self, entries: Dict[ProgressKey, BufferedProgress]):
+        with self._lock:
+            for key, entry in entries.items():
+                merge_progress(self._entries, key, entry)
+
+    def drain(self) -> Dict[ProgressKey, BufferedProgress]:
+        """Take ownership of everything buffered so far"""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        return entries
+
+    def flush(self, session_factory) -> int:
+        """Write buffered progress with bulk upserts; returns rows written"""
+        entries = self.drain()
+        if not entries:
+            return 0
+        db = session_factory()
+        try:
+            upsert_progress(db, entries)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            # Nothing is lost: newer heartbeats merge with the restored entries
+            self._merge(entries)
+            print(f"Error flushing lesson progress: {e}")
+            return 0
+        finally:
+            db.close()
+        return len(entries)
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def upsert_progress(db, entries: Dict[ProgressKey, BufferedProgress], chunk_size: int = 500):
+    """Bulk upsert merged progress, keeping the largest values already stored"""
+    rows = [
+        {
+            "enrollment_id": enrollment_id,
+            "lesson_id": lesson_id,
+            "watch_time_seconds": entry.watch_time_seconds,
+            "is_completed": entry.is_completed,
+            "completed_at": entry.completed_at,
+            "last_watched_at": entry.last_watched_at,
+        }
+        for (enrollment_id, lesson_id), entry in entries.items()
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        greatest = func.greatest
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        greatest = func.max
+    else:
+        _merge_progress_rows(db, rows)
+        return
+
+    table = LessonProgress.__table__
+    for chunk in _chunks(rows, chunk_size):
+        stmt = insert(table).values(chunk)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.enrollment_id, table.c.lesson_id],
+            set_={
+                "watch_time_seconds": greatest(
+                    func.coalesce(table.c.watch_time_seconds, 0), excluded.watch_time_seconds
+                ),
+                "last_watched_at": greatest(
+                    func.coalesce(table.c.last_watched_at, excluded.last_watched_at),
+                    excluded.last_watched_at,
+                ),
+                "is_completed": or_(table.c.is_completed.is_(True), excluded.is_completed.is_(True)),
+                "completed_at": func.coalesce(table.c.completed_at, excluded.completed_at),
+            },
+        )
+        db.execute(stmt)
+
+
+def _merge_progress_rows(db, rows: List[dict]):
+    """Portable fallback for databases without INSERT ... ON CONFLICT"""
+    for row in rows:
+        progress = db.query(LessonProgress).filter(
+            LessonProgress.enrollment_id == row["enrollment_id"],
+            LessonProgress.lesson_id == row["lesson_id"]
+        ).first()
+        if progress is None:
+            db.add(LessonProgress(**row))
+            continue
+        progress.watch_time_seconds = max(progress.watch_time_seconds or 0, row["watch_time_seconds"])
+        if progress.last_watched_at is None or progress.last_watched_at < row["last_watched_at"]:
+            progress.last_watched_at = row["last_watched_at"]
+        if row["is_completed"] and not progress.is_completed:
+            progress.is_completed = True
+            progress.completed_at = row["completed_at"]
+
+
+class ProgressFlusher:
+    """Background thread that flushes a ProgressBuffer on an interval"""
+
+    def __init__(self, buffer: ProgressBuffer, session_factory, interval_seconds: float):
+        self.buffer = buffer
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="progress-flusher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.buffer.flush(self.session_factory)
+
+    def stop(self):
+        """Stop the thread and write whatever is still buffered"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.buffer.flush(self.session_factory)
+
+
+# Global per-process buffer shared by the ingest endpoint and the flusher
+progress_buffer = ProgressBuffer()
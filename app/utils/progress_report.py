@@ -0,0 +1,176 @@
+# Aggregated lesson progress for student dashboards and instructor reports
+from typing import List, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select, func, case, and_, or_
+from sqlalchemy.orm import aliased
+from app.models.course import Course, Lesson
+from app.models.enrollment import Enrollment, LessonProgress
+
+
+def get_user_progress_summaries(db, user_id: int) -> List[dict]:
+    """Completion, watch time and next lesson for every enrollment of a user.
+
+    Runs as one aggregate statement: enrollments are joined to their course's
+    lessons and any progress rows, grouped per enrollment.
+    """
+    not_completed = or_(LessonProgress.is_completed.is_(None), LessonProgress.is_completed.is_(False))
+    aggregate = (
+        select(
+            Enrollment.id.label("enrollment_id"),
+            Enrollment.course_id.label("course_id"),
+            Course.title.label("course_title"),
+            func.count(Lesson.id).label("total_lessons"),
+            func.coalesce(func.sum(case((LessonProgress.is_completed.is_(True), 1), else_=0)), 0)
+            .label("completed_lessons"),
+            func.coalesce(func.sum(LessonProgress.watch_time_seconds), 0).label("watch_time_seconds"),
+            func.min(case((and_(Lesson.id.isnot(None), not_completed), Lesson.order))).label("next_order"),
+        )
+        .select_from(Enrollment)
+        .join(Course, Course.id == Enrollment.course_id)
+        .outerjoin(Lesson, Lesson.course_id == Enrollment.course_id)
+        .outerjoin(
+            LessonProgress,
+            and_(LessonProgress.enrollment_id == Enrollment.id, LessonProgress.lesson_id == Lesson.id)
+        )
+        .where(Enrollment.user_id == user_id)
+        .group_by(Enrollment.id, Enrollment.course_id, Course.title)
+        .subquery()
+    )
+    next_lesson_id = (
+        select(Lesson.id)
+        .where(Lesson.course_id == aggregate.c.course_id, Lesson.order == aggregate.c.next_order)
+        .order_by(Lesson.id)
+        .limit(1)
+        .correlate(aggregate)
+        .scalar_subquery()
+    )
+    next_lesson = aliased(Lesson)
+    rows = db.execute(
+        select(aggregate, next_lesson.id.label("next_lesson_id"), next_lesson.title.label("next_lesson_title"))
+        .outerjoin(next_lesson, next_lesson.id == next_lesson_id)
+        .order_by(aggregate.c.enrollment_id.desc())
+    ).mappings().all()
+
+    summaries = []
+    for row in rows:
+        total = row["total_lessons"]
+        summaries.append({
+            "enrollment_id": row["enrollment_id"],
+            "course_id": row["course_id"],
+            "course_title": row["course_title"],
+            "total_lessons": total,
+            "completed_lessons": row["completed_lessons"],
+            "completion_ratio": round(row["completed_lessons"] / total, 4) if total else 0.0,
+            "watch_time_seconds": row["watch_time_seconds"],
+            "next_lesson_id": row["next_lesson_id"],
+            "next_lesson_title": row["next_lesson_title"],
+        })
+    return summaries
+
+
+def summarize_course_progress(
+    lesson_ids: Sequence[int],
+    enrollment_ids: Sequence[int],
+    progress_rows: Sequence[Tuple[int, int, int, bool]],
+) -> dict:
+    """Vectorized per-student and per-lesson progress for one course.
+
+    lesson_ids must be in course order. progress_rows are
+    (enrollment_id, lesson_id, watch_time_seconds, is_completed) tuples.
+    """
+    lessons = np.asarray(lesson_ids, dtype=np.int64)
+    enrollments = np.asarray(enrollment_ids, dtype=np.int64)
+    n_students, n_lessons = len(enrollments), len(lessons)
+
+    completed = np.zeros((n_students, n_lessons), dtype=bool)
+    watch_time = np.zeros(n_students, dtype=np.int64)
+
+    if progress_rows and n_students:
+        rows = np.array(progress_rows, dtype=np.int64).reshape(-1, 4)
+        # Map ids to matrix positions with a sorted lookup instead of dicts
+        enrollment_order = np.argsort(enrollments)
+        row_pos = np.searchsorted(enrollments, rows[:, 0], sorter=enrollment_order)
+        row_pos = np.clip(row_pos, 0, n_students - 1)
+        row_idx = enrollment_order[row_pos]
+        known_student = enrollments[row_idx] == rows[:, 0]
+        watch_time = np.bincount(
+            row_idx[known_student], weights=rows[known_student, 2], minlength=n_students
+        ).astype(np.int64)
+
+        if n_lessons:
+            lesson_order = np.argsort(lessons)
+            col_pos = np.clip(np.searchsorted(lessons, rows[:, 1], sorter=lesson_order), 0, n_lessons - 1)
+            col_idx = lesson_order[col_pos]
+            in_course = known_student & (lessons[col_idx] == rows[:, 1]) & (rows[:, 3] != 0)
+            completed[row_idx[in_course], col_idx[in_course]] = True
+
+    completed_counts = completed.sum(axis=1)
+    ratios = completed_counts / n_lessons if n_lessons else np.zeros(n_students)
+    # First not-completed lesson in course order; -1 when everything is done
+    first_open = np.argmin(completed, axis=1) if n_lessons else np.zeros(n_students, dtype=np.int64)
+    all_done = completed_counts == n_lessons
+    next_lesson = np.where(all_done, -1, lessons[first_open] if n_lessons else -1)
+
+    return {
+        "completed_lessons": completed_counts,
+        "completion_ratio": ratios,
+        "watch_time_seconds": watch_time,
+        "next_lesson_id": next_lesson,
+        "lesson_completion_rate": completed.mean(axis=0) if n_students else np.zeros(n_lessons),
+    }
+
+
+def get_course_progress_report(db, course_id: int) -> dict:
+    """Progress of every student in a course, computed with NumPy"""
+    lesson_ids = db.execute(
+        select(Lesson.id).where(Lesson.course_id == course_id).order_by(Lesson.order, Lesson.id)
+    ).scalars().all()
+    students = db.execute(
+        select(Enrollment.id, Enrollment.user_id, Enrollment.student_name)
+        .where(Enrollment.course_id == course_id)
+        .order_by(Enrollment.id)
+    ).all()
+    progress_rows = db.execute(
+        select(
+            LessonProgress.enrollment_id,
+            LessonProgress.lesson_id,
+            func.coalesce(LessonProgress.watch_time_seconds, 0),
+            func.coalesce(LessonProgress.is_completed, False),
+        )
+        .join(Enrollment, Enrollment.id == LessonProgress.enrollment_id)
+        .where(Enrollment.course_id == course_id)
+    ).all()
+
+    stats = summarize_course_progress(
+        lesson_ids, [student.id for student in students], [tuple(row) for row in progress_rows]
+    )
+    ratios = stats["completion_ratio"]
+    return {
+        "course_id": course_id,
+        "total_lessons": len(lesson_ids),
+        "student_count": len(students),
+        "average_completion": round(float(ratios.mean()), 4) if len(students) else 0.0,
+        "total_watch_time_seconds": int(stats["watch_time_seconds"].sum()),
+        "lessons": [
+            {"lesson_id": lesson_id, "completion_rate": round(float(rate), 4)}
+            for lesson_id, rate in zip(lesson_ids, stats["lesson_completion_rate"])
+        ],
+        "students": [
+            {
+                "enrollment_id": student.id,
+                "user_id": student.user_id,
+                "student_name": student.student_name,
+                "completed_lessons": int(completed),
+                "completion_ratio": round(float(ratio), 4),
+                "watch_time_seconds": int(watched),
+                "next_lesson_id": int(next_id) if next_id >= 0 else None,
+            }
+            for student, completed, ratio, watched, next_id in zip(
+                students,
+                stats["completed_lessons"],
+                ratios,
+                stats["watch_time_seconds"],
+                stats["next_lesson_id"],
+            )
+        ],
+    }
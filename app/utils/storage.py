@@ -0,0 +1,140 @@
+# Storage backends for uploaded media
+"""
+Everything that stores files (images, videos, lesson material) goes
+through the Storage interface, so the backend is a deployment choice:
+
+    STORAGE_BACKEND=s3     objects in S3 (or MinIO), served by S3/CDN
+    STORAGE_BACKEND=local  files under MEDIA_ROOT, served by the app at MEDIA_URL
+
+Keys are slash-separated paths such as "course-videos/<id>.mp4" in both.
+"""
+import io
+import mimetypes
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, NamedTuple, Optional
+from fastapi import UploadFile
+
+
+class StoredObject(NamedTuple):
+    size: int
+    content_type: str
+
+
+class Storage(ABC):
+    """Interface shared by the S3 and local-disk backends"""
+
+    @abstractmethod
+    def save(self, key: str, fileobj: BinaryIO, content_type: str, cache_control: Optional[str] = None):
+        ...
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes, content_type: str, cache_control: Optional[str] = None):
+        ...
+
+    @abstractmethod
+    def get_bytes(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[StoredObject]:
+        """Size and content type, or None if the key is not a stored file"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def public_url(self, key: str) -> str:
+        ...
+
+    def key_from_url(self, file_url: str) -> Optional[str]:
+        """Key of a URL produced by public_url, or None for foreign URLs"""
+        prefix = self.public_url("")
+        if not file_url or not file_url.startswith(prefix):
+            return None
+        return file_url[len(prefix):] or None
+
+    def upload_file(self, file: UploadFile, folder: str = "uploads") -> Optional[str]:
+        """Store an uploaded file under a random name and return its URL"""
+        try:
+            file_extension = os.path.splitext(file.filename)[1]
+            key = f"{folder}/{os.urandom(16).hex()}{file_extension}"
+            self.save(key, file.file, file.content_type or guess_content_type(key))
+            return self.public_url(key)
+        except Exception as e:
+            print(f"Error uploading file: {e}")
+            return None
+
+    def delete_file(self, file_url: str) -> bool:
+        """Delete the object behind a public URL"""
+        key = self.key_from_url(file_url)
+        if key is None:
+            print(f"Error deleting file: {file_url} is not in this storage")
+            return False
+        try:
+            self.delete(key)
+            return True
+        except Exception as e:
+            print(f"Error deleting file: {e}")
+            return False
+
+
+class LocalStorage(Storage):
+    """Files on local disk; the media endpoint serves them with Range support"""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path_for(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def save(self, key: str, fileobj: BinaryIO, content_type: str, cache_control: Optional[str] = None):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write beside the target and rename, so readers never see half a file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(fileobj, out, 1024 * 1024)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def put_bytes(self, key: str, data: bytes, content_type: str, cache_control: Optional[str] = None):
+        self.save(key, io.BytesIO(data), content_type, cache_control)
+
+    def get_bytes(self, key: str) -> bytes:
+        with open(self.path_for(key), "rb") as f:
+            return f.read()
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            path = self.path_for(key)
+        except ValueError:
+            return None
+        # Directories (e.g. a folder prefix) are not objects
+        if not os.path.isfile(path):
+            return None
+        try:
+            size = os.stat(path).st_size
+        except FileNotFoundError:
+            return None
+        return StoredObject(size, guess_content_type(key))
+
+    def delete(self, key: str):
+        os.remove(self.path_for(key))
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+def guess_content_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
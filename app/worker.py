@@ -0,0 +1,46 @@
+# Job worker process: python -m app.worker [--lanes email,default] [--concurrency 4]
+import argparse
+import signal
+import threading
+from prometheus_client import start_http_server
+from app.core.config import settings
+from app.core.metrics import metrics_registry
+from app.database.database import engine, SessionLocal
+from app.models.job import Job
+from app.utils.analytics import rollup_refresher
+from app.utils.consultation_reminders import reminder_scheduler
+from app.utils.jobs import HANDLERS, JobWorker
+import app.api.v1.api  # noqa: F401  (registers the handlers defined next to the endpoints)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--lanes", default="", help="comma-separated lanes to serve (default: all)")
+    parser.add_argument("-c", "--concurrency", type=int, default=settings.job_worker_concurrency)
+    args = parser.parse_args()
+
+    Job.__table__.create(bind=engine, checkfirst=True)
+    if settings.job_metrics_port:
+        start_http_server(settings.job_metrics_port, registry=metrics_registry())
+
+    lanes = [lane.strip() for lane in args.lanes.split(",") if lane.strip()]
+    worker = JobWorker(SessionLocal, lanes, args.concurrency, settings.job_poll_interval_seconds)
+    stopping = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    worker.start()
+    # Every worker runs the reminder scheduler too; leases stop double sends
+    reminder_scheduler.start()
+    rollup_refresher.start()
+    print(f"Job worker {worker.name} serving {', '.join(lanes) or 'all lanes'} "
+          f"with {args.concurrency} threads; handlers: {', '.join(sorted(HANDLERS))}")
+    stopping.wait()
+    # Running jobs finish; anything else stays queued for the next worker
+    rollup_refresher.stop()
+    reminder_scheduler.stop()
+    worker.stop()
+
+
+if __name__ == "__main__":
+    main()
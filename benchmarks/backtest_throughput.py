@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Backtest throughput in bars/second.
+
+    python -m benchmarks.backtest_throughput --bars 1000000 --jobs 16 --workers 1 2 4
+
+Runs every built-in strategy in-process over a synthetic minute series,
+then the same jobs through the process pool, and a pure-Python bar loop
+for sma_crossover as the baseline the vectorized engine replaces.
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+from app.utils.backtest import STRATEGIES, run_backtest
+from app.utils.candles import CandleStore
+
+SYMBOL, INTERVAL = "BENCH:1", "1m"
+
+
+def make_store(root: str, bars: int) -> CandleStore:
+    store = CandleStore(root)
+    close = 20000 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.0005, bars)))
+    store.import_columns(SYMBOL, INTERVAL, {
+        "timestamp": 1_600_000_000 + 60 * np.arange(bars, dtype=np.int64),
+        "open": close, "high": close, "low": close, "close": close, "volume": np.ones(bars),
+    })
+    return store
+
+
+def python_loop_sma_crossover(close, fast=10, slow=30, cost_bps=2.0):
+    """Bar-by-bar equivalent of sma_crossover + simulate, for comparison"""
+    equity, position, fast_sum, slow_sum = 1.0, 0.0, 0.0, 0.0
+    for i, price in enumerate(close):
+        if i:
+            equity *= 1 + position * (price / close[i - 1] - 1)
+        fast_sum += price - (close[i - fast] if i >= fast else 0.0)
+        slow_sum += price - (close[i - slow] if i >= slow else 0.0)
+        target = 1.0 if i >= slow - 1 and fast_sum / fast > slow_sum / slow else 0.0
+        equity *= 1 - abs(target - position) * cost_bps / 10_000
+        position = target
+    return equity
+
+
+def job_args(store, strategy):
+    return (store.root, SYMBOL, INTERVAL, None, None, strategy, STRATEGIES[strategy][1], 2.0, 500)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backtest throughput")
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--loop-bars", type=int, default=200_000, help="bars for the pure-Python baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = make_store(root, args.bars)
+        print(f"{args.bars:,} one-minute bars")
+
+        for strategy in STRATEGIES:
+            run_backtest(*job_args(store, strategy))  # warm page cache and imports
+            started = time.perf_counter()
+            run_backtest(*job_args(store, strategy))
+            elapsed = time.perf_counter() - started
+            print(f"in-process {strategy:<20} {elapsed * 1000:>8.1f} ms {args.bars / elapsed:>14,.0f} bars/s")
+
+        close = store.load(SYMBOL, INTERVAL).close[:args.loop_bars].tolist()
+        started = time.perf_counter()
+        python_loop_sma_crossover(close)
+        elapsed = time.perf_counter() - started
+        print(f"python loop sma_crossover     {elapsed * 1000:>8.1f} ms {len(close) / elapsed:>14,.0f} bars/s")
+
+        strategies = list(STRATEGIES)
+        for workers in args.workers:
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                wait([pool.submit(run_backtest, *job_args(store, s)) for s in strategies])  # start workers
+                started = time.perf_counter()
+                wait([pool.submit(run_backtest, *job_args(store, strategies[i % len(strategies)]))
+                      for i in range(args.jobs)])
+                elapsed = time.perf_counter() - started
+            print(f"pool {workers} workers, {args.jobs} jobs    {elapsed * 1000:>8.1f} ms "
+                  f"{args.jobs * args.bars / elapsed:>14,.0f} bars/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Async load generator for the API.
+
+    # against a running server (gunicorn/uvicorn) seeded with benchmarks.seed
+    python -m benchmarks.load --base-url http://localhost:8000 --duration 60 --users 50
+
+    # in-process against app.main:app, handy for quick local comparisons
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.load --in-process --scenario browse
+
+Prints RPS and p50/p95/p99 latency per route. --save-baseline stores the
+result under benchmarks/baselines/<name>.json; --baseline compares against
+a stored run and exits 1 if any route regressed by more than
+--max-regression (p95 latency up or RPS down).
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+import httpx
+import numpy as np
+from benchmarks.scenarios import SCENARIOS, prepare_context
+from benchmarks.seed import BENCH_STUDENT_EMAIL
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+class RunContext:
+    """Shared state for virtual users plus the raw request log"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.course_ids = []
+        self.course_titles = []
+        self.students = 0
+        self.admin_token = None
+
+    def random_student_email(self) -> str:
+        return BENCH_STUDENT_EMAIL.format(random.randrange(self.students))
+
+    async def request(self, client, method, url, label, ok=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.latencies[label].append(time.perf_counter() - started)
+            self.errors[label] += 1
+            raise
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code not in ok:
+            self.errors[label] += 1
+        return response
+
+
+async def virtual_user(client, ctx, scenarios, weights, deadline):
+    while time.perf_counter() < deadline:
+        scenario = random.choices(scenarios, weights)[0]
+        try:
+            await scenario(client, ctx)
+        except httpx.HTTPError:
+            pass  # already counted as an error against its route
+
+
+def summarize(ctx, elapsed):
+    report = {}
+    for label, samples in sorted(ctx.latencies.items()):
+        latencies_ms = np.array(samples) * 1000
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        report[label] = {
+            "requests": len(samples),
+            "errors": ctx.errors[label],
+            "rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"{'route':<45} {'reqs':>7} {'errs':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for label, row in report.items():
+        print(
+            f"{label:<45} {row['requests']:>7} {row['errors']:>5} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+        )
+
+
+def compare(report, baseline, max_regression):
+    """Routes whose p95 grew or whose RPS fell by more than max_regression"""
+    regressions = []
+    for label, old in baseline.items():
+        new = report.get(label)
+        if new is None:
+            continue
+        if new["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{label}: p95 {old['p95_ms']}ms -> {new['p95_ms']}ms")
+        if new["rps"] < old["rps"] * (1 - max_regression):
+            regressions.append(f"{label}: rps {old['rps']} -> {new['rps']}")
+    return regressions
+
+
+async def run(args):
+    if args.scenario == "mixed":
+        scenarios = [scenario for scenario, _ in SCENARIOS.values()]
+        weights = [weight for _, weight in SCENARIOS.values()]
+    else:
+        scenarios, weights = [SCENARIOS[args.scenario][0]], [1]
+
+    if args.in_process:
+        from app.main import app
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout)
+    else:
+        limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits)
+
+    ctx = RunContext()
+    async with client:
+        await prepare_context(client, ctx, args.students)
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, ctx, scenarios, weights, deadline) for _ in range(args.users)
+        ))
+        elapsed = time.perf_counter() - started
+    return summarize(ctx, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="drive app.main:app through ASGI")
+    parser.add_argument("--scenario", choices=["mixed", *SCENARIOS], default="mixed")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--students", type=int, default=50_000, help="seeded student count (benchmarks.seed --users)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for repeatable journeys")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--baseline", metavar="NAME")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baseline to {path}")
+
+    if args.baseline:
+        baseline = json.loads((BASELINE_DIR / f"{args.baseline}.json").read_text())
+        regressions = compare(report, baseline, args.max_regression)
+        if regressions:
+            print("Regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against baseline '{args.baseline}'")
+
+
+if __name__ == "__main__":
+    main()
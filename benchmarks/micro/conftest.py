@@ -0,0 +1,2 @@
+# Register every model so relationship() targets resolve for transient objects
+from app.models import user, course, enrollment, content, consultation, analytics, payment, job, notification  # noqa: F401
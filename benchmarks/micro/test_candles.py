@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from app.utils.candles import CandleStore, INDICATORS
+
+# A year of NSE minute bars: 375 per session, 250 sessions
+YEAR_OF_MINUTES = 375 * 250
+
+
+@pytest.fixture(scope="module")
+def series(tmp_path_factory):
+    store = CandleStore(str(tmp_path_factory.mktemp("candles")))
+    close = 20000 + np.cumsum(np.random.default_rng(1).normal(0, 5, YEAR_OF_MINUTES))
+    store.import_columns("NSE:26000", "1m", {
+        "timestamp": 1_700_000_000 + 60 * np.arange(YEAR_OF_MINUTES, dtype=np.int64),
+        "open": close, "high": close + 2, "low": close - 2, "close": close,
+        "volume": np.full(YEAR_OF_MINUTES, 100.0),
+    })
+    return store.load("NSE:26000", "1m")
+
+
+@pytest.mark.parametrize("name", sorted(INDICATORS))
+def test_indicator_over_a_year_of_minutes(benchmark, series, name):
+    function, defaults = INDICATORS[name]
+    result = benchmark(function, series, **defaults)
+    assert all(len(values) == YEAR_OF_MINUTES for values in result.values())
+
+
+def test_range_slice_to_binary(benchmark, series):
+    def slice_year():
+        lo, hi = series.bounds(None, None)
+        return b"".join(np.asarray(values, dtype="<f8").tobytes() for values in series.columns(lo, hi).values())
+
+    assert len(benchmark(slice_year)) == YEAR_OF_MINUTES * 6 * 8
@@ -0,0 +1,38 @@
+from datetime import datetime
+from app.models.course import Course, CourseCategory, CourseFeature, CourseLevel, Lesson
+from app.models.user import User, UserRole
+from app.schemas.course import CourseWithStats
+
+
+def catalogue_course(lessons=12, features=5):
+    """Transient ORM graph shaped like one row of the course catalogue"""
+    now = datetime(2026, 1, 1)
+    instructor = User(id=1, email="i@example.com", username="i", full_name="Instructor",
+                      hashed_password="x", role=UserRole.INSTRUCTOR)
+    course = Course(
+        id=1, title="Options Trading", slug="options-trading", description="Options " * 50,
+        short_description="Options", level=CourseLevel.INTERMEDIATE, category=CourseCategory.OPTIONS_TRADING,
+        duration_weeks=8, price=15000.0, is_featured=True, is_published=True,
+        instructor_id=1, created_at=now, instructor=instructor
+    )
+    course.lessons = [
+        Lesson(id=i, course_id=1, title=f"Lesson {i}", order=i, duration_minutes=30, is_free=i == 1, created_at=now)
+        for i in range(1, lessons + 1)
+    ]
+    course.course_features = [
+        CourseFeature(id=i, course_id=1, feature_name=f"Feature {i}", order=i)
+        for i in range(1, features + 1)
+    ]
+    return course
+
+
+def test_course_with_stats_from_orm(benchmark):
+    course = catalogue_course()
+    result = benchmark(CourseWithStats.from_orm, course)
+    assert len(result.lessons) == 12
+
+
+def test_course_page_serialization(benchmark):
+    courses = [catalogue_course() for _ in range(20)]
+    result = benchmark(lambda: [CourseWithStats.from_orm(course).model_dump(mode="json") for course in courses])
+    assert len(result) == 20
@@ -0,0 +1,25 @@
+from app.core.security import create_access_token, get_password_hash, verify_password, verify_token
+
+CLAIMS = {"sub": "student@example.com", "user_id": 42}
+
+
+def test_create_access_token(benchmark):
+    token = benchmark(create_access_token, CLAIMS)
+    assert token.count(".") == 2
+
+
+def test_verify_token(benchmark):
+    token = create_access_token(CLAIMS)
+    payload = benchmark(verify_token, token)
+    assert payload["user_id"] == 42
+
+
+def test_get_password_hash(benchmark):
+    # Deliberately slow (key stretching); a few rounds are enough
+    hashed = benchmark.pedantic(get_password_hash, args=("correct horse battery",), rounds=5, iterations=1)
+    assert hashed.startswith("$pbkdf2-sha256$")
+
+
+def test_verify_password(benchmark):
+    hashed = get_password_hash("correct horse battery")
+    assert benchmark.pedantic(verify_password, args=("correct horse battery", hashed), rounds=5, iterations=1)
@@ -0,0 +1,46 @@
+from datetime import date, datetime, time
+from app.api.v1.endpoints.consultation import build_consultation_admin_email, build_consultation_confirmation_email
+from app.models.consultation import ConsultationSchedule
+from app.models.content import ContactInquiry
+from app.models.user import User
+from app.utils.consultation_slots import format_consultation_slot
+from app.utils.email import (
+    build_contact_notification_email, build_enrollment_confirmation_email, build_welcome_email
+)
+
+CONSULTATION = ConsultationSchedule(
+    id=7, name="Client", email="client@example.com", phone="9999999999",
+    preferred_date="2026-03-02", preferred_time="11:00", status="scheduled", created_at=datetime(2026, 3, 1)
+)
+
+
+def test_build_consultation_confirmation_email(benchmark):
+    when = format_consultation_slot(date(2026, 3, 2), time(11, 0))
+    subject, body = benchmark(build_consultation_confirmation_email, CONSULTATION, when)
+    assert "Client" in body
+
+
+def test_build_consultation_admin_email(benchmark):
+    when = format_consultation_slot(date(2026, 3, 2), time(11, 0))
+    subject, body = benchmark(build_consultation_admin_email, CONSULTATION, when)
+    assert "client@example.com" in body
+
+
+def test_build_enrollment_confirmation_email(benchmark):
+    subject, body, html_body = benchmark(
+        build_enrollment_confirmation_email, "Student", "Options Trading", "₹15,000", 1234
+    )
+    assert "#1234" in body and "#1234" in html_body
+
+
+def test_build_welcome_email(benchmark):
+    user = User(full_name="Student", username="student", email="student@example.com")
+    subject, body = benchmark(build_welcome_email, user)
+    assert "Student" in body
+
+
+def test_build_contact_notification_email(benchmark):
+    inquiry = ContactInquiry(name="Visitor", email="v@example.com", subject="Batch dates",
+                             message="When does the next batch start?", created_at=datetime(2026, 3, 1))
+    subject, body = benchmark(build_contact_notification_email, inquiry)
+    assert "Batch dates" in subject
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Range-request throughput: local storage served by the app vs S3.
+
+    # app on uvicorn (FileResponse) vs a local moto server
+    python -m benchmarks.range_requests --size-mb 256 --range-kb 1024 --clients 32
+
+    # vs MinIO or any S3-compatible endpoint
+    python -m benchmarks.range_requests --endpoint-url http://localhost:9000 --bucket bench
+
+Each client issues random "bytes=a-b" GETs against one video-sized file,
+the access pattern of players seeking and buffering. Prints MB/s and
+p50/p95 latency per target.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+import httpx
+import numpy as np
+import uvicorn
+from app.core.config import settings
+from app.utils import file_upload
+from app.utils.file_upload import S3Uploader
+from app.utils.storage import LocalStorage
+
+MB = 1024 * 1024
+KEY = "course-videos/range-benchmark.mp4"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(media_root: str) -> uvicorn.Server:
+    """Serve app.main:app from a thread with local storage under media_root"""
+    file_upload.storage = LocalStorage(media_root, settings.media_url)
+    from app.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, port=free_port(), log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def start_s3(endpoint_url, bucket):
+    """S3 client for endpoint_url, or for a local moto server when it is None"""
+    server = None
+    if endpoint_url is None:
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        server = ThreadedMotoServer(port=0)
+        server.start()
+        host, port = server.get_host_and_port()
+        endpoint_url = f"http://{host}:{port}"
+
+    settings.aws_s3_endpoint_url = endpoint_url
+    settings.aws_s3_bucket = bucket
+    uploader = S3Uploader()
+    try:
+        uploader.s3_client.create_bucket(Bucket=bucket)
+    except uploader.s3_client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+    return uploader, server
+
+
+async def run(url, size, range_bytes, clients, requests_per_client):
+    latencies = []
+    received = 0
+
+    async def client_loop(client):
+        nonlocal received
+        for _ in range(requests_per_client):
+            start = random.randrange(0, size - range_bytes)
+            started = time.perf_counter()
+            response = await client.get(url, headers={"Range": f"bytes={start}-{start + range_bytes - 1}"})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 206:
+                raise SystemExit(f"{url} answered {response.status_code} to a Range request")
+            received += len(response.content)
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return received / MB / elapsed, np.percentile(latencies, [50, 95]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTTP Range request throughput")
+    parser.add_argument("--endpoint-url", help="S3-compatible endpoint; defaults to a local moto server")
+    parser.add_argument("--bucket", default="range-benchmark")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--range-kb", type=int, nargs="+", default=[256, 1024, 4096])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--skip-s3", action="store_true")
+    args = parser.parse_args()
+
+    size = args.size_mb * MB
+    data = os.urandom(size)
+    targets = []
+    s3_server = None
+    with tempfile.TemporaryDirectory() as media_root:
+        app_server = start_app(media_root)
+        file_upload.storage.put_bytes(KEY, data, "video/mp4")
+        targets.append(("app FileResponse", f"http://127.0.0.1:{app_server.config.port}"
+                                            f"{file_upload.storage.public_url(KEY)}"))
+        if not args.skip_s3:
+            uploader, s3_server = start_s3(args.endpoint_url, args.bucket)
+            uploader.put_bytes(KEY, data, "video/mp4")
+            targets.append(("S3 GetObject", uploader.public_url(KEY)))
+
+        print(f"{args.size_mb} MB object, {args.clients} clients x {args.requests} requests")
+        try:
+            for range_kb in args.range_kb:
+                for label, url in targets:
+                    throughput, (p50, p95) = asyncio.run(
+                        run(url, size, range_kb * 1024, args.clients, args.requests)
+                    )
+                    print(f"{label:<18} {range_kb:>6} KB ranges {throughput:>9.1f} MB/s "
+                          f"p50 {p50:>7.1f} ms  p95 {p95:>7.1f} ms")
+        finally:
+            app_server.should_exit = True
+            if s3_server is not None:
+                s3_server.stop()
+
+
+if __name__ == "__main__":
+    main()
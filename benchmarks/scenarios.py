@@ -0,0 +1,91 @@
+# Scripted user journeys for the load generator
+"""
+Each scenario is an async function taking (client, ctx) that performs one
+journey and records every request under a route label via ctx.request().
+Statuses listed in `ok` are expected outcomes (e.g. 409 when two virtual
+users race for the same consultation slot) and do not count as errors.
+"""
+import random
+from datetime import date, timedelta
+from app.core.config import settings
+from benchmarks.seed import BENCH_ADMIN_EMAIL, BENCH_PASSWORD
+
+API = settings.api_v1_prefix
+
+
+async def browse_catalogue(client, ctx):
+    skip = random.randrange(0, 100)
+    await ctx.request(client, "GET", f"{API}/courses/", "GET /courses/", params={"skip": skip, "limit": 20})
+    course_id = random.choice(ctx.course_ids)
+    await ctx.request(client, "GET", f"{API}/courses/{course_id}", "GET /courses/{course_id}")
+
+
+async def login(client, ctx):
+    await ctx.request(
+        client, "POST", f"{API}/auth/login", "POST /auth/login",
+        data={"username": ctx.random_student_email(), "password": BENCH_PASSWORD}
+    )
+
+
+async def enrollment_form(client, ctx):
+    await ctx.request(client, "POST", f"{API}/enrollments/form", "POST /enrollments/form", json={
+        "name": "Bench Student", "email": ctx.random_student_email(), "phone": "9999999999",
+        "city": "Ahmedabad", "course_title": random.choice(ctx.course_titles), "course_price": "₹15,000",
+    })
+
+
+async def consultation_booking(client, ctx):
+    start = date.today() + timedelta(days=random.randint(1, 30))
+    response = await ctx.request(
+        client, "GET", f"{API}/consultation/availability", "GET /consultation/availability",
+        params={"start": start.isoformat(), "end": (start + timedelta(days=6)).isoformat()}
+    )
+    if response.status_code != 200:
+        return
+    open_days = [day for day in response.json() if day["slots"]]
+    if not open_days:
+        return
+    day = random.choice(open_days)
+    await ctx.request(
+        client, "POST", f"{API}/consultation/schedule-consultation", "POST /consultation/schedule-consultation",
+        ok=(200, 409),
+        json={"name": "Bench Client", "email": "client@bench.example.com", "phone": "9999999999",
+              "date": day["day"], "time": random.choice(day["slots"])}
+    )
+
+
+async def admin_listing(client, ctx):
+    headers = {"Authorization": f"Bearer {ctx.admin_token}"}
+    await ctx.request(client, "GET", f"{API}/contact/", "GET /contact/", headers=headers, params={"limit": 100})
+    await ctx.request(
+        client, "GET", f"{API}/analytics/enrollments", "GET /analytics/enrollments",
+        headers=headers, params={"bucket": "week"}
+    )
+
+
+# name -> (scenario, relative weight in the "mixed" run)
+SCENARIOS = {
+    "browse": (browse_catalogue, 60),
+    "login": (login, 10),
+    "enroll": (enrollment_form, 10),
+    "consultation": (consultation_booking, 10),
+    "admin": (admin_listing, 10),
+}
+
+
+async def prepare_context(client, ctx, students: int):
+    """Look up ids the scenarios need and log the seeded admin in once"""
+    response = await client.get(f"{API}/courses/", params={"limit": 100})
+    response.raise_for_status()
+    courses = response.json()
+    if not courses:
+        raise SystemExit("No published courses; run python -m benchmarks.seed first")
+    ctx.course_ids = [item["id"] for item in courses]
+    ctx.course_titles = [item["title"] for item in courses]
+    ctx.students = students
+
+    response = await client.post(
+        f"{API}/auth/login", data={"username": BENCH_ADMIN_EMAIL, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    ctx.admin_token = response.json()["access_token"]
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Upload throughput: single boto3 upload_fileobj vs MultipartUploader.
+
+    # against a local moto server (pip install "moto[server]")
+    python -m benchmarks.upload_throughput --size-mb 512
+
+    # against MinIO or any S3-compatible endpoint
+    python -m benchmarks.upload_throughput --endpoint-url http://localhost:9000 --bucket bench
+
+The source is a temporary file so both paths read from disk like an
+UploadFile spooled by Starlette would.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from app.core.config import settings
+from app.utils.file_upload import S3Uploader
+from app.utils.multipart_upload import MultipartUploader
+
+MB = 1024 * 1024
+
+
+def make_source(size_mb: int):
+    source = tempfile.TemporaryFile()
+    block = os.urandom(MB)
+    for _ in range(size_mb):
+        source.write(block)
+    source.flush()
+    return source
+
+
+def timed(label, size_mb, func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed:>8.2f}s {size_mb / elapsed:>9.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark S3 upload throughput")
+    parser.add_argument("--endpoint-url", help="S3-compatible endpoint; defaults to a local moto server")
+    parser.add_argument("--bucket", default="upload-benchmark")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--part-size-mb", type=int, nargs="+", default=[8, 16, 64])
+    args = parser.parse_args()
+
+    server = None
+    endpoint_url = args.endpoint_url
+    if endpoint_url is None:
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+        server = ThreadedMotoServer(port=0)
+        server.start()
+        host, port = server.get_host_and_port()
+        endpoint_url = f"http://{host}:{port}"
+
+    settings.aws_s3_endpoint_url = endpoint_url
+    settings.aws_s3_bucket = args.bucket
+    settings.upload_server_concurrency = max(args.concurrency)
+    uploader = S3Uploader()
+    try:
+        uploader.s3_client.create_bucket(Bucket=args.bucket)
+    except uploader.s3_client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    source = make_source(args.size_mb)
+    print(f"Uploading {args.size_mb} MB to {endpoint_url}")
+    try:
+        def single():
+            source.seek(0)
+            uploader.s3_client.upload_fileobj(source, args.bucket, "bench/single.bin")
+
+        timed("upload_fileobj (default config)", args.size_mb, single)
+
+        for part_size_mb in args.part_size_mb:
+            settings.upload_server_part_size_bytes = part_size_mb * MB
+            for concurrency in args.concurrency:
+                def parallel():
+                    source.seek(0)
+                    MultipartUploader(uploader, concurrency=concurrency).upload(
+                        source, "bench/multipart.bin", "application/octet-stream", size=args.size_mb * MB
+                    )
+
+                timed(f"multipart {part_size_mb:>3} MB x {concurrency:<2} threads", args.size_mb, parallel)
+    finally:
+        source.close()
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+# Gunicorn settings, loaded automatically from the working directory
+import os
+import shutil
+import tempfile
+
+
+def on_starting(server):
+    """Give every worker a shared, empty Prometheus multiprocess directory"""
+    path = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "wealth-genius-metrics")
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges from the aggregate"""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
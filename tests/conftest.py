@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+from typing import Optional
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database.query_stats import observe_requests
+
+
+def memory_database(*metadatas):
+    """In-memory SQLite shared by every session of a test module, with the given tables"""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    for metadata in metadatas:
+        metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def use_test_db():
+    """Serve get_db from a test session factory until the test ends.
+
+        use_test_db(TestingSessionLocal)
+
+    Whatever override was in place before (or none) is restored afterwards.
+    """
+    from app.database.database import get_db
+    from app.main import app
+
+    previous = app.dependency_overrides.get(get_db)
+
+    def use(session_factory):
+        def override_get_db():
+            session = session_factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        return override_get_db
+
+    yield use
+    if previous is None:
+        app.dependency_overrides.pop(get_db, None)
+    else:
+        app.dependency_overrides[get_db] = previous
+
+
+@pytest.fixture
+def query_budget():
+    """Fail the test if a request inside the block goes over its query budget.
+
+        with query_budget(max_queries=4):
+            client.get("/api/v1/courses/")
+    """
+    @contextmanager
+    def budget(max_queries: int, max_repeats: Optional[int] = None):
+        with observe_requests() as finished:
+            yield finished
+        assert finished, "no requests were made inside the query budget"
+        for request in finished:
+            label = f"{request.method} {request.route}"
+            assert request.stats.count <= max_queries, (
+                f"{label} ran {request.stats.count} queries (budget {max_queries})"
+            )
+            repeated = request.stats.most_repeated()
+            if max_repeats is not None and repeated:
+                assert repeated[1] <= max_repeats, (
+                    f"{label} ran the same statement {repeated[1]} times: {repeated[0]}"
+                )
+
+    return budget
+
+
+@pytest.fixture(autouse=True)
+def clear_course_owner_cache():
+    """Test modules reuse user and course ids across their own databases"""
+    from app.utils.course_access import owned_course_cache
+    owned_course_cache.clear()
+    yield
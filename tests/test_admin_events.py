@@ -0,0 +1,135 @@
+import asyncio
+import json
+from datetime import date, time
+from fastapi.testclient import TestClient
+from app.api.v1.endpoints.admin_events import stream_admin_events
+from app.database.database import Base
+from app.main import app
+from app.models import consultation
+from app.models.consultation import ConsultationSchedule
+from app.models.content import ContactInquiry
+from app.models.enrollment import Enrollment
+from app.utils.admin_events import CHANNEL, PostgresListener, admin_events
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata, consultation.Base.metadata)
+
+
+def inquiry(name="Lead"):
+    return ContactInquiry(name=name, email="lead@example.com", subject="Course fees", message="Hi")
+
+
+def enrollment():
+    return Enrollment(
+        user_id=1, course_id=1, student_name="Student", student_email="student@example.com",
+        student_phone="9999999999", student_city="Pune", course_title="Options 101",
+        course_price="4999", payment_amount=4999.0
+    )
+
+
+def booking():
+    return ConsultationSchedule(
+        name="Client", email="client@example.com", phone="9999999999", preferred_date="2026-03-02",
+        preferred_time="10:00", scheduled_date=date(2026, 3, 2), scheduled_time=time(10, 0)
+    )
+
+
+def items(batch):
+    return [item for _, item in batch]
+
+
+def commit(*rows, rollback=False):
+    db = TestingSessionLocal()
+    db.add_all(rows)
+    db.flush()
+    db.rollback() if rollback else db.commit()
+    db.close()
+
+
+def test_committed_rows_reach_every_subscriber():
+    async def scenario():
+        everything = admin_events.subscribe()
+        inquiries = admin_events.subscribe({"contact_inquiry"})
+        try:
+            await asyncio.to_thread(commit, inquiry(), enrollment(), booking())
+            return await everything.next_batch(), await inquiries.next_batch()
+        finally:
+            admin_events.unsubscribe(everything)
+            admin_events.unsubscribe(inquiries)
+
+    everything, inquiries = (items(batch) for batch in asyncio.run(scenario()))
+    assert sorted(item["type"] for item in everything) == ["consultation", "contact_inquiry", "enrollment"]
+    assert all(item["id"] for item in everything)
+    assert [item["type"] for item in inquiries] == ["contact_inquiry"]
+    scheduled = next(item for item in everything if item["type"] == "consultation")
+    assert (scheduled["scheduled_date"], scheduled["scheduled_time"]) == ("2026-03-02", "10:00")
+
+
+def test_rolled_back_rows_are_not_announced():
+    async def scenario():
+        subscription = admin_events.subscribe()
+        try:
+            await asyncio.to_thread(commit, inquiry("Ghost"), rollback=True)
+            await asyncio.to_thread(commit, inquiry("Real"))
+            return await subscription.next_batch()
+        finally:
+            admin_events.unsubscribe(subscription)
+
+    assert [item["name"] for item in items(asyncio.run(scenario()))] == ["Real"]
+
+
+def test_stream_formats_server_sent_events():
+    async def scenario():
+        response = await stream_admin_events(types="enrollment", last_event_id=None, current_user=None)
+        body = response.body_iterator
+        chunks = [await body.__anext__()]
+        await asyncio.to_thread(commit, inquiry(), enrollment())
+        chunks.append(await body.__anext__())
+        await body.aclose()
+        return response, chunks
+
+    response, (retry, chunk) = asyncio.run(scenario())
+    assert response.media_type == "text/event-stream"
+    assert retry.startswith("retry:")
+    id_line, event_line, data_line = chunk.strip().split("\n")
+    assert id_line.startswith("id: ")
+    assert event_line == "event: enrollment"
+    assert json.loads(data_line[len("data: "):])["course_title"] == "Options 101"
+
+
+def test_reconnecting_dashboards_get_missed_events_or_a_reload():
+    async def scenario():
+        first = admin_events.subscribe({"contact_inquiry"})
+        await asyncio.to_thread(commit, inquiry("Seen"))
+        [(seen_id, _)] = await first.next_batch()
+        admin_events.unsubscribe(first)
+        await asyncio.to_thread(commit, inquiry("Missed"), enrollment())
+
+        resumed = admin_events.subscribe({"contact_inquiry"}, last_event_id=seen_id)
+        replayed = await resumed.next_batch()
+        elsewhere = admin_events.subscribe(last_event_id="another-worker-7")
+        await elsewhere.next_batch()
+        admin_events.resync()  # the LISTEN connection was re-established
+        await resumed.next_batch()
+        stale = admin_events.subscribe(last_event_id=replayed[-1][0])
+        await stale.next_batch()
+        for subscription in (resumed, elsewhere, stale):
+            admin_events.unsubscribe(subscription)
+        return replayed, resumed.lagged, elsewhere.lagged, stale.lagged
+
+    replayed, *lagged = asyncio.run(scenario())
+    assert [item["name"] for item in items(replayed)] == ["Missed"]
+    assert lagged == [True, True, True]
+
+
+def test_listener_reports_reconnects_only():
+    reconnects = []
+    listener = PostgresListener(engine, CHANNEL, print, on_reconnect=lambda: reconnects.append(1))
+    listener._listening()
+    assert reconnects == []
+    listener._listening()
+    assert reconnects == [1]
+
+
+def test_stream_requires_an_admin():
+    assert TestClient(app).get("/api/v1/admin/events/stream").status_code == 401
@@ -0,0 +1,144 @@
+from datetime import date, datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database.database import Base
+from app.core.security import create_access_token
+from app.models.user import User, UserRole
+from app.models.course import Course, CourseLevel, CourseCategory
+from app.models.enrollment import Enrollment, EnrollmentStatus
+from app.models.analytics import EnrollmentDailyRollup
+from app.utils import analytics
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        analytics.report_cache.clear()
+        for table in reversed(Base.metadata.sorted_tables):
+            with engine.begin() as conn:
+                conn.execute(table.delete())
+
+
+def seed(db):
+    admin = User(
+        email="admin@example.com", username="admin", full_name="Admin", hashed_password="x",
+        role=UserRole.ADMIN, is_verified=True
+    )
+    db.add(admin)
+    db.flush()
+    courses = [
+        Course(
+            title=title, slug=title.lower(), description="d", level=CourseLevel.BEGINNER,
+            category=category, duration_weeks=1, price=price, instructor_id=admin.id
+        )
+        for title, category, price in [
+            ("Stocks", CourseCategory.STOCK_MARKET, 100.0),
+            ("Algo", CourseCategory.ALGORITHMIC_TRADING, 300.0),
+        ]
+    ]
+    db.add_all(courses)
+    db.flush()
+    rows = [
+        (courses[0], "Ahmedabad", datetime(2026, 3, 2, 10)),
+        (courses[0], "Surat", datetime(2026, 3, 2, 12)),
+        (courses[1], "Ahmedabad", datetime(2026, 3, 4, 9)),
+        (courses[1], "Ahmedabad", datetime(2026, 3, 10, 9)),
+    ]
+    enrollments = [
+        Enrollment(
+            user_id=admin.id, course_id=course.id, student_name="S", student_email="s@example.com",
+            student_phone="1", student_city=city, course_title=course.title, course_price=str(course.price),
+            payment_amount=course.price, enrolled_at=enrolled_at
+        )
+        for course, city, enrolled_at in rows
+    ]
+    db.add_all(enrollments)
+    db.commit()
+    return admin, courses, enrollments
+
+
+def test_reports_come_from_rollups(db):
+    _, courses, _ = seed(db)
+    assert analytics.refresh_rollups(db) == -1
+
+    daily = analytics.enrollments_over_time(db)
+    assert [(b["period_start"], b["enrollments"]) for b in daily] == [
+        (date(2026, 3, 2), 2), (date(2026, 3, 4), 1), (date(2026, 3, 10), 1)
+    ]
+    weekly = analytics.enrollments_over_time(db, bucket="week")
+    assert [(b["period_start"], b["enrollments"]) for b in weekly] == [
+        (date(2026, 3, 2), 3), (date(2026, 3, 9), 1)
+    ]
+    by_category = analytics.revenue_breakdown(db, group_by="category")
+    assert by_category[0] == {"key": "algorithmic_trading", "label": "algorithmic_trading",
+                              "enrollments": 2, "revenue": 600.0}
+    assert analytics.city_distribution(db)[0] == {"city": "Ahmedabad", "enrollments": 3}
+
+
+def test_incremental_refresh_only_recomputes_touched_days(db):
+    _, _, enrollments = seed(db)
+    analytics.refresh_rollups(db)
+
+    enrollments[2].status = EnrollmentStatus.CANCELLED
+    db.commit()
+    # Every enrollment is still inside the overlap window, so all three
+    # days are dirty; the rollup must reflect the status change.
+    assert analytics.refresh_rollups(db) == 3
+    funnel = {step["status"]: step["enrollments"] for step in analytics.status_funnel(db)}
+    assert funnel["cancelled"] == 1
+    assert funnel["active"] == 3
+    revenue = analytics.revenue_breakdown(db)
+    assert {row["label"]: row["revenue"] for row in revenue} == {"Stocks": 200.0, "Algo": 300.0}
+    assert db.query(EnrollmentDailyRollup).count() == 4
+
+
+def test_only_the_first_refresher_creates_the_state_row(db):
+    other = TestingSessionLocal()
+    assert analytics._create_state(other, datetime(2026, 3, 1)) is True
+    other.commit()
+    other.close()
+
+    # The row already exists: no duplicate insert, and the refresh is incremental
+    assert analytics._create_state(db, datetime(2026, 3, 2)) is False
+    db.rollback()
+    assert analytics.refresh_rollups(db) == 0
+
+
+def test_analytics_endpoints_are_admin_only(db, use_test_db):
+    admin, _, _ = seed(db)
+    analytics.refresh_rollups(db)
+    token = create_access_token({"sub": admin.email, "user_id": admin.id})
+
+    use_test_db(TestingSessionLocal)
+    client = TestClient(app)
+    assert client.get("/api/v1/analytics/funnel").status_code in (401, 403)
+    response = client.get(
+        "/api/v1/analytics/revenue", params={"group_by": "course"},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 200
+    assert {row["label"] for row in response.json()} == {"Stocks", "Algo"}
+
+
+def test_days_are_bucketed_in_utc_on_postgres():
+    from sqlalchemy import select
+    from sqlalchemy.dialects import postgresql
+    sql = str(select(analytics.utc_date(Enrollment.enrolled_at)).compile(dialect=postgresql.dialect()))
+    assert "CAST(timezone('UTC', enrollments.enrolled_at) AS DATE)" in sql
+
+
+def test_refresher_updates_rollups_in_the_background(db):
+    seed(db)
+    refresher = analytics.RollupRefresher(TestingSessionLocal, interval_seconds=60)
+    refresher.start()
+    refresher.stop()
+    assert analytics.enrollments_over_time(db)[0]["enrollments"] == 2
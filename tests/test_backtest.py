@@ -0,0 +1,171 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.database.database import Base
+from app.models.user import User, UserRole
+from app.utils import backtest, candles
+from app.utils.backtest import BacktestError, UserJobLimiter, _hold, resolve_params, simulate, summarize, trade_returns
+from app.utils.candles import CandleStore
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+def random_walk(n, seed=3):
+    return 1000 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0, 0.002, n)))
+
+
+def test_hold_forward_fills_entries_until_exits():
+    entries = np.array([0, 1, 0, 1, 0, 0, 0, 1, 0], dtype=bool)
+    exits = np.array([1, 0, 0, 0, 1, 1, 0, 0, 0], dtype=bool)
+    assert _hold(entries, exits).tolist() == [0, 1, 1, 1, 0, 0, 0, 1, 1]
+
+
+def test_simulation_matches_a_bar_by_bar_loop():
+    close = random_walk(2000)
+    position = np.sign(np.sin(np.arange(2000) / 37.0)).clip(0, None)
+    result = simulate(close, position, cost_bps=5)
+
+    equity, previous = 1.0, 0.0
+    for i in range(len(close)):
+        bar = previous * (close[i] / close[i - 1] - 1) if i else 0.0
+        bar -= abs(position[i] - previous) * 5 / 10_000
+        equity *= 1 + bar
+        previous = position[i]
+    assert result["equity"][-1] == pytest.approx(equity, rel=1e-9)
+
+    held = np.array([0, 1, 1, 0, 0, -1, -1, 1])
+    net = np.array([0, 0.1, -0.05, 0.01, 0.0, 0.02, 0.02, 0.1])
+    np.testing.assert_allclose(trade_returns(held, net), [1.1 * 0.95 - 1, 1.02 * 1.02 - 1, 0.1])
+
+
+def test_summary_metrics():
+    close = np.array([100, 110, 99, 108.9, 120.0])
+    position = np.array([1, 1, 0, 1, 0.0])
+    timestamps = np.arange(5, dtype=np.int64)
+    result = summarize(timestamps, close, position, "1d", cost_bps=0, curve_points=3)
+    assert result["total_return"] == pytest.approx(1.1 * 0.9 * (120 / 108.9) - 1)
+    assert result["max_drawdown"] == pytest.approx(-0.1)
+    assert result["trades"] == 2
+    assert result["win_rate"] == 0.5
+    assert result["equity_curve"]["timestamp"] == [0, 2, 4]
+
+
+def test_user_job_limiter():
+    limiter = UserJobLimiter(max_per_user=2)
+    assert limiter.acquire(1) and limiter.acquire(1)
+    assert not limiter.acquire(1)
+    assert limiter.acquire(2)
+    limiter.release(1)
+    assert limiter.acquire(1)
+
+
+@pytest.mark.parametrize("strategy, params", [
+    ("sma_crossover", {"fast": 0}),
+    ("sma_crossover", {"fast": 2.5}),
+    ("sma_crossover", {"fast": 30, "slow": 30}),
+    ("macd_signal", {"signal": 0}),
+    ("rsi_reversion", {"period": 0}),
+    ("rsi_reversion", {"lower": 101}),
+    ("bollinger_breakout", {"width": float("nan")}),
+])
+def test_invalid_parameters_are_rejected(strategy, params):
+    with pytest.raises(BacktestError):
+        resolve_params(strategy, params)
+
+
+def test_timed_out_backtest_releases_waiters_but_keeps_the_user_slot(tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    close = random_walk(100)
+    store.import_columns("NSE:1", "5m", {
+        "timestamp": 1_700_000_000 + 300 * np.arange(100, dtype=np.int64),
+        "open": close, "high": close, "low": close, "close": close, "volume": np.ones(100),
+    })
+    finish = threading.Event()
+    pool = ThreadPoolExecutor(1)
+    monkeypatch.setattr(backtest, "backtest_pool", lambda: pool)
+    monkeypatch.setattr(backtest, "run_backtest", lambda *args: finish.wait(10) and {})
+    monkeypatch.setattr(backtest, "user_limiter", UserJobLimiter(max_per_user=1))
+    monkeypatch.setattr(backtest, "result_cache", backtest.ReportCache(ttl_seconds=60))
+    monkeypatch.setattr(settings, "backtest_timeout_seconds", 0.05)
+
+    async def first_and_joined():
+        run = lambda: backtest.run_cached(store, "NSE:1", "5m", None, None, "rsi_reversion", {}, 0, user_id=7)
+        return await asyncio.gather(run(), run(), return_exceptions=True)
+
+    first, joined = asyncio.run(first_and_joined())
+    assert isinstance(first, asyncio.TimeoutError) and isinstance(joined, asyncio.TimeoutError)
+    assert not backtest.user_limiter.acquire(7)
+    finish.set()
+    pool.shutdown(wait=True)
+    assert backtest.user_limiter.acquire(7)
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch, use_test_db):
+    store = CandleStore(str(tmp_path))
+    close = random_walk(20_000)
+    store.import_columns("NSE:26000", "5m", {
+        "timestamp": 1_700_000_000 + 300 * np.arange(20_000, dtype=np.int64),
+        "open": close, "high": close, "low": close, "close": close, "volume": np.ones(20_000),
+    })
+    monkeypatch.setattr(candles, "candle_store", store)
+    monkeypatch.setattr(backtest, "result_cache", backtest.ReportCache(ttl_seconds=60))
+
+    db = TestingSessionLocal()
+    user = User(email="algo@example.com", username="algo", full_name="Algo", hashed_password="x",
+                role=UserRole.STUDENT, is_verified=True)
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": user.email, "user_id": user.id})
+    db.close()
+
+    use_test_db(TestingSessionLocal)
+    yield TestClient(app), {"Authorization": f"Bearer {token}"}
+    backtest.shutdown_backtest_pool()
+    with engine.begin() as conn:
+        conn.execute(User.__table__.delete())
+
+
+def test_backtest_endpoint_runs_in_pool_and_caches(api):
+    client, headers = api
+    body = {"symbol": "nse:26000", "interval": "5m", "strategy": "sma_crossover",
+            "params": {"fast": 20, "slow": 50}, "cost_bps": 2}
+    first = client.post("/api/v1/backtests", json=body, headers=headers)
+    assert first.status_code == 200
+    result = first.json()
+    assert result["bars"] == 20_000 and result["cached"] is False
+    assert result["params"] == {"fast": 20, "slow": 50, "allow_short": 0}
+    assert len(result["equity_curve"]["equity"]) == 500
+
+    second = client.post("/api/v1/backtests", json=body, headers=headers).json()
+    assert second["cached"] is True
+    assert second["total_return"] == result["total_return"]
+
+    ranged = client.post("/api/v1/backtests", headers=headers, json={
+        **body, "start": "2023-11-20T00:00:00Z", "end": "2023-11-25T00:00:00Z"
+    }).json()
+    assert ranged["bars"] == 5 * 288  # 5-minute bars for five days
+
+    assert client.post("/api/v1/backtests", json={**body, "strategy": "martingale"},
+                       headers=headers).status_code == 400
+    assert client.post("/api/v1/backtests", json={**body, "params": {"lookback": 5}},
+                       headers=headers).status_code == 400
+    assert client.post("/api/v1/backtests", json={**body, "symbol": "NSE:1"},
+                       headers=headers).status_code == 404
+    assert {s["name"] for s in client.get("/api/v1/backtests/strategies").json()} == set(backtest.STRATEGIES)
+
+
+def test_backtests_are_limited_per_user(api, monkeypatch):
+    client, headers = api
+    monkeypatch.setattr(backtest, "user_limiter", UserJobLimiter(max_per_user=0))
+    response = client.post("/api/v1/backtests", headers=headers, json={
+        "symbol": "NSE:26000", "interval": "5m", "strategy": "rsi_reversion"
+    })
+    assert response.status_code == 429
@@ -0,0 +1,169 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.security import create_access_token
+from app.database.database import Base
+from app.models.user import User, UserRole
+from app.utils import candles
+from app.utils.candles import CandleStore, bollinger, ema, macd, rsi, sma, to_epoch
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CandleStore(str(tmp_path))
+    monkeypatch.setattr(candles, "candle_store", store)
+    monkeypatch.setattr("app.api.v1.endpoints.candles.candle_store", store)
+    return store
+
+
+def random_walk(n, seed=7):
+    return 1000 + np.cumsum(np.random.default_rng(seed).normal(0, 2, n))
+
+
+def reference_ema(values, period, alpha=None):
+    alpha = 2 / (period + 1) if alpha is None else alpha
+    result = [np.nan] * len(values)
+    result[period - 1] = sum(values[:period]) / period
+    for i in range(period, len(values)):
+        result[i] = alpha * values[i] + (1 - alpha) * result[i - 1]
+    return np.array(result)
+
+
+def test_indicators_match_reference_loops():
+    close = random_walk(5000)
+    np.testing.assert_allclose(ema(close, 20), reference_ema(close, 20), rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(ema(close, 2), reference_ema(close, 2), rtol=1e-10, equal_nan=True)
+
+    expected_sma = np.array([np.nan] * 19 + [close[i - 19:i + 1].mean() for i in range(19, len(close))])
+    np.testing.assert_allclose(sma(close, 20), expected_sma, rtol=1e-10, equal_nan=True)
+
+    bands = bollinger(close, 20, 2.0)
+    expected_std = np.array([close[i - 19:i + 1].std() for i in range(19, len(close))])
+    np.testing.assert_allclose(bands["upper"][19:] - bands["middle"][19:], 2 * expected_std, rtol=1e-6)
+
+    change = np.diff(close)
+    gain = reference_ema(np.clip(change, 0, None), 14, alpha=1 / 14)
+    loss = reference_ema(np.clip(-change, 0, None), 14, alpha=1 / 14)
+    np.testing.assert_allclose(rsi(close, 14)[1:], 100 - 100 / (1 + gain / loss), rtol=1e-9, equal_nan=True)
+
+    result = macd(close)
+    line = reference_ema(close, 12) - reference_ema(close, 26)
+    np.testing.assert_allclose(result["macd"], line, rtol=1e-9, equal_nan=True)
+    assert np.isnan(result["signal"][:33]).all() and not np.isnan(result["signal"][33:]).any()
+
+
+def test_naive_datetimes_are_read_as_utc():
+    assert to_epoch(datetime(1970, 1, 1, 0, 1)) == 60
+    assert to_epoch(datetime(1970, 1, 1, 5, 31, tzinfo=timezone(timedelta(hours=5, minutes=30)))) == 60
+    assert to_epoch(None) is None
+
+
+def test_import_merges_and_serves_ranges(store, use_test_db):
+    first = "timestamp,open,high,low,close,volume\n" + "".join(
+        f"{1_699_999_980 + 60 * i},{100 + i},{101 + i},{99 + i},{100.5 + i},{10 * i}\n" for i in range(10)
+    )
+    # Overlapping import: the newer row wins, extra rows are appended
+    second = "Timestamp,Open,High,Low,Close,Volume\n2023-11-14T22:22:00Z,1,1,1,1,1\n" \
+             "2023-11-14T22:30:00Z,2,2,2,2,2\n"
+    admin = TestingSessionLocal()
+    user = User(email="quant@example.com", username="quant", full_name="Quant", hashed_password="x",
+                role=UserRole.ADMIN, is_verified=True)
+    admin.add(user)
+    admin.commit()
+    token = create_access_token({"sub": user.email, "user_id": user.id})
+    admin.close()
+
+    use_test_db(TestingSessionLocal)
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token}"}
+    for body in (first, second):
+        response = client.post("/api/v1/candles/nse:2885/1m", headers=headers,
+                               files={"file": ("bars.csv", io.BytesIO(body.encode()), "text/csv")})
+        assert response.status_code == 200
+    assert response.json()["rows"] == 11
+    bad = client.post("/api/v1/candles/NSE:2885/1m", headers=headers,
+                      files={"file": ("bars.csv", io.BytesIO(b"time,price\n1,2\n"), "text/csv")})
+    assert bad.status_code == 400
+
+    ranged = client.get("/api/v1/candles/NSE:2885/1m", params={
+        "start": "2023-11-14T22:15:00Z", "end": "2023-11-14T22:22:00Z"
+    }).json()
+    assert ranged["timestamp"] == [1_699_999_980 + 60 * i for i in range(2, 10)]
+    assert ranged["close"][-1] == 1.0
+
+    binary = client.get("/api/v1/candles/NSE:2885/1m", params={"format": "binary"})
+    assert binary.headers["x-columns"] == "timestamp,open,high,low,close,volume"
+    columns = np.frombuffer(binary.content, dtype="<f8").reshape(6, int(binary.headers["x-rows"]))
+    assert columns[0, -1] == 1_699_999_980 + 60 * 17 and columns[4, -1] == 2.0
+
+    assert client.get("/api/v1/candles/NSE:9999/1m").status_code == 404
+    assert client.get("/api/v1/candles").json() == [{"symbol": "NSE:2885", "interval": "1m"}]
+
+
+def test_indicator_results_are_cached_per_series_version(store):
+    timestamps = 1_700_000_000 + 60 * np.arange(300, dtype=np.int64)
+    close = random_walk(300)
+    columns = {"timestamp": timestamps, "open": close, "high": close, "low": close, "close": close,
+               "volume": np.ones(300)}
+    store.import_columns("NSE:2885", "1m", columns)
+
+    client = TestClient(app)
+    response = client.get("/api/v1/candles/NSE:2885/1m/indicators/sma", params={"period": 5})
+    body = response.json()
+    assert body["sma"][:4] == [None] * 4
+    assert body["sma"][4] == pytest.approx(close[:5].mean())
+
+    _, first = store.indicator("NSE:2885", "1m", "sma", {"period": 5})
+    _, again = store.indicator("NSE:2885", "1m", "sma", {"period": 5})
+    assert again is first
+
+    store.import_columns("NSE:2885", "1m", {name: values[:1] * 0 + (values[:1] if name == "timestamp" else 5.0)
+                                            for name, values in columns.items()})
+    _, refreshed = store.indicator("NSE:2885", "1m", "sma", {"period": 5})
+    assert refreshed is not first
+    assert refreshed["sma"][4] == pytest.approx((5.0 + close[1:5].sum()) / 5)
+
+    unknown = client.get("/api/v1/candles/NSE:2885/1m/indicators/vwap")
+    assert unknown.status_code == 404
+
+
+def minute_bars(start, count, price=1.0):
+    timestamps = 1_700_000_000 + 60 * np.arange(start, start + count, dtype=np.int64)
+    prices = np.full(count, price)
+    return {"timestamp": timestamps, "open": prices, "high": prices, "low": prices, "close": prices,
+            "volume": prices}
+
+
+def test_concurrent_imports_keep_every_row(tmp_path):
+    stores = [CandleStore(str(tmp_path)) for _ in range(4)]
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: stores[i % 4].import_columns("NSE:2885", "1m", minute_bars(i * 10, 10)), range(16)))
+
+    series = CandleStore(str(tmp_path)).load("NSE:2885", "1m")
+    assert len(series) == 160
+    assert np.all(np.diff(series.timestamp) == 60)
+    # The series is a link to one complete version; only it and its predecessor remain
+    series_dir = tmp_path / "NSE:2885"
+    assert os.path.islink(series_dir / "1m")
+    assert len([name for name in os.listdir(series_dir) if name.startswith(".1m.v")]) == 2
+
+
+def test_import_replaces_a_plain_series_directory(tmp_path):
+    path = tmp_path / "NSE:2885" / "1m"
+    path.mkdir(parents=True)
+    for name, values in minute_bars(0, 5).items():
+        np.save(path / f"{name}.npy", values)
+    store = CandleStore(str(tmp_path))
+    assert len(store.load("NSE:2885", "1m")) == 5
+
+    assert store.import_columns("NSE:2885", "1m", minute_bars(5, 5, price=2.0)) == 10
+    assert os.path.islink(path)
+    assert store.load("NSE:2885", "1m").close[-1] == 2.0
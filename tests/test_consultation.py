@@ -0,0 +1,107 @@
+import asyncio
+import time as clock
+from datetime import date, datetime, time, timedelta
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database.database import Base
+from app.api.v1.endpoints import consultation as consultation_endpoints
+from app.models import consultation
+from app.utils import consultation_slots
+from app.utils.consultation_slots import get_availability, slot_times
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(consultation.Base.metadata, Base.metadata)  # jobs, for the queued emails
+
+BOOKING_DAY = date.today() + timedelta(days=7)
+
+
+@pytest.fixture
+def client(monkeypatch, use_test_db):
+    monkeypatch.setattr(consultation_endpoints, "send_email", lambda *args, **kwargs: True)
+    use_test_db(TestingSessionLocal)
+    yield TestClient(app)
+    with engine.begin() as conn:
+        conn.execute(consultation.ConsultationSchedule.__table__.delete())
+
+
+def booking(time_str="11:00", **overrides):
+    payload = {
+        "name": "Client", "email": "client@example.com", "phone": "9999999999",
+        "date": BOOKING_DAY.isoformat(), "time": time_str,
+    }
+    payload.update(overrides)
+    return payload
+
+
+def test_slot_cannot_be_double_booked(client):
+    first = client.post("/api/v1/consultation/schedule-consultation", json=booking())
+    assert first.status_code == 200
+    assert first.json()["email_queued"] is True
+    assert first.json()["email_sent"] is True
+    second = client.post(
+        "/api/v1/consultation/schedule-consultation", json=booking(email="other@example.com")
+    )
+    assert second.status_code == 409
+
+
+def test_off_grid_or_malformed_times_are_rejected(client):
+    assert client.post(
+        "/api/v1/consultation/schedule-consultation", json=booking("11:07")
+    ).status_code == 400
+    assert client.post(
+        "/api/v1/consultation/schedule-consultation", json=booking(date="next tuesday")
+    ).status_code == 400
+
+
+def test_availability_excludes_booked_and_past_slots(client):
+    client.post("/api/v1/consultation/schedule-consultation", json=booking("11:00"))
+    response = client.get(
+        "/api/v1/consultation/availability",
+        params={"start": BOOKING_DAY.isoformat(), "end": (BOOKING_DAY + timedelta(days=1)).isoformat()}
+    )
+    assert response.status_code == 200
+    days = response.json()
+    assert [day["day"] for day in days] == [BOOKING_DAY.isoformat(), (BOOKING_DAY + timedelta(days=1)).isoformat()]
+    assert "11:00" not in days[0]["slots"]
+    assert len(days[0]["slots"]) == len(slot_times()) - 1
+    assert len(days[1]["slots"]) == len(slot_times())
+
+    db = TestingSessionLocal()
+    midday = datetime.combine(BOOKING_DAY, time(12, 10))
+    today = get_availability(db, BOOKING_DAY, BOOKING_DAY, now=midday)[BOOKING_DAY]
+    db.close()
+    assert all(slot > time(12, 10) for slot in today)
+
+
+def test_booking_does_not_block_the_event_loop(client, monkeypatch):
+    real_book = consultation_slots.book_consultation
+
+    def slow_book(db, consultation):
+        clock.sleep(0.5)  # a slow database round-trip
+        return real_book(db, consultation)
+
+    monkeypatch.setattr(consultation_endpoints, "book_consultation", slow_book)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            bookings = [
+                asyncio.create_task(http.post(
+                    "/api/v1/consultation/schedule-consultation",
+                    json=booking(slot.strftime("%H:%M"), email=f"c{i}@example.com")
+                ))
+                for i, slot in enumerate(slot_times()[:4])
+            ]
+            await asyncio.sleep(0.05)
+            started = clock.perf_counter()
+            health = await http.get("/health")
+            health_latency = clock.perf_counter() - started
+            responses = await asyncio.gather(*bookings)
+        return health, health_latency, responses
+
+    health, health_latency, responses = asyncio.run(scenario())
+    assert health.status_code == 200
+    assert health_latency < 0.25
+    assert [r.status_code for r in responses] == [200] * 4
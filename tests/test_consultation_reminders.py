@@ -0,0 +1,150 @@
+from datetime import date, time, timedelta
+import pytest
+from sqlalchemy import event
+from app.core.config import settings
+from app.models import consultation
+from app.models.consultation import ConsultationSchedule
+from app.utils.consultation_reminders import ReminderScheduler
+from app.utils.consultation_slots import reminder_time, slot_start_utc
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(consultation.Base.metadata)
+
+DAY = date(2026, 3, 2)
+START = slot_start_utc(DAY, time(10, 0)) - timedelta(hours=2)
+
+
+class Mailbox:
+    def __init__(self, fail_for=()):
+        self.sent = []
+        self.fail_for = set(fail_for)
+        self.now = None
+
+    def __call__(self, messages):
+        results = []
+        for to_email, subject, body in messages:
+            ok = to_email not in self.fail_for
+            if ok:
+                self.sent.append((self.now, to_email, subject, body))
+            results.append(ok)
+        return results
+
+    def to(self, email):
+        return [entry for entry in self.sent if entry[1] == email]
+
+
+@pytest.fixture(autouse=True)
+def clean(monkeypatch):
+    monkeypatch.setattr(settings, "consultation_reminder_refresh_seconds", 600)
+    yield
+    with engine.begin() as conn:
+        conn.execute(ConsultationSchedule.__table__.delete())
+
+
+def book(slot: time, email: str, status="scheduled"):
+    db = TestingSessionLocal()
+    booking = ConsultationSchedule(
+        name=email.split("@")[0], email=email, phone="9999999999", preferred_date=DAY.isoformat(),
+        preferred_time=slot.strftime("%H:%M"), scheduled_date=DAY, scheduled_time=slot,
+        remind_at=reminder_time(DAY, slot), status=status,
+    )
+    db.add(booking)
+    db.commit()
+    db.close()
+
+
+def run(schedulers, mailbox, minutes, start=START, on_minute=None):
+    """Fast-forward the clock minute by minute, ticking every scheduler"""
+    for minute in range(minutes):
+        now = start + timedelta(minutes=minute)
+        mailbox.now = now
+        if on_minute:
+            on_minute(minute)
+        for scheduler in schedulers:
+            scheduler.tick(now)
+
+
+def test_each_reminder_is_sent_once_on_time_by_competing_workers():
+    slots = [time(10, 0), time(10, 30), time(11, 0), time(11, 30), time(13, 0)]
+    for i, slot in enumerate(slots):
+        book(slot, f"client{i}@example.com")
+    book(time(12, 0), "cancelled@example.com", status="cancelled")
+
+    mailbox = Mailbox()
+    workers = [ReminderScheduler(TestingSessionLocal, owner=name, send=mailbox) for name in ("a", "b", "c")]
+    run(workers, mailbox, minutes=5 * 60)
+
+    for i, slot in enumerate(slots):
+        received = mailbox.to(f"client{i}@example.com")
+        assert len(received) == 1
+        assert received[0][0] == reminder_time(DAY, slot)
+    assert mailbox.to("cancelled@example.com") == []
+    digests = mailbox.to(settings.admin_email)
+    assert sum(body.count("• ") for _, _, _, body in digests) == len(slots)
+
+
+def test_idle_ticks_do_not_touch_the_database():
+    book(time(10, 0), "client@example.com")
+    mailbox = Mailbox()
+    scheduler = ReminderScheduler(TestingSessionLocal, owner="a", send=mailbox)
+    start = reminder_time(DAY, time(10, 0)) - timedelta(minutes=59)
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        run([scheduler], mailbox, minutes=1, start=start)  # first tick loads the window
+        loaded = len(statements)
+        run([scheduler], mailbox, minutes=9, start=start + timedelta(minutes=1))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(scheduler) == 1
+    assert loaded > 0 and len(statements) == loaded
+
+
+def test_late_bookings_are_picked_up_on_refresh(monkeypatch):
+    monkeypatch.setattr(settings, "consultation_reminder_refresh_seconds", 60)
+    mailbox = Mailbox()
+    scheduler = ReminderScheduler(TestingSessionLocal, owner="a", send=mailbox)
+    # Booked after the scheduler loaded the window its reminder falls into
+    run([scheduler], mailbox, minutes=3 * 60,
+        on_minute=lambda minute: minute == 30 and book(time(10, 30), "late@example.com"))
+    assert [entry[0] for entry in mailbox.to("late@example.com")] == [reminder_time(DAY, time(10, 30))]
+
+
+def test_reminders_of_a_crashed_worker_are_sent_after_its_lease(monkeypatch):
+    monkeypatch.setattr(settings, "consultation_reminder_refresh_seconds", 60)
+    book(time(10, 0), "client@example.com")
+    due = reminder_time(DAY, time(10, 0))
+    mailbox = Mailbox()
+
+    def crash(messages):
+        raise RuntimeError("worker killed mid-send")
+
+    crashed = ReminderScheduler(TestingSessionLocal, owner="crashed", send=crash)
+    survivor = ReminderScheduler(TestingSessionLocal, owner="survivor", send=mailbox)
+    with pytest.raises(RuntimeError):
+        crashed.tick(due)
+    run([survivor], mailbox, minutes=10, start=due)
+
+    received = mailbox.to("client@example.com")
+    assert len(received) == 1
+    lease = timedelta(seconds=settings.consultation_reminder_lease_seconds)
+    assert due + lease <= received[0][0] <= due + lease + timedelta(minutes=1)
+
+
+def test_failed_sends_are_retried_while_timely(monkeypatch):
+    monkeypatch.setattr(settings, "consultation_reminder_refresh_seconds", 60)
+    book(time(10, 0), "bouncy@example.com")
+    mailbox = Mailbox(fail_for={"bouncy@example.com"})
+    scheduler = ReminderScheduler(TestingSessionLocal, owner="a", send=mailbox)
+    due = reminder_time(DAY, time(10, 0))
+    run([scheduler], mailbox, minutes=3, start=due)
+    assert mailbox.to("bouncy@example.com") == []
+
+    mailbox.fail_for.clear()
+    run([scheduler], mailbox, minutes=3, start=due + timedelta(minutes=3))
+    assert len(mailbox.to("bouncy@example.com")) == 1
+
+    db = TestingSessionLocal()
+    assert db.query(ConsultationSchedule).one().reminder_sent_at is not None
+    db.close()
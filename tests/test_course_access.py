@@ -0,0 +1,133 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.core.security import create_access_token
+from app.database.database import Base
+from app.main import app
+from app.models.course import Course, CourseCategory, CourseFeature, CourseLevel, Lesson
+from app.models.user import User, UserRole
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+@pytest.fixture
+def client(use_test_db):
+    use_test_db(TestingSessionLocal)
+    yield TestClient(app)
+    for table in reversed(Base.metadata.sorted_tables):
+        with engine.begin() as conn:
+            conn.execute(table.delete())
+
+
+def make_user(name, role=UserRole.INSTRUCTOR):
+    db = TestingSessionLocal()
+    user = User(email=f"{name}@example.com", username=name, full_name=name.title(),
+                hashed_password="x", role=role, is_verified=True)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def course_payload(slug, instructor_id):
+    return {"title": slug.title(), "slug": slug, "description": "d", "level": CourseLevel.BEGINNER.value,
+            "category": CourseCategory.STOCK_MARKET.value, "duration_weeks": 4, "price": 100.0,
+            "instructor_id": instructor_id}
+
+
+def auth(user_id):
+    token = create_access_token({"sub": "user", "user_id": user_id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def add_lesson(client, user_id, course_id, order=1):
+    return client.post(f"/api/v1/courses/{course_id}/lessons", headers=auth(user_id),
+                       json={"title": f"Lesson {order}", "order": order})
+
+
+def course_queries(run):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = run()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return response, [s for s in statements if "FROM courses" in s]
+
+
+def test_each_grant_checks_the_course_row_once(client):
+    alice = make_user("alice")
+    course_id = client.post("/api/v1/courses/", headers=auth(alice), json=course_payload("alice", alice)).json()["id"]
+
+    for order in (1, 2):
+        response, queries = course_queries(lambda: add_lesson(client, alice, course_id, order))
+        assert response.status_code == 200
+        assert len(queries) == 1
+    response, _ = course_queries(lambda: client.post(
+        f"/api/v1/courses/{course_id}/features", headers=auth(alice), json={"feature_name": "Live Q&A"}
+    ))
+    assert response.status_code == 200
+
+
+def test_courses_deleted_elsewhere_get_no_orphan_rows(client):
+    alice = make_user("alice")
+    course_id = client.post("/api/v1/courses/", headers=auth(alice), json=course_payload("alice", alice)).json()["id"]
+    assert add_lesson(client, alice, course_id, 1).status_code == 200  # caches {course_id}
+
+    # Another worker's delete does not reach this worker's cache
+    with engine.begin() as conn:
+        conn.execute(Lesson.__table__.delete())
+        conn.execute(Course.__table__.delete())
+
+    assert add_lesson(client, alice, course_id, 2).status_code == 404
+    feature = client.post(f"/api/v1/courses/{course_id}/features", headers=auth(alice),
+                          json={"feature_name": "Live Q&A"})
+    assert feature.status_code == 404
+    db = TestingSessionLocal()
+    assert db.query(Lesson).count() == 0
+    assert db.query(CourseFeature).count() == 0
+    db.close()
+
+
+def test_missing_and_foreign_courses_are_rejected(client):
+    alice, bob = make_user("alice"), make_user("bob")
+    admin = make_user("admin", role=UserRole.ADMIN)
+    course_id = client.post("/api/v1/courses/", headers=auth(alice), json=course_payload("alice", alice)).json()["id"]
+
+    assert add_lesson(client, bob, course_id).status_code == 403
+    assert add_lesson(client, bob, course_id + 1).status_code == 404
+    assert add_lesson(client, admin, course_id + 1).status_code == 404
+    assert add_lesson(client, admin, course_id).status_code == 200
+    assert client.put(f"/api/v1/courses/{course_id}", headers=auth(bob), json={"title": "Mine"}).status_code == 403
+    assert client.get(f"/api/v1/progress/courses/{course_id}", headers=auth(bob)).status_code == 403
+
+
+def test_create_and_delete_invalidate_the_cache(client):
+    alice = make_user("alice")
+    first = client.post("/api/v1/courses/", headers=auth(alice), json=course_payload("first", alice)).json()["id"]
+    assert add_lesson(client, alice, first).status_code == 200  # caches {first}
+
+    second = client.post("/api/v1/courses/", headers=auth(alice), json=course_payload("second", alice)).json()["id"]
+    assert client.get(f"/api/v1/progress/courses/{second}", headers=auth(alice)).status_code == 200
+    assert client.put(f"/api/v1/courses/{second}", headers=auth(alice), json={"title": "Second"}).status_code == 200
+
+    assert client.delete(f"/api/v1/courses/{second}", headers=auth(alice)).status_code == 200
+    assert add_lesson(client, alice, second).status_code == 404
+
+
+def test_reassigned_courses_change_hands(client):
+    alice, bob = make_user("alice"), make_user("bob")
+    course_id = client.post("/api/v1/courses/", headers=auth(alice), json=course_payload("alice", alice)).json()["id"]
+    assert add_lesson(client, alice, course_id, 1).status_code == 200
+    assert add_lesson(client, bob, course_id, 1).status_code == 403
+
+    db = TestingSessionLocal()
+    db.get(Course, course_id).instructor_id = bob
+    db.commit()
+    db.close()
+
+    assert add_lesson(client, alice, course_id, 2).status_code == 403
+    assert add_lesson(client, bob, course_id, 2).status_code == 200
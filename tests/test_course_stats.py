@@ -0,0 +1,126 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database.database import Base
+from app.models.user import User, UserRole
+from app.models.course import Course, CourseStats, Lesson, CourseLevel, CourseCategory
+from app.models.enrollment import Enrollment, EnrollmentStatus
+from app.models.content import Testimonial as TestimonialModel
+from app.utils.course_stats import rebuild_course_stats
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        for table in reversed(Base.metadata.sorted_tables):
+            with engine.begin() as conn:
+                conn.execute(table.delete())
+
+
+def make_course(db, slug="course"):
+    instructor = User(
+        email=f"{slug}@example.com", username=slug, full_name="Instructor",
+        hashed_password="x", role=UserRole.INSTRUCTOR
+    )
+    db.add(instructor)
+    db.flush()
+    course = Course(
+        title=slug.title(), slug=slug, description="desc", level=CourseLevel.BEGINNER,
+        category=CourseCategory.STOCK_MARKET, duration_weeks=4, price=100.0,
+        is_published=True, instructor_id=instructor.id
+    )
+    db.add(course)
+    db.commit()
+    return course, instructor
+
+
+def enroll(db, course, user):
+    enrollment = Enrollment(
+        user_id=user.id, course_id=course.id, student_name="S", student_email="s@example.com",
+        student_phone="1", student_city="Ahmedabad", course_title=course.title,
+        course_price="100", payment_amount=100.0
+    )
+    db.add(enrollment)
+    db.commit()
+    return enrollment
+
+
+def stats_for(db, course_id):
+    return db.query(CourseStats).filter(CourseStats.course_id == course_id).one()
+
+
+def test_stats_row_created_with_course(db):
+    course, _ = make_course(db)
+    stats = stats_for(db, course.id)
+    assert (stats.enrollment_count, stats.lesson_count, stats.rating_count) == (0, 0, 0)
+
+
+def test_stats_follow_inserts_status_changes_and_deletes(db):
+    course, student = make_course(db)
+    enrollment = enroll(db, course, student)
+    db.add_all([Lesson(course_id=course.id, title=f"L{i}", order=i) for i in range(3)])
+    testimonial = TestimonialModel(
+        user_id=student.id, course_id=course.id, title="Great", content="...", rating=4
+    )
+    db.add(testimonial)
+    db.commit()
+
+    stats = stats_for(db, course.id)
+    assert stats.enrollment_count == 1
+    assert stats.lesson_count == 3
+    assert stats.rating_count == 0  # not approved yet
+
+    testimonial.is_approved = True
+    enrollment.status = EnrollmentStatus.CANCELLED
+    db.commit()
+    stats = stats_for(db, course.id)
+    assert stats.enrollment_count == 0
+    assert stats.average_rating == 4.0
+
+    db.delete(db.query(Lesson).filter(Lesson.course_id == course.id).first())
+    db.delete(testimonial)
+    db.commit()
+    stats = stats_for(db, course.id)
+    assert stats.lesson_count == 2
+    assert stats.rating_count == 0
+
+
+def test_rebuild_matches_incremental(db):
+    course, student = make_course(db)
+    enroll(db, course, student)
+    db.add(Lesson(course_id=course.id, title="L", order=1))
+    db.commit()
+    incremental = stats_for(db, course.id)
+    expected = (incremental.enrollment_count, incremental.lesson_count)
+
+    # Simulate drift, then reconcile
+    db.query(CourseStats).delete()
+    db.commit()
+    assert rebuild_course_stats(db) == 1
+    db.commit()
+    rebuilt = stats_for(db, course.id)
+    assert (rebuilt.enrollment_count, rebuilt.lesson_count) == expected
+
+
+def test_catalogue_reads_precomputed_stats(db, use_test_db):
+    course, student = make_course(db)
+    enroll(db, course, student)
+    db.add(Lesson(course_id=course.id, title="L", order=1))
+    db.commit()
+
+    use_test_db(TestingSessionLocal)
+    response = TestClient(app).get("/api/v1/courses/")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert data[0]["enrollment_count"] == 1
+    assert data[0]["total_lessons"] == 1
+    assert data[0]["instructor"]["full_name"] == "Instructor"
@@ -0,0 +1,52 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.database.database import Base
+from app.models.user import User, UserRole
+from app.models.course import Course, Lesson, CourseLevel, CourseCategory
+from app.models.enrollment import Enrollment
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+def test_my_courses_page_is_one_joined_query(use_test_db):
+    db = TestingSessionLocal()
+    student = User(email="me@example.com", username="me", full_name="Me", hashed_password="x",
+                   role=UserRole.INSTRUCTOR)
+    db.add(student)
+    db.flush()
+    for i in range(5):
+        course = Course(
+            title=f"Course {i}", slug=f"course-{i}", description="d", level=CourseLevel.BEGINNER,
+            category=CourseCategory.DAY_TRADING, duration_weeks=2, price=10.0 * i, instructor_id=student.id
+        )
+        db.add(course)
+        db.flush()
+        db.add(Lesson(course_id=course.id, title="Intro", order=1))
+        db.add(Enrollment(
+            user_id=student.id, course_id=course.id, student_name="Me", student_email="me@example.com",
+            student_phone="1", student_city="Vadodara", course_title=course.title, course_price="0",
+            payment_amount=0.0, enrolled_at=datetime(2026, 1, i + 1)
+        ))
+    db.commit()
+    student_id = student.id
+    db.close()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    use_test_db(TestingSessionLocal)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        response = TestClient(app).get(
+            f"/api/v1/enrollments/user/{student_id}/courses", params={"skip": 1, "limit": 2}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    assert len(statements) == 1
+    data = response.json()
+    assert [item["course"]["title"] for item in data] == ["Course 3", "Course 2"]
+    assert data[0]["course"]["total_lessons"] == 1
@@ -0,0 +1,91 @@
+import io
+import boto3
+import pytest
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from PIL import Image
+from app.main import app
+from app.core.security import create_access_token
+from app.database.database import Base
+from app.models.user import User, UserRole
+from app.schemas.course import CourseInstructor
+from app.utils.file_upload import s3_uploader
+from app.utils.images import image_srcset, process_image
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=s3_uploader.bucket_name)
+        monkeypatch.setattr(s3_uploader, "s3_client", client)
+        yield client
+
+
+def jpeg_bytes(size=(800, 600), color=(10, 120, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_avatar_upload_generates_square_variants(s3, use_test_db):
+    db = TestingSessionLocal()
+    user = User(email="avatar@example.com", username="avatar", full_name="Avatar",
+                hashed_password="x", role=UserRole.STUDENT)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    use_test_db(TestingSessionLocal)
+    token = create_access_token({"sub": "avatar@example.com", "user_id": user_id})
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/uploads/avatar", headers={"Authorization": f"Bearer {token}"},
+        files={"file": ("me.jpg", jpeg_bytes(), "image/jpeg")}
+    )
+    rejected = client.post(
+        "/api/v1/uploads/avatar", headers={"Authorization": f"Bearer {token}"},
+        files={"file": ("me.jpg", b"not an image", "image/jpeg")}
+    )
+
+    assert response.status_code == 200
+    assert rejected.status_code == 400
+    body = response.json()
+    base = s3_uploader.key_from_url(body["url"]).rsplit("/", 1)[0]
+    variant = s3.get_object(Bucket=s3_uploader.bucket_name, Key=f"{base}/w64.webp")
+    assert variant["ContentType"] == "image/webp"
+    assert Image.open(io.BytesIO(variant["Body"].read())).size == (64, 64)
+    assert body["srcset"]["jpg"].endswith("w256.jpg 256w")
+
+    db = TestingSessionLocal()
+    assert db.get(User, user_id).profile_image_url == body["url"]
+    db.close()
+
+
+def test_variants_are_idempotent_and_never_upscaled(s3):
+    data = jpeg_bytes(size=(500, 250))
+    first = process_image(data, "course_thumbnail")
+    second = process_image(data, "course_thumbnail")
+    assert first["url"] == second["url"]
+    assert (first["generated"], second["generated"]) == (3, 0)
+
+    base = s3_uploader.key_from_url(first["url"]).rsplit("/", 1)[0]
+    small = s3.get_object(Bucket=s3_uploader.bucket_name, Key=f"{base}/w320.jpg")["Body"].read()
+    large = s3.get_object(Bucket=s3_uploader.bucket_name, Key=f"{base}/w1280.jpg")["Body"].read()
+    assert Image.open(io.BytesIO(small)).size == (320, 160)
+    assert Image.open(io.BytesIO(large)).size == (500, 250)
+
+
+def test_srcset_only_for_pipeline_images():
+    assert image_srcset("https://cdn.example.com/legacy/avatar.png", "user_avatar") is None
+    instructor = CourseInstructor(id=1, full_name="I", profile_image_url="https://b/user-avatars/abc/original.png")
+    assert instructor.model_dump()["profile_image_srcset"]["webp"] == (
+        "https://b/user-avatars/abc/w64.webp 64w, https://b/user-avatars/abc/w128.webp 128w, "
+        "https://b/user-avatars/abc/w256.webp 256w"
+    )
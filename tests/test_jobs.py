@@ -0,0 +1,130 @@
+from datetime import timedelta
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.security import verify_password
+from app.database.database import Base
+from app.models.job import Job
+from app.models.user import User
+from app.utils import email as email_utils
+from app.utils.jobs import (
+    DONE, FAILED, JOB_QUEUE_DELAY, QUEUED, JobError, JobWorker, _utcnow, claim, enqueue, job, requeue_stale
+)
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+calls = []
+
+
+@job("test.record")
+def record(db, value, fail_times=0):
+    calls.append(value)
+    if calls.count(value) <= fail_times:
+        raise RuntimeError(f"attempt {calls.count(value)} failed")
+
+
+@pytest.fixture
+def db():
+    calls.clear()
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    for table in reversed(Base.metadata.sorted_tables):
+        with engine.begin() as conn:
+            conn.execute(table.delete())
+
+
+def worker(**kwargs):
+    return JobWorker(TestingSessionLocal, **kwargs)
+
+
+def test_jobs_run_by_priority_and_only_when_due(db):
+    enqueue(db, "test.record", {"value": "low"})
+    enqueue(db, "test.record", {"value": "high"}, priority=10)
+    enqueue(db, "test.record", {"value": "later"}, priority=20, delay=timedelta(hours=1))
+    db.commit()
+
+    before = JOB_QUEUE_DELAY.labels("test.record", "default")._sum.get()
+    assert worker().drain() == 2
+    assert calls == ["high", "low"]
+    assert JOB_QUEUE_DELAY.labels("test.record", "default")._sum.get() > before
+    statuses = {j.payload: j.status for j in db.query(Job)}
+    assert list(statuses.values()).count(DONE) == 2 and QUEUED in statuses.values()
+
+
+def test_uncommitted_jobs_are_not_run(db):
+    enqueue(db, "test.record", {"value": "rolled back"})
+    db.rollback()
+    assert worker().drain() == 0
+    with pytest.raises(JobError):
+        enqueue(db, "test.unknown")
+
+
+def test_failures_retry_with_backoff_then_fail(db, monkeypatch):
+    monkeypatch.setattr(settings, "job_retry_base_seconds", 60)
+    enqueue(db, "test.record", {"value": "flaky", "fail_times": 5}, max_attempts=2)
+    db.commit()
+
+    assert worker().run_once() == "retry"
+    current = db.query(Job).one()
+    assert current.status == QUEUED and current.attempts == 1
+    assert "attempt 1 failed" in current.last_error
+    # Not due again before the backoff (30-60s for the first retry) has passed
+    assert worker().run_once() is None
+
+    current.run_at = _utcnow() - timedelta(seconds=1)
+    db.commit()
+    assert worker().run_once() == "failed"
+    db.expire_all()
+    assert db.query(Job).one().status == FAILED
+
+
+def test_workers_take_disjoint_jobs_and_lanes(db):
+    enqueue(db, "test.record", {"value": "a"})
+    enqueue(db, "test.record", {"value": "b"})
+    enqueue(db, "test.record", {"value": "mail"}, lane="email")
+    db.commit()
+
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    claimed = [claim(first, "w1", ["default"]), claim(second, "w2", ["default"])]
+    assert {j.payload for j in claimed} == {'{"value": "a"}', '{"value": "b"}'}
+    assert claim(first, "w1", ["default"]) is None
+    first.close()
+    second.close()
+
+    assert worker(lanes=["email"]).drain() == 1
+    assert calls == ["mail"]
+
+
+def test_stale_running_jobs_are_requeued(db):
+    enqueue(db, "test.record", {"value": "orphan"})
+    db.commit()
+    claimed = claim(db, "dead-worker")
+    assert claimed.status == "running"
+    assert requeue_stale(db, timeout_seconds=60) == 0
+
+    claimed.locked_at = _utcnow() - timedelta(minutes=5)
+    db.commit()
+    assert requeue_stale(db, timeout_seconds=60) == 1
+    assert claimed.status == QUEUED and "dead-worker" in claimed.last_error
+
+
+def test_enrollment_form_only_enqueues(db, monkeypatch, use_test_db):
+    sent = []
+    monkeypatch.setattr(email_utils, "send_email", lambda to, subject, body, html=None: sent.append(to) or True)
+    use_test_db(TestingSessionLocal)
+    response = TestClient(app).post("/api/v1/enrollments/form", json={
+        "name": "New Student", "email": "new@example.com", "phone": "9999999999", "city": "Pune",
+        "course_title": "Swing Trading", "course_price": "₹15,000",
+    })
+    assert response.status_code == 200
+    assert sent == []
+    assert [j.name for j in db.query(Job)] == ["email.send"]
+    # No password until the user resets it
+    user = db.query(User).filter(User.email == "new@example.com").one()
+    assert user.hashed_password == "" and not verify_password("", user.hashed_password)
+
+    assert worker().drain() == 1
+    assert sent == ["new@example.com"]
@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from app.utils import market_data
+from app.utils.angel_one import LTP_PACKET, parse_ltp_packet, token_list, totp
+from app.utils.market_data import MarketDataHub, MarketFeed, ReplayFeed, Subscription, TickCache
+
+ROWS = [(0, "NSE:2885", 2950.5), (10, "NSE:1594", 1480.0), (20, "NSE:2885", 2951.0)]
+
+
+class RecordingFeed(ReplayFeed):
+    def __init__(self, rows, **kwargs):
+        super().__init__(rows, **kwargs)
+        self.calls = []
+
+    def subscribe(self, symbols):
+        super().subscribe(symbols)
+        self.calls.append(("subscribe", sorted(symbols)))
+
+    def unsubscribe(self, symbols):
+        super().unsubscribe(symbols)
+        self.calls.append(("unsubscribe", sorted(symbols)))
+
+
+@pytest.fixture
+def replay_hub(monkeypatch):
+    hub = MarketDataHub(lambda: ReplayFeed(ROWS, speed=10))
+    monkeypatch.setattr(market_data, "market_hub", hub)
+    return hub
+
+
+def test_tick_cache_grows_and_ignores_stale_ticks():
+    cache = TickCache(capacity=2)
+    for i in range(5):
+        cache.update(f"NSE:{i}", 100.0 + i, 1_000)
+    assert len(cache) == 5
+    assert cache.get("NSE:4").ltp == 104.0
+
+    assert cache.update("NSE:0", 99.0, 2_000)
+    assert not cache.update("NSE:0", 98.0, 1_500)
+    assert cache.get("NSE:0").ltp == 99.0
+    assert cache.get("NSE:9") is None
+    assert [tick.symbol for tick in cache.snapshot(["NSE:9", "NSE:1"])] == ["NSE:1"]
+
+
+def test_subscriptions_are_coalesced_upstream():
+    async def scenario():
+        feed = RecordingFeed(ROWS, speed=10)
+        hub = MarketDataHub(lambda: feed)
+        first, second = Subscription(), Subscription()
+        hub.subscribe(first, ["NSE:2885", "NSE:1594"])
+        hub.subscribe(second, ["NSE:2885"])
+        batches = await asyncio.gather(first.next_batch(), second.next_batch())
+        hub.release(first)
+        upstream_after_first = hub.upstream_symbols
+        hub.release(second)
+        await hub.stop()
+        return feed.calls, batches, upstream_after_first, hub.upstream_symbols
+
+    calls, (first_batch, second_batch), upstream_after_first, upstream = asyncio.run(scenario())
+    assert calls == [
+        ("subscribe", ["NSE:1594", "NSE:2885"]),
+        ("unsubscribe", ["NSE:1594"]),
+        ("unsubscribe", ["NSE:2885"]),
+    ]
+    assert {tick.symbol for tick in second_batch} == {"NSE:2885"}
+    assert first_batch[0].symbol == "NSE:2885"
+    assert upstream_after_first == {"NSE:2885"}
+    assert upstream == set()
+
+
+def test_slow_client_gets_latest_tick_per_symbol():
+    async def scenario():
+        subscription = Subscription()
+        for ltp in (1.0, 2.0, 3.0):
+            subscription.push(market_data.Tick("NSE:2885", ltp, 0))
+        subscription.push(market_data.Tick("NSE:1594", 7.0, 0))
+        return await subscription.next_batch()
+
+    assert {(tick.symbol, tick.ltp) for tick in asyncio.run(scenario())} == {("NSE:2885", 3.0), ("NSE:1594", 7.0)}
+
+
+def test_websocket_streams_replayed_ticks(replay_hub):
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/v1/market/ws") as websocket:
+            websocket.send_json({"action": "subscribe", "symbols": ["nse:2885"]})
+            ticks = websocket.receive_json()
+            assert ticks[0]["symbol"] == "NSE:2885"
+            assert ticks[0]["ltp"] in (2950.5, 2951.0)
+
+        quotes = client.get("/api/v1/market/quotes", params={"symbols": "NSE:2885,NSE:1594"}).json()
+        assert [quote["symbol"] for quote in quotes] == ["NSE:2885"]
+    assert replay_hub.upstream_symbols == set()
+
+
+def test_websocket_rejects_malformed_messages(replay_hub):
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/v1/market/ws") as websocket:
+            for bad in ('["NSE:2885"]', "not json", '{"action": "subscribe", "symbols": "NSE:2885"}'):
+                websocket.send_text(bad)
+                assert "error" in websocket.receive_json()
+            websocket.send_json({"action": "subscribe", "symbols": ["NSE:2885"]})
+            assert websocket.receive_json()[0]["symbol"] == "NSE:2885"
+
+
+def test_processes_without_a_feed_redirect_to_the_market_service(monkeypatch):
+    monkeypatch.setattr(settings, "market_feed", "")
+    monkeypatch.setattr(settings, "market_service_url", "https://market.example.com/")
+    client = TestClient(app)
+    response = client.get("/api/v1/market/stream", params={"symbols": "NSE:2885"}, follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://market.example.com/api/v1/market/stream?symbols=NSE%3A2885"
+    with client.websocket_connect("/api/v1/market/ws") as websocket:
+        assert websocket.receive_json()["url"] == "wss://market.example.com/api/v1/market/ws"
+
+
+def test_stream_without_a_feed_is_unavailable(monkeypatch):
+    monkeypatch.setattr(market_data, "market_hub", MarketDataHub())
+    response = TestClient(app).get("/api/v1/market/stream", params={"symbols": "NSE:2885"})
+    assert response.status_code == 503
+
+
+def test_angel_one_protocol_helpers():
+    packet = LTP_PACKET.pack(1, 1, b"2885", 42, 1_700_000_000_000, 295050)
+    assert parse_ltp_packet(packet) == ("NSE:2885", 2950.5, 1_700_000_000_000)
+    assert token_list({"NSE:2885", "NSE:1594", "BSE:500325", "bogus"}) == [
+        {"exchangeType": 1, "tokens": ["1594", "2885"]},
+        {"exchangeType": 3, "tokens": ["500325"]},
+    ]
+    # RFC 6238 test vector (SHA-1, T=59)
+    assert totp("GEZDGNBVGY3TQOJQGEZDGNBVGY3TQOJQ", for_time=59) == "287082"
+
+
+def test_feeds_must_implement_run():
+    class Silent(MarketFeed):
+        pass
+
+    with pytest.raises(TypeError):
+        Silent()
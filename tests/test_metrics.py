@@ -0,0 +1,36 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.metrics import MetricsMiddleware
+
+client = TestClient(app)
+
+
+def test_metrics_are_labelled_by_route_template():
+    client.get("/api/v1/consultation/availability", params={"start": "not-a-date"})
+    client.get("/definitely/not/a/route")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.text
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/api/v1/consultation/availability",status="422"}'
+        in body
+    )
+    assert 'route="unmatched",status="404"' in body
+    assert "http_response_size_bytes_bucket" in body
+    assert "http_requests_in_flight" in body
+
+
+def test_server_timing_header_when_enabled():
+    debug_app = FastAPI()
+    debug_app.add_middleware(MetricsMiddleware, server_timing=True)
+
+    @debug_app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        return {"item_id": item_id}
+
+    response = TestClient(debug_app).get("/items/3")
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("app;dur=")
+    assert "server-timing" not in client.get("/health").headers
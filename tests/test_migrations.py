@@ -0,0 +1,175 @@
+import os
+from datetime import date, time
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from app.database.database import Base
+from app.models import consultation
+from app.utils.consultation_slots import reminder_time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    engine = create_engine(url)
+    yield engine, config
+    engine.dispose()
+
+
+def legacy_schema(engine, config):
+    """Tables as create_all() left them before any revision (upgrade steps undone)"""
+    Base.metadata.create_all(bind=engine)
+    consultation.Base.metadata.create_all(bind=engine)
+    command.stamp(config, "head")
+    command.downgrade(config, "base")
+
+
+def columns(engine, table):
+    return {column["name"] for column in inspect(engine).get_columns(table)}
+
+
+def indexes(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_upgrade_is_a_noop_on_a_current_schema(database):
+    engine, config = database
+    Base.metadata.create_all(bind=engine)
+    consultation.Base.metadata.create_all(bind=engine)
+    command.upgrade(config, "head")
+    command.upgrade(config, "head")
+
+
+def test_upgrade_skips_a_new_database(database):
+    engine, config = database
+    command.upgrade(config, "head")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+
+
+@pytest.mark.parametrize("stats_table", ["missing", "empty"])
+def test_testimonials_gain_course_id_and_stats_are_backfilled(database, stats_table):
+    engine, config = database
+    legacy_schema(engine, config)
+    with engine.begin() as conn:
+        if stats_table == "missing":
+            conn.execute(text("DROP TABLE course_stats"))
+        conn.execute(text(
+            "INSERT INTO users (id, email, username, full_name, hashed_password) VALUES (1, 'i@x.com', 'i', 'I', 'x')"
+        ))
+        conn.execute(text(
+            "INSERT INTO courses (id, title, slug, description, level, category, duration_weeks, price, instructor_id)"
+            " VALUES (1, 'C', 'c', 'd', 'BEGINNER', 'STOCK_MARKET', 4, 100, 1)"
+        ))
+        conn.execute(text("INSERT INTO lessons (course_id, title, \"order\") VALUES (1, 'L', 1)"))
+        conn.execute(text(
+            "INSERT INTO enrollments (user_id, course_id, student_name, student_email, student_phone, student_city,"
+            " course_title, course_price, payment_amount, status) VALUES (1, 1, 'S', 's@x.com', '1', 'Pune', 'C',"
+            " '100', 100, 'ACTIVE')"
+        ))
+    assert "course_id" not in columns(engine, "testimonials")
+
+    command.upgrade(config, "head")
+    assert "course_id" in columns(engine, "testimonials")
+    assert "ix_testimonials_course_id" in indexes(engine, "testimonials")
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT lesson_count, enrollment_count FROM course_stats WHERE course_id = 1")).one()
+    assert tuple(row) == (1, 1)
+
+
+def test_duplicate_progress_rows_are_merged_before_the_unique_constraint(database):
+    engine, config = database
+    legacy_schema(engine, config)
+    with engine.begin() as conn:
+        for watched, completed in ((30, False), (90, True), (60, False)):
+            conn.execute(text(
+                "INSERT INTO lesson_progress (enrollment_id, lesson_id, watch_time_seconds, is_completed)"
+                " VALUES (1, 1, :watched, :completed)"
+            ), {"watched": watched, "completed": completed})
+
+    command.upgrade(config, "head")
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT watch_time_seconds, is_completed FROM lesson_progress")).all()
+    assert rows == [(90, 1)]
+    assert "uq_lesson_progress_enrollment_lesson" in {
+        c["name"] for c in inspect(engine).get_unique_constraints("lesson_progress")
+    }
+
+
+def test_enrollments_gain_updated_at_from_enrolled_at(database):
+    engine, config = database
+    legacy_schema(engine, config)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO enrollments (user_id, course_id, student_name, student_email, student_phone, student_city,"
+            " course_title, course_price, payment_amount, enrolled_at)"
+            " VALUES (1, 1, 'S', 's@x.com', '1', 'Pune', 'C', '100', 100, '2026-01-05 10:00:00')"
+        ))
+    assert "updated_at" not in columns(engine, "enrollments")
+
+    command.upgrade(config, "head")
+    assert "ix_enrollments_updated_at" in indexes(engine, "enrollments")
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT updated_at FROM enrollments")).scalar() == "2026-01-05 10:00:00"
+        conn.execute(text(
+            "INSERT INTO enrollments (user_id, course_id, student_name, student_email, student_phone, student_city,"
+            " course_title, course_price, payment_amount) VALUES (1, 1, 'T', 't@x.com', '1', 'Pune', 'C', '100', 100)"
+        ))
+        assert conn.execute(text("SELECT COUNT(*) FROM enrollments WHERE updated_at IS NULL")).scalar() == 0
+
+
+def test_consultation_slots_are_parsed_and_double_bookings_left_out(database):
+    engine, config = database
+    legacy_schema(engine, config)
+    with engine.begin() as conn:
+        for preferred_date, preferred_time, status in (
+            ("2026-03-02", "11:00", "scheduled"),
+            ("2026-03-02", "11:00", "scheduled"),
+            ("2026-03-02", "11:00", "cancelled"),
+            ("someday", "noon", "scheduled"),
+        ):
+            conn.execute(text(
+                "INSERT INTO consultation_schedules (name, email, phone, preferred_date, preferred_time, status)"
+                " VALUES ('C', 'c@x.com', '1', :d, :t, :s)"
+            ), {"d": preferred_date, "t": preferred_time, "s": status})
+    assert "scheduled_date" not in columns(engine, "consultation_schedules")
+
+    command.upgrade(config, "head")
+    assert {"ix_consultation_slot_lookup", "uq_consultation_booked_slot"} <= indexes(engine, "consultation_schedules")
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT scheduled_date FROM consultation_schedules ORDER BY id")).scalars().all()
+    assert rows == ["2026-03-02", None, "2026-03-02", None]
+
+
+def test_reminder_columns_are_added_and_remind_at_backfilled(database):
+    engine, config = database
+    legacy_schema(engine, config)
+    command.upgrade(config, "0004_consultation_scheduled_slot")
+    with engine.begin() as conn:
+        for status in ("scheduled", "cancelled"):
+            conn.execute(text(
+                "INSERT INTO consultation_schedules (name, email, phone, preferred_date, preferred_time,"
+                " scheduled_date, scheduled_time, status) VALUES ('C', 'c@x.com', '1', '2026-03-02', '11:00',"
+                " '2026-03-02', '11:00:00.000000', :s)"
+            ), {"s": status})
+    assert "remind_at" not in columns(engine, "consultation_schedules")
+
+    command.upgrade(config, "head")
+    assert "ix_consultation_pending_reminders" in indexes(engine, "consultation_schedules")
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT remind_at FROM consultation_schedules ORDER BY id")).scalars().all()
+    expected = reminder_time(date(2026, 3, 2), time(11, 0))
+    assert rows == [expected.isoformat(sep=" ", timespec="microseconds"), None]
+
+
+def test_enrollment_lookup_indexes_are_created(database):
+    engine, config = database
+    legacy_schema(engine, config)
+    assert "ix_enrollments_user_id_enrolled_at" not in indexes(engine, "enrollments")
+
+    command.upgrade(config, "head")
+    assert {"ix_enrollments_user_id_enrolled_at", "ix_enrollments_course_id_status"} <= indexes(engine, "enrollments")
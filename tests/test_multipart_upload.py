@@ -0,0 +1,109 @@
+import io
+import boto3
+import pytest
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from moto import mock_aws
+from app.utils import file_upload
+from app.utils.file_upload import s3_uploader, upload_course_video
+from app.utils.multipart_upload import MultipartUploader, MultipartUploadError
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=s3_uploader.bucket_name)
+        monkeypatch.setattr(s3_uploader, "s3_client", client)
+        yield client
+
+
+def video_bytes(size):
+    return bytes(i % 251 for i in range(size))
+
+
+def test_parallel_upload_streams_parts_and_reports_progress(s3):
+    data = video_bytes(23 * MB)
+    progress = []
+    uploader = MultipartUploader(concurrency=3, progress=lambda done, total: progress.append((done, total)))
+
+    result = uploader.upload(io.BytesIO(data), "course-videos/big.mp4", "video/mp4", size=len(data))
+
+    assert result.parts == 2  # 16 MB default part size
+    assert result.size == len(data)
+    assert max(done for done, _ in progress) == len(data)
+    stored = s3.get_object(Bucket=s3_uploader.bucket_name, Key="course-videos/big.mp4")
+    assert stored["Body"].read() == data
+    assert stored["ContentType"] == "video/mp4"
+
+
+def test_failed_part_can_be_resumed_without_reuploading_others(s3, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.upload_server_part_size_bytes", 5 * MB)
+    data = video_bytes(12 * MB)
+    real_upload_part = s3.upload_part
+    uploaded = []
+
+    def flaky_upload_part(**kwargs):
+        if kwargs["PartNumber"] == 2:
+            raise ConnectionError("connection reset")
+        uploaded.append(kwargs["PartNumber"])
+        return real_upload_part(**kwargs)
+
+    monkeypatch.setattr(s3, "upload_part", flaky_upload_part)
+    uploader = MultipartUploader(concurrency=1, retries=1, backoff=0)
+    with pytest.raises(MultipartUploadError) as error:
+        uploader.upload(io.BytesIO(data), "course-videos/resume.mp4", "video/mp4", size=len(data))
+    state = error.value.state
+    assert set(state.completed) == {1}
+
+    monkeypatch.setattr(s3, "upload_part", lambda **kwargs: uploaded.append(kwargs["PartNumber"]) or real_upload_part(**kwargs))
+    uploaded.clear()
+    result = uploader.resume(io.BytesIO(data), state, size=len(data))
+
+    assert uploaded == [2, 3]
+    assert result.parts == 3
+    stored = s3.get_object(Bucket=s3_uploader.bucket_name, Key="course-videos/resume.mp4")
+    assert stored["Body"].read() == data
+
+
+@pytest.mark.parametrize("failures, stored", [(1, True), (100, False)])
+def test_course_video_upload_resumes_once_then_aborts(s3, monkeypatch, failures, stored):
+    monkeypatch.setattr("app.core.config.settings.upload_server_part_size_bytes", 5 * MB)
+    monkeypatch.setattr("app.utils.multipart_upload.time.sleep", lambda seconds: None)
+    monkeypatch.setattr(file_upload, "storage", s3_uploader)
+    data = video_bytes(12 * MB)
+    real_upload_part = s3.upload_part
+    remaining = {"failures": failures * 4}  # each failure exhausts the default retries
+
+    def flaky_upload_part(**kwargs):
+        if kwargs["PartNumber"] == 2 and remaining["failures"] > 0:
+            remaining["failures"] -= 1
+            raise ConnectionError("connection reset")
+        return real_upload_part(**kwargs)
+
+    monkeypatch.setattr(s3, "upload_part", flaky_upload_part)
+    video = UploadFile(io.BytesIO(data), size=len(data), filename="intro.mp4",
+                       headers=Headers({"content-type": "video/mp4"}))
+
+    url = upload_course_video(video)
+
+    assert (url is not None) is stored
+    assert s3.list_multipart_uploads(Bucket=s3_uploader.bucket_name).get("Uploads", []) == []
+    if stored:
+        key = s3_uploader.key_from_url(url)
+        assert s3.get_object(Bucket=s3_uploader.bucket_name, Key=key)["Body"].read() == data
+
+
+def test_failed_completion_aborts_the_upload(s3, monkeypatch):
+    def rejected(*args, **kwargs):
+        raise RuntimeError("InvalidPart")
+
+    monkeypatch.setattr(s3_uploader, "complete_multipart_upload", rejected)
+    data = video_bytes(6 * MB)
+    with pytest.raises(RuntimeError):
+        MultipartUploader().upload(io.BytesIO(data), "course-videos/lost.mp4", "video/mp4", size=len(data))
+    assert s3.list_multipart_uploads(Bucket=s3_uploader.bucket_name).get("Uploads", []) == []
@@ -0,0 +1,101 @@
+from datetime import timedelta
+import pytest
+import app.main  # noqa: F401  (registers every model and job handler)
+from app.api.v1.endpoints.contact import create_contact_inquiry
+from app.core.config import settings
+from app.database.database import Base
+from app.models.job import Job
+from app.models.notification import AdminNotification
+from app.schemas.content import ContactInquiryCreate
+from app.utils import notifications
+from app.utils.jobs import JobWorker, _utcnow
+from app.utils.notifications import DIGEST_JOB, URGENT_PRIORITY, notify_admin
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    sent = []
+    monkeypatch.setattr(notifications, "send_email", lambda to, subject, body: sent.append((to, subject, body)) or True)
+    yield sent
+    for table in reversed(Base.metadata.sorted_tables):
+        with engine.begin() as conn:
+            conn.execute(table.delete())
+
+
+def digest_jobs(db):
+    return db.query(Job).filter(Job.name == DIGEST_JOB).order_by(Job.id).all()
+
+
+def make_due(db):
+    for digest in digest_jobs(db):
+        digest.run_at = _utcnow() - timedelta(seconds=1)
+    db.commit()
+
+
+def test_inquiry_burst_becomes_one_digest(outbox):
+    db = TestingSessionLocal()
+    for i in range(30):
+        create_contact_inquiry(ContactInquiryCreate(
+            name=f"Lead {i}", email=f"lead{i}@example.com", subject="Course fees", message="Hi"
+        ), db=db, current_user=None)
+
+    assert db.query(AdminNotification).count() == 30
+    [digest] = digest_jobs(db)
+    assert digest.run_at.replace(tzinfo=None) > _utcnow().replace(tzinfo=None) + timedelta(
+        seconds=settings.admin_digest_window_seconds - 30
+    )
+    assert JobWorker(TestingSessionLocal).drain() == 0  # not due yet
+    assert outbox == []
+
+    make_due(db)
+    assert JobWorker(TestingSessionLocal).drain() == 1
+    [(to, subject, body)] = outbox
+    assert to == settings.admin_email
+    assert "30 new notifications (30 contact inquiry)" in subject
+    assert body.count("New Contact Inquiry: Course fees") == 30
+    assert db.query(AdminNotification).filter(AdminNotification.sent_at.is_(None)).count() == 0
+    db.close()
+
+
+def test_urgent_notification_flushes_the_buffer_now(outbox):
+    db = TestingSessionLocal()
+    notify_admin(db, "contact_inquiry", "Question", "body")
+    notify_admin(db, "consultation", "Consultation in 30 minutes", "call them", urgent=True)
+    db.commit()
+    urgent = [j for j in digest_jobs(db) if j.priority == URGENT_PRIORITY]
+    assert len(urgent) == 1
+
+    assert JobWorker(TestingSessionLocal).drain() == 1
+    [(_, subject, body)] = outbox
+    assert "2 new notifications" in subject
+    assert body.index("[URGENT] Consultation in 30 minutes") < body.index("Question")
+
+    # The delayed digest finds nothing left to send
+    make_due(db)
+    JobWorker(TestingSessionLocal).drain()
+    assert len(outbox) == 1
+    db.close()
+
+
+def test_single_notification_keeps_its_subject(outbox):
+    db = TestingSessionLocal()
+    notify_admin(db, "contact_inquiry", "New Contact Inquiry: Demat", "body")
+    db.commit()
+    make_due(db)
+    JobWorker(TestingSessionLocal).drain()
+    assert [subject for _, subject, _ in outbox] == ["New Contact Inquiry: Demat"]
+    db.close()
+
+
+def test_failed_digest_is_retried_with_nothing_lost(outbox, monkeypatch):
+    monkeypatch.setattr(notifications, "send_email", lambda *args: False)
+    db = TestingSessionLocal()
+    notify_admin(db, "contact_inquiry", "Question", "body")
+    db.commit()
+    make_due(db)
+    assert JobWorker(TestingSessionLocal).run_once() == "retry"
+    assert db.query(AdminNotification).filter(AdminNotification.sent_at.is_(None)).count() == 1
+    db.close()
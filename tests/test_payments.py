@@ -0,0 +1,158 @@
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.database.database import Base
+from app.models.user import User, UserRole
+from app.models.course import Course, CourseLevel, CourseCategory
+from app.models.enrollment import Enrollment, EnrollmentStatus
+from app.models.job import Job
+from app.models.payment import PaymentEvent
+from app.utils.jobs import JobWorker
+from app.utils.payments import (
+    APPLY_EVENTS_JOB, WebhookSignatureError, process_pending_events, signature_header, verify_signature
+)
+from tests.conftest import memory_database
+
+SECRET = "whsec_test"
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+@pytest.fixture
+def client(monkeypatch, use_test_db):
+    monkeypatch.setattr(settings, "stripe_webhook_secret", SECRET)
+    use_test_db(TestingSessionLocal)
+    yield TestClient(app)
+    for table in reversed(Base.metadata.sorted_tables):
+        with engine.begin() as conn:
+            conn.execute(table.delete())
+
+
+def make_enrollment():
+    db = TestingSessionLocal()
+    student = User(email="payer@example.com", username="payer", full_name="Payer", hashed_password="x",
+                   role=UserRole.ADMIN, is_verified=True)
+    db.add(student)
+    db.flush()
+    course = Course(title="Options", slug="options", description="d", level=CourseLevel.BEGINNER,
+                    category=CourseCategory.DAY_TRADING, duration_weeks=2, price=100.0, instructor_id=student.id)
+    db.add(course)
+    db.flush()
+    enrollment = Enrollment(user_id=student.id, course_id=course.id, student_name="Payer",
+                            student_email="payer@example.com", student_phone="1", student_city="Surat",
+                            course_title="Options", course_price="100", payment_amount=100.0,
+                            payment_method="pending")
+    db.add(enrollment)
+    db.commit()
+    ids = enrollment.id, student.id
+    db.close()
+    return ids
+
+
+def deliver(client, event_id, event_type, enrollment_id, created):
+    payload = json.dumps({
+        "id": event_id, "type": event_type, "created": created,
+        "data": {"object": {"metadata": {"enrollment_id": str(enrollment_id)}}},
+    }).encode()
+    return client.post("/api/v1/payments/webhook", content=payload,
+                       headers={"Stripe-Signature": signature_header(payload, SECRET)})
+
+
+def enrollment_state(enrollment_id):
+    db = TestingSessionLocal()
+    enrollment = db.get(Enrollment, enrollment_id)
+    db.close()
+    return enrollment.status, enrollment.payment_method
+
+
+def test_signature_verification():
+    payload = b'{"id": "evt_1"}'
+    header = signature_header(payload, SECRET, timestamp=1_000_000)
+    verify_signature(payload, header, SECRET, 300, now=1_000_100)
+
+    with pytest.raises(WebhookSignatureError):
+        verify_signature(payload + b" ", header, SECRET, 300, now=1_000_100)
+    with pytest.raises(WebhookSignatureError):
+        verify_signature(payload, header, SECRET, 300, now=1_000_400)
+    with pytest.raises(WebhookSignatureError):
+        verify_signature(payload, "t=1000000", SECRET, 300, now=1_000_100)
+
+
+def test_webhook_rejects_bad_signatures(client):
+    payload = b'{"id": "evt_1", "type": "payment_intent.succeeded"}'
+    response = client.post("/api/v1/payments/webhook", content=payload,
+                           headers={"Stripe-Signature": signature_header(payload, "wrong")})
+    assert response.status_code == 400
+    assert client.post("/api/v1/payments/webhook", content=payload).status_code == 400
+
+
+def test_retried_deliveries_are_stored_once(client):
+    enrollment_id, _ = make_enrollment()
+    now = int(time.time())
+    first = deliver(client, "evt_paid", "payment_intent.succeeded", enrollment_id, now)
+    retry = deliver(client, "evt_paid", "payment_intent.succeeded", enrollment_id, now)
+    assert first.json()["duplicate"] is False
+    assert retry.status_code == 200 and retry.json()["duplicate"] is True
+
+    db = TestingSessionLocal()
+    assert db.query(PaymentEvent).count() == 1
+    assert db.query(Job).filter(Job.name == APPLY_EVENTS_JOB).count() == 1
+    assert process_pending_events(db) == 1
+    assert process_pending_events(db) == 0
+    db.close()
+    assert enrollment_state(enrollment_id) == (EnrollmentStatus.ACTIVE, "stripe")
+
+
+def test_out_of_order_events_converge(client):
+    enrollment_id, _ = make_enrollment()
+    now = int(time.time())
+    # The refund arrives before the payment it refunds
+    deliver(client, "evt_refund", "charge.refunded", enrollment_id, now + 60)
+    deliver(client, "evt_failed", "payment_intent.payment_failed", enrollment_id, now)
+    deliver(client, "evt_paid", "payment_intent.succeeded", enrollment_id, now + 30)
+
+    # One waiting job covers every delivery made before it runs
+    worker = JobWorker(TestingSessionLocal)
+    assert worker.drain() == 1
+    assert enrollment_state(enrollment_id) == (EnrollmentStatus.CANCELLED, "refunded")
+
+    # Late events processed in a later batch cannot move it backwards either
+    deliver(client, "evt_paid_again", "checkout.session.completed", enrollment_id, now + 90)
+    assert worker.drain() == 1
+    assert enrollment_state(enrollment_id) == (EnrollmentStatus.CANCELLED, "refunded")
+
+
+def test_unknown_enrollment_is_recorded_not_retried(client):
+    deliver(client, "evt_orphan", "payment_intent.succeeded", 999, int(time.time()))
+    db = TestingSessionLocal()
+    assert process_pending_events(db) == 1
+    event = db.query(PaymentEvent).one()
+    assert event.processed_at is not None
+    assert event.error == "No enrollment for this event"
+    db.close()
+
+
+def test_replay_reapplies_the_event_log(client):
+    enrollment_id, admin_id = make_enrollment()
+    deliver(client, "evt_paid", "payment_intent.succeeded", enrollment_id, int(time.time()))
+    worker = JobWorker(TestingSessionLocal)
+    worker.drain()
+
+    # Simulate a lost update, then rebuild from the stored events
+    db = TestingSessionLocal()
+    db.get(Enrollment, enrollment_id).payment_method = "pending"
+    db.commit()
+    db.close()
+
+    token = create_access_token({"sub": "payer@example.com", "user_id": admin_id})
+    response = client.post("/api/v1/payments/events/replay", headers={"Authorization": f"Bearer {token}"})
+    assert response.json() == {"requeued": 1}
+    assert worker.drain() == 1
+    db = TestingSessionLocal()
+    assert db.query(PaymentEvent).filter(PaymentEvent.processed_at.is_(None)).count() == 0
+    db.close()
+    assert enrollment_state(enrollment_id) == (EnrollmentStatus.ACTIVE, "stripe")
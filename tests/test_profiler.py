@@ -0,0 +1,76 @@
+import threading
+import time
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api.deps import get_current_admin
+from app.core import profiler
+from app.core.profiler import ProfiledRoute, ProfilingMiddleware, create_profile_token, verify_profile_token
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_worker_profile_returns_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    app.dependency_overrides[get_current_admin] = lambda: None
+    try:
+        response = TestClient(app).get("/api/v1/admin/profile", params={"seconds": 0.3, "interval_ms": 2})
+    finally:
+        app.dependency_overrides.pop(get_current_admin)
+        stop.set()
+        worker.join()
+
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert any("busy_loop" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0 and ";" in stack
+
+
+def test_profiling_surface_requires_admin():
+    assert TestClient(app).get("/api/v1/admin/profile", params={"seconds": 0.1}).status_code == 401
+
+
+def test_signed_header_profiles_a_single_request():
+    profiled = FastAPI()
+    profiled.add_middleware(ProfilingMiddleware)
+    router = APIRouter(route_class=ProfiledRoute)
+
+    @router.get("/slow")
+    def slow():
+        deadline = time.perf_counter() + 0.2
+        while time.perf_counter() < deadline:
+            sum(i * i for i in range(1000))
+        return {}
+
+    profiled.include_router(router)
+
+    client = TestClient(profiled)
+    assert "x-profile-id" not in client.get("/slow").headers
+    assert "x-profile-id" not in client.get("/slow", headers={"X-Profile": "123.forged"}).headers
+
+    # Other threads of the worker are left out of the request's profile
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    try:
+        response = client.get("/slow", headers={"X-Profile": create_profile_token()})
+    finally:
+        stop.set()
+        worker.join()
+    output = profiler.get_request_profile(response.headers["x-profile-id"])
+    assert "slow" in output
+    assert "busy_loop" not in output
+    assert profiler._request_threads == {}
+    assert profiler.get_request_profile("0" * 32) is None
+
+
+def test_expired_tokens_are_rejected():
+    assert verify_profile_token(create_profile_token())
+    assert not verify_profile_token(create_profile_token(valid_seconds=-1))
+    assert not verify_profile_token("not-a-token")
@@ -0,0 +1,245 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.database.database import Base
+from app.core.security import create_access_token
+from app.models.user import User, UserRole
+from app.models.course import Course, Lesson, CourseLevel, CourseCategory
+from app.models.enrollment import Enrollment, LessonProgress
+from app.utils.progress import ProgressBuffer, ProgressFlusher, progress_buffer
+from app.utils.progress_report import get_user_progress_summaries, summarize_course_progress
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+@pytest.fixture(autouse=True)
+def clean_tables():
+    yield
+    progress_buffer.drain()
+    for table in reversed(Base.metadata.sorted_tables):
+        with engine.begin() as conn:
+            conn.execute(table.delete())
+
+
+def count_writes():
+    """Count INSERT/UPDATE statements sent to the test engine"""
+    writes = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE")):
+            writes.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    return writes, lambda: event.remove(engine, "before_cursor_execute", before_execute)
+
+
+def test_heartbeats_coalesce_per_enrollment_and_lesson():
+    buffer = ProgressBuffer()
+    buffer.add(1, 10, 30)
+    buffer.add(1, 10, 20)  # late, out-of-order heartbeat
+    buffer.add(1, 10, 40, completed=True)
+    buffer.add(1, 11, 5)
+    assert len(buffer) == 2
+
+    assert buffer.flush(TestingSessionLocal) == 2
+    db = TestingSessionLocal()
+    progress = db.query(LessonProgress).filter(LessonProgress.lesson_id == 10).one()
+    assert progress.watch_time_seconds == 40
+    assert progress.is_completed
+    db.close()
+
+
+def test_flush_is_idempotent_and_never_moves_backwards():
+    buffer = ProgressBuffer()
+    buffer.add(1, 10, 120, completed=True)
+    buffer.flush(TestingSessionLocal)
+    # A replayed older heartbeat (e.g. from another worker) must not regress
+    buffer.add(1, 10, 60)
+    buffer.flush(TestingSessionLocal)
+
+    db = TestingSessionLocal()
+    progress = db.query(LessonProgress).one()
+    assert progress.watch_time_seconds == 120
+    assert progress.is_completed
+    db.close()
+
+
+def test_failed_flush_keeps_entries_buffered():
+    buffer = ProgressBuffer()
+    buffer.add(1, 10, 30)
+
+    def broken_session():
+        raise_on_execute = TestingSessionLocal()
+        raise_on_execute.execute = lambda *args, **kwargs: (_ for _ in ()).throw(RuntimeError("db down"))
+        return raise_on_execute
+
+    assert buffer.flush(broken_session) == 0
+    assert len(buffer) == 1
+    buffer.add(1, 10, 45)
+    assert buffer.flush(TestingSessionLocal) == 1
+    db = TestingSessionLocal()
+    assert db.query(LessonProgress).one().watch_time_seconds == 45
+    db.close()
+
+
+def test_load_thousands_of_concurrent_viewers():
+    viewers, heartbeats_per_viewer = 3000, 6
+    buffer = ProgressBuffer()
+    flusher = ProgressFlusher(buffer, TestingSessionLocal, interval_seconds=0.05)
+    writes, stop_counting = count_writes()
+    expected = {}
+
+    def viewer(viewer_id):
+        enrollment_id, lesson_id = viewer_id, viewer_id % 50 + 1
+        watched = 0
+        for _ in range(heartbeats_per_viewer):
+            watched += random.randint(8, 12)
+            buffer.add(enrollment_id, lesson_id, watched)
+        return (enrollment_id, lesson_id), watched
+
+    flusher.start()
+    try:
+        with ThreadPoolExecutor(max_workers=64) as pool:
+            expected = dict(pool.map(viewer, range(1, viewers + 1)))
+    finally:
+        flusher.stop()
+        stop_counting()
+
+    db = TestingSessionLocal()
+    stored = dict(
+        ((row.enrollment_id, row.lesson_id), row.watch_time_seconds)
+        for row in db.query(LessonProgress).all()
+    )
+    db.close()
+    assert stored == expected
+    # Far fewer statements than heartbeats: writes are coalesced and batched
+    assert len(writes) < viewers * heartbeats_per_viewer / 50
+
+
+def test_ingest_endpoint_only_accepts_own_enrollments(use_test_db):
+    db = TestingSessionLocal()
+    student = User(email="viewer@example.com", username="viewer", full_name="Viewer", hashed_password="x")
+    instructor = User(
+        email="teacher@example.com", username="teacher", full_name="Teacher",
+        hashed_password="x", role=UserRole.INSTRUCTOR
+    )
+    db.add_all([student, instructor])
+    db.flush()
+    course = Course(
+        title="Charts", slug="charts", description="d", level=CourseLevel.BEGINNER,
+        category=CourseCategory.TECHNICAL_ANALYSIS, duration_weeks=1, price=1.0,
+        instructor_id=instructor.id
+    )
+    db.add(course)
+    db.flush()
+    lesson = Lesson(course_id=course.id, title="Candles", order=1, duration_minutes=10)
+    enrollment = Enrollment(
+        user_id=student.id, course_id=course.id, student_name="Viewer", student_email="viewer@example.com",
+        student_phone="1", student_city="Surat", course_title="Charts", course_price="1", payment_amount=1.0
+    )
+    db.add_all([lesson, enrollment])
+    db.commit()
+    ids = student.id, enrollment.id, lesson.id
+    db.close()
+    student_id, enrollment_id, lesson_id = ids
+
+    use_test_db(TestingSessionLocal)
+    token = create_access_token({"sub": "viewer@example.com", "user_id": student_id})
+    response = TestClient(app).post(
+        "/api/v1/progress/heartbeats",
+        json={"heartbeats": [
+            {"enrollment_id": enrollment_id, "lesson_id": lesson_id, "watch_time_seconds": 30},
+            {"enrollment_id": enrollment_id + 1, "lesson_id": lesson_id, "watch_time_seconds": 30},
+        ]},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 1, "rejected": 1}
+    assert progress_buffer.flush(TestingSessionLocal) == 1
+
+    # Completions skip the buffer; watch time and watched_at are clamped
+    response = TestClient(app).post(
+        "/api/v1/progress/heartbeats",
+        json={"heartbeats": [{
+            "enrollment_id": enrollment_id, "lesson_id": lesson_id, "watch_time_seconds": 10 ** 9,
+            "completed": True, "watched_at": "2999-01-01T00:00:00Z",
+        }]},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.json() == {"accepted": 1, "rejected": 0}
+    assert len(progress_buffer) == 0
+    db = TestingSessionLocal()
+    progress = db.query(LessonProgress).one()
+    assert progress.is_completed
+    assert progress.watch_time_seconds == 600
+    assert progress.last_watched_at.year < 2999
+    db.close()
+
+
+def test_user_summary_is_one_aggregate_query():
+    db = TestingSessionLocal()
+    student = User(email="s@example.com", username="s", full_name="S", hashed_password="x")
+    db.add(student)
+    db.flush()
+    course = Course(
+        title="Options", slug="options", description="d", level=CourseLevel.ADVANCED,
+        category=CourseCategory.OPTIONS_TRADING, duration_weeks=2, price=1.0, instructor_id=student.id
+    )
+    db.add(course)
+    db.flush()
+    lessons = [Lesson(course_id=course.id, title=f"L{i}", order=i) for i in range(1, 4)]
+    enrollment = Enrollment(
+        user_id=student.id, course_id=course.id, student_name="S", student_email="s@example.com",
+        student_phone="1", student_city="Pune", course_title="Options", course_price="1", payment_amount=1.0
+    )
+    db.add_all(lessons + [enrollment])
+    db.flush()
+    db.add_all([
+        LessonProgress(enrollment_id=enrollment.id, lesson_id=lessons[0].id, is_completed=True, watch_time_seconds=300),
+        LessonProgress(enrollment_id=enrollment.id, lesson_id=lessons[1].id, watch_time_seconds=45),
+    ])
+    db.commit()
+    student_id = student.id
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        [summary] = get_user_progress_summaries(db, student_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    db.close()
+
+    assert len(statements) == 1
+    assert summary["total_lessons"] == 3
+    assert summary["completed_lessons"] == 1
+    assert summary["completion_ratio"] == round(1 / 3, 4)
+    assert summary["watch_time_seconds"] == 345
+    assert summary["next_lesson_title"] == "L2"
+
+
+def test_vectorized_course_progress_matches_naive_computation():
+    rng = random.Random(7)
+    lesson_ids = [30, 10, 20, 40]  # course order differs from id order
+    enrollment_ids = list(range(100, 1100))
+    rows = []
+    for enrollment_id in enrollment_ids:
+        for lesson_id in lesson_ids:
+            if rng.random() < 0.6:
+                rows.append((enrollment_id, lesson_id, rng.randint(0, 900), rng.random() < 0.5))
+    rows.append((9999, 10, 60, True))  # progress for an unknown enrollment is ignored
+
+    stats = summarize_course_progress(lesson_ids, enrollment_ids, rows)
+
+    for position, enrollment_id in enumerate(enrollment_ids):
+        own = [row for row in rows if row[0] == enrollment_id]
+        done = {row[1] for row in own if row[3]}
+        assert stats["completed_lessons"][position] == len(done)
+        assert stats["watch_time_seconds"][position] == sum(row[2] for row in own)
+        expected_next = next((lesson for lesson in lesson_ids if lesson not in done), -1)
+        assert stats["next_lesson_id"][position] == expected_next
@@ -0,0 +1,61 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.core.metrics import MetricsMiddleware
+from app.database.database import Base
+from app.database.query_stats import fingerprint
+from app.models.user import User, UserRole
+from app.models.course import Course, Lesson, CourseLevel, CourseCategory
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+
+def test_fingerprint_collapses_in_lists_and_whitespace():
+    assert fingerprint("SELECT *\n  FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+    assert fingerprint("SELECT * FROM t WHERE id IN (%(id_1)s, %(id_2)s)") == "SELECT * FROM t WHERE id IN (?)"
+
+
+def test_catalogue_query_count_does_not_grow_with_courses(query_budget, use_test_db):
+    db = TestingSessionLocal()
+    instructor = User(email="qs@example.com", username="qs", full_name="Instructor",
+                      hashed_password="x", role=UserRole.INSTRUCTOR)
+    db.add(instructor)
+    db.flush()
+    for i in range(10):
+        course = Course(
+            title=f"Course {i}", slug=f"qs-course-{i}", description="d", level=CourseLevel.BEGINNER,
+            category=CourseCategory.STOCK_MARKET, duration_weeks=2, price=10.0,
+            is_published=True, instructor_id=instructor.id
+        )
+        db.add(course)
+        db.flush()
+        db.add(Lesson(course_id=course.id, title="Intro", order=1))
+    db.commit()
+    db.close()
+
+    use_test_db(TestingSessionLocal)
+    with query_budget(max_queries=3, max_repeats=1) as requests:
+        response = TestClient(app).get("/api/v1/courses/")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 10
+    assert requests[0].route == "/api/v1/courses/"
+    assert requests[0].stats.count > 0
+
+
+def test_repeated_statements_are_reported(capsys, use_test_db):
+    n_plus_one = FastAPI()
+    n_plus_one.add_middleware(MetricsMiddleware, server_timing=True)
+
+    @n_plus_one.get("/loop")
+    def loop(db=Depends(use_test_db(TestingSessionLocal))):
+        for i in range(20):
+            db.execute(text("SELECT :i"), {"i": i})
+        return {}
+
+    response = TestClient(n_plus_one).get("/loop")
+    assert 'db;dur=' in response.headers["server-timing"]
+    assert 'desc="20 queries"' in response.headers["server-timing"]
+    assert "possible N+1: statement ran 20 times" in capsys.readouterr().out
@@ -0,0 +1,78 @@
+import io
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+from app.main import app
+from app.utils import file_upload
+from app.utils.images import process_image
+from app.utils.storage import LocalStorage, Storage
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path), "/media")
+    monkeypatch.setattr(file_upload, "storage", storage)
+    return storage
+
+
+def test_range_request_returns_partial_content(local_storage):
+    data = bytes(range(256)) * 4096  # 1 MiB
+    local_storage.put_bytes("course-videos/intro.mp4", data, "video/mp4")
+    client = TestClient(app)
+
+    response = client.get("/media/course-videos/intro.mp4", headers={"Range": "bytes=1000-1999"})
+    assert response.status_code == 206
+    assert response.content == data[1000:2000]
+    assert response.headers["content-range"] == f"bytes 1000-1999/{len(data)}"
+    assert response.headers["content-type"] == "video/mp4"
+
+    full = client.get("/media/course-videos/intro.mp4")
+    assert full.status_code == 200
+    assert full.headers["accept-ranges"] == "bytes"
+    assert full.content == data
+
+    assert client.get("/media/course-videos/missing.mp4").status_code == 404
+    assert local_storage.stat("course-videos") is None
+    assert client.get("/media/course-videos").status_code == 404
+
+
+def test_backends_must_implement_the_interface():
+    class Incomplete(Storage):
+        def public_url(self, key):
+            return key
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_keys_cannot_escape_the_media_root(local_storage, tmp_path):
+    with pytest.raises(ValueError):
+        local_storage.path_for("../outside.txt")
+    assert local_storage.stat("../outside.txt") is None
+    assert local_storage.key_from_url("https://example.com/media/a.png") is None
+    assert local_storage.key_from_url("/media/a/b.png") == "a/b.png"
+    assert TestClient(app).get("/media/%2e%2e/outside.txt").status_code == 404
+
+
+def test_delete_file_removes_only_local_urls(local_storage):
+    local_storage.put_bytes("lesson-materials/notes.pdf", b"%PDF", "application/pdf")
+    url = local_storage.public_url("lesson-materials/notes.pdf")
+
+    assert local_storage.delete_file("https://bucket.s3.amazonaws.com/lesson-materials/notes.pdf") is False
+    assert local_storage.delete_file(url) is True
+    assert local_storage.stat("lesson-materials/notes.pdf") is None
+
+
+def test_image_variants_on_local_storage(local_storage):
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 600), (200, 30, 30)).save(buffer, "PNG")
+
+    result = process_image(buffer.getvalue(), "course_thumbnail")
+    assert result["url"].startswith("/media/course-thumbnails/")
+    assert result["generated"] == 3
+
+    base = result["url"].rsplit("/", 1)[0]
+    variant = TestClient(app).get(f"{base}/w320.webp")
+    assert variant.status_code == 200
+    assert variant.headers["content-type"] == "image/webp"
+    assert Image.open(io.BytesIO(variant.content)).size == (320, 240)
@@ -0,0 +1,201 @@
+import io
+import boto3
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from PIL import Image
+from app.main import app
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.database.database import Base
+from app.models.user import User, UserRole
+from app.models.course import Course, CourseLevel, CourseCategory
+from app.utils import file_upload
+from app.utils.file_upload import s3_uploader
+from app.utils.jobs import JobWorker
+from tests.conftest import memory_database
+
+engine, TestingSessionLocal = memory_database(Base.metadata)
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=s3_uploader.bucket_name)
+        monkeypatch.setattr(s3_uploader, "s3_client", client)
+        yield client
+
+
+@pytest.fixture
+def client(s3, use_test_db):
+    use_test_db(TestingSessionLocal)
+    yield TestClient(app)
+    for table in reversed(Base.metadata.sorted_tables):
+        with engine.begin() as conn:
+            conn.execute(table.delete())
+
+
+def make_instructor(db, name):
+    instructor = User(email=f"{name}@example.com", username=name, full_name=name.title(),
+                      hashed_password="x", role=UserRole.INSTRUCTOR, is_verified=True)
+    db.add(instructor)
+    db.flush()
+    course = Course(title=f"{name} course", slug=f"{name}-course", description="d",
+                    level=CourseLevel.BEGINNER, category=CourseCategory.STOCK_MARKET,
+                    duration_weeks=4, price=100.0, instructor_id=instructor.id)
+    db.add(course)
+    db.commit()
+    return instructor.id, course.id
+
+
+def auth(user_id):
+    token = create_access_token({"sub": "user", "user_id": user_id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def png_bytes(size=(300, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_small_upload_goes_straight_to_s3_with_presigned_post(client):
+    db = TestingSessionLocal()
+    user_id, _ = make_instructor(db, "alice")
+    db.close()
+    avatar = png_bytes()
+
+    ticket = client.post("/api/v1/uploads/presign", headers=auth(user_id), json={
+        "target": "user_avatar", "entity_id": user_id, "filename": "me.png",
+        "content_type": "image/png", "size": len(avatar),
+    })
+    assert ticket.status_code == 200
+    ticket = ticket.json()
+    assert ticket["method"] == "POST"
+    assert ticket["key"].startswith(f"user-avatars/{user_id}/")
+
+    upload = requests.post(ticket["url"], data=ticket["fields"], files={"file": ("me.png", avatar)})
+    assert upload.status_code in (200, 204)
+
+    done = client.post("/api/v1/uploads/complete", headers=auth(user_id), json={
+        "target": "user_avatar", "entity_id": user_id, "key": ticket["key"],
+    })
+    assert done.status_code == 200
+    assert done.json() == {"url": s3_uploader.public_url(ticket["key"]), "srcset": None}
+    db = TestingSessionLocal()
+    assert db.get(User, user_id).profile_image_url == done.json()["url"]
+    db.close()
+
+    # A worker moves the image into the variant pipeline's layout and drops the raw upload
+    assert JobWorker(TestingSessionLocal).drain() == 1
+    db = TestingSessionLocal()
+    assert db.get(User, user_id).profile_image_url.endswith("/original.png")
+    db.close()
+    assert s3_uploader.head_object(ticket["key"]) is None
+
+
+def test_rejected_direct_image_is_detached_by_the_worker(client):
+    db = TestingSessionLocal()
+    user_id, _ = make_instructor(db, "dave")
+    db.close()
+    ticket = client.post("/api/v1/uploads/presign", headers=auth(user_id), json={
+        "target": "user_avatar", "entity_id": user_id, "filename": "me.png",
+        "content_type": "image/png", "size": 9,
+    }).json()
+    requests.post(ticket["url"], data=ticket["fields"], files={"file": ("me.png", b"not a png")})
+
+    done = client.post("/api/v1/uploads/complete", headers=auth(user_id), json={
+        "target": "user_avatar", "entity_id": user_id, "key": ticket["key"],
+    })
+    assert done.status_code == 200
+    assert JobWorker(TestingSessionLocal).drain() == 1
+    db = TestingSessionLocal()
+    assert db.get(User, user_id).profile_image_url is None
+    db.close()
+    assert s3_uploader.head_object(ticket["key"]) is None
+
+
+def test_large_video_uses_presigned_multipart_upload(client, monkeypatch):
+    monkeypatch.setattr(settings, "upload_multipart_threshold_bytes", 5 * MB)
+    monkeypatch.setattr(settings, "upload_part_size_bytes", 5 * MB)
+    db = TestingSessionLocal()
+    user_id, course_id = make_instructor(db, "bob")
+    db.close()
+    video = b"v" * (7 * MB)
+
+    ticket = client.post("/api/v1/uploads/presign", headers=auth(user_id), json={
+        "target": "course_video", "entity_id": course_id, "filename": "intro.mp4",
+        "content_type": "video/mp4", "size": len(video),
+    }).json()
+    assert ticket["method"] == "MULTIPART"
+    assert len(ticket["parts"]) == 2
+
+    etags = []
+    for part in ticket["parts"]:
+        start = (part["part_number"] - 1) * ticket["part_size"]
+        response = requests.put(part["url"], data=video[start:start + ticket["part_size"]])
+        assert response.status_code == 200
+        etags.append({"part_number": part["part_number"], "etag": response.headers["ETag"]})
+
+    done = client.post("/api/v1/uploads/complete", headers=auth(user_id), json={
+        "target": "course_video", "entity_id": course_id, "key": ticket["key"],
+        "upload_id": ticket["upload_id"], "parts": etags,
+    })
+    assert done.status_code == 200
+    db = TestingSessionLocal()
+    assert db.get(Course, course_id).video_intro_url == done.json()["url"]
+    db.close()
+
+
+def test_course_video_can_be_streamed_through_the_api(client, monkeypatch):
+    monkeypatch.setattr(file_upload, "storage", s3_uploader)
+    db = TestingSessionLocal()
+    user_id, course_id = make_instructor(db, "carol")
+    db.close()
+    video = b"v" * (6 * MB)
+
+    rejected = client.post(f"/api/v1/uploads/course-video/{course_id}", headers=auth(user_id),
+                           files={"file": ("intro.txt", b"text", "text/plain")})
+    assert rejected.status_code == 400
+    done = client.post(f"/api/v1/uploads/course-video/{course_id}", headers=auth(user_id),
+                       files={"file": ("intro.mp4", video, "video/mp4")})
+    assert done.status_code == 200
+    key = s3_uploader.key_from_url(done.json()["url"])
+    assert s3_uploader.s3_client.get_object(Bucket=s3_uploader.bucket_name, Key=key)["Body"].read() == video
+    db = TestingSessionLocal()
+    assert db.get(Course, course_id).video_intro_url == done.json()["url"]
+    db.close()
+
+
+def test_uploads_are_checked_against_target_and_owner(client):
+    db = TestingSessionLocal()
+    alice_id, alice_course = make_instructor(db, "alice")
+    bob_id, _ = make_instructor(db, "bob")
+    db.close()
+
+    def presign(user_id, **overrides):
+        payload = {"target": "course_thumbnail", "entity_id": alice_course, "filename": "t.jpg",
+                   "content_type": "image/jpeg", "size": 1024}
+        payload.update(overrides)
+        return client.post("/api/v1/uploads/presign", headers=auth(user_id), json=payload)
+
+    assert presign(bob_id).status_code == 403
+    assert presign(alice_id, content_type="application/x-msdownload").status_code == 400
+    assert presign(alice_id, size=50 * MB).status_code == 400
+
+    # A key issued for another row cannot be attached here
+    ticket = presign(alice_id).json()
+    stolen = client.post("/api/v1/uploads/complete", headers=auth(alice_id), json={
+        "target": "user_avatar", "entity_id": alice_id, "key": ticket["key"],
+    })
+    assert stolen.status_code == 400
+    missing = client.post("/api/v1/uploads/complete", headers=auth(alice_id), json={
+        "target": "course_thumbnail", "entity_id": alice_course, "key": ticket["key"],
+    })
+    assert missing.status_code == 400